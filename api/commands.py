@@ -649,3 +649,19 @@ where sites.id is null limit 1000"""
                 break
 
     click.echo(click.style("Fix for missing app-related sites completed successfully!", fg="green"))
+
+
+@click.command("build-builtin-tool-snapshot", help="Write the snapshot of the builtin tool providers.")
+def build_builtin_tool_snapshot():
+    from core.tools.tool_manager import ToolManager
+
+    count = ToolManager.write_builtin_providers_snapshot()
+    click.echo(click.style(f"Snapshot of {count} builtin tool providers written.", fg="green"))
+
+
+@click.command("build-model-provider-snapshot", help="Write the snapshot of the model providers.")
+def build_model_provider_snapshot():
+    from core.model_runtime.model_providers import model_provider_factory
+
+    count = model_provider_factory.write_providers_snapshot()
+    click.echo(click.style(f"Snapshot of {count} model providers written.", fg="green"))
@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -62,6 +63,28 @@ class AppExecutionConfig(BaseSettings):
         default=0,
     )
 
+    APP_TASK_STOP_WATCHER_ENABLED: bool = Field(
+        description="Check the stop flags of all the streams of a process in one background poll, instead of"
+        " checking Redis on every streamed event and waking every stream up each second",
+        default=False,
+    )
+
+    APP_TASK_STOP_WATCHER_INTERVAL: PositiveFloat = Field(
+        description="Seconds between two checks of the stop flags by the background poll",
+        default=0.5,
+    )
+
+    APP_STREAM_COALESCE_WINDOW_MS: NonNegativeInt = Field(
+        description="Merge the streamed text deltas of an answer received within this many milliseconds into one"
+        " event, 0 sends one event per delta",
+        default=0,
+    )
+
+    APP_STREAM_COALESCE_MAX_BYTES: PositiveInt = Field(
+        description="Size of merged text deltas that sends the event before the end of the window",
+        default=64,
+    )
+
 
 class CodeExecutionSandboxConfig(BaseSettings):
     """
@@ -388,6 +411,50 @@ class ModelLoadBalanceConfig(BaseSettings):
         default=False,
     )
 
+    MODEL_LB_STRATEGY: Literal["round_robin", "latency_weighted", "least_latency"] = Field(
+        description="How load balanced model calls choose a config: round robin, random weighted by the inverse"
+        " of the latency observed by the process, or the config with the least observed latency",
+        default="round_robin",
+    )
+
+    MODEL_CONCURRENCY_LIMIT_ENABLED: bool = Field(
+        description="Limit the concurrent calls of a process to each provider credential and model, the limit adapts"
+        " to the observed latency and rate limit errors and calls over it wait for a free slot",
+        default=False,
+    )
+
+    MODEL_CONCURRENCY_INITIAL_LIMIT: PositiveInt = Field(
+        description="Initial concurrency limit of a provider credential and model",
+        default=16,
+    )
+
+    MODEL_CONCURRENCY_MAX_LIMIT: PositiveInt = Field(
+        description="Maximum concurrency limit of a provider credential and model",
+        default=128,
+    )
+
+    MODEL_CONCURRENCY_QUEUE_TIMEOUT: PositiveFloat = Field(
+        description="Seconds a call waits for a free slot before failing",
+        default=60,
+    )
+
+    MODEL_HEDGING_ENABLED: bool = Field(
+        description="Send embedding and rerank calls slower than the p95 latency of the model again to another load"
+        " balanced credential and use the first result",
+        default=False,
+    )
+
+    MODEL_HEDGING_MAX_WORKERS: PositiveInt = Field(
+        description="Number of threads running hedged model calls",
+        default=16,
+    )
+
+    MODEL_PROVIDER_SNAPSHOT_ENABLED: bool = Field(
+        description="Load the model provider schemas from the snapshot written by `flask build-model-provider-snapshot`"
+        " when it matches the sources, importing the module of a provider only when it is used",
+        default=False,
+    )
+
 
 class BillingConfig(BaseSettings):
     """
@@ -436,11 +503,27 @@ class WorkflowConfig(BaseSettings):
         default=3,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs kept in process for reuse across runs. 0 to disable.",
+        default=128,
+    )
+
     MAX_VARIABLE_SIZE: PositiveInt = Field(
         description="Maximum size in bytes for a single variable in workflows. Default to 200 KB.",
         default=200 * 1024,
     )
 
+    WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD: NonNegativeInt = Field(
+        description="Size in bytes above which workflow node inputs, process data and outputs and workflow run outputs"
+        " are saved to the storage, keeping only a reference and a preview in the database. 0 to disable.",
+        default=0,
+    )
+
+    WORKFLOW_PAYLOAD_PREVIEW_LENGTH: PositiveInt = Field(
+        description="Maximum length of each value kept in the database preview of an offloaded workflow payload",
+        default=1000,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -448,10 +531,55 @@ class WorkflowNodeExecutionConfig(BaseSettings):
     """
 
     MAX_SUBMIT_COUNT: PositiveInt = Field(
-        description="Maximum number of submitted thread count in a ThreadPool for parallel node execution",
+        description="Maximum number of submitted thread count in a ThreadPool for parallel node execution."
+        " With WORKFLOW_EXECUTOR_ENABLED, maximum number of parallel tasks a tenant runs at once,"
+        " further tasks wait instead of failing",
         default=100,
     )
 
+    WORKFLOW_EXECUTOR_ENABLED: bool = Field(
+        description="Run the parallel branches and parallel iterations of all workflows in one bounded pool"
+        " per process, with fair scheduling between tenants and apps and priority for streaming runs",
+        default=False,
+    )
+
+    WORKFLOW_EXECUTOR_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of parallel workflow tasks a process runs at once",
+        default=100,
+    )
+
+    WORKFLOW_EXECUTOR_INTERACTIVE_WEIGHT: PositiveFloat = Field(
+        description="How many times as often the tasks of streaming runs are picked as the tasks of blocking runs",
+        default=4.0,
+    )
+
+    WORKFLOW_EXECUTOR_MAX_QUEUE_SIZE: NonNegativeInt = Field(
+        description="Number of waiting workflow tasks over which new workflow runs are rejected, 0 to disable",
+        default=0,
+    )
+
+    WORKFLOW_EXECUTOR_STATS_LOG_INTERVAL: NonNegativeFloat = Field(
+        description="Interval in seconds at which the workflow executor logs its queue depth and queue wait time"
+        " while it has tasks, 0 to disable",
+        default=60.0,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer workflow node execution records in memory and persist them in batches"
+        " instead of committing on every node event. Pending records are always flushed when the run finishes.",
+        default=False,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE: PositiveInt = Field(
+        description="Number of buffered workflow node execution records that triggers a flush",
+        default=50,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_FLUSH_INTERVAL: PositiveFloat = Field(
+        description="Maximum time in seconds a workflow node execution record stays buffered before it is flushed",
+        default=1.0,
+    )
+
 
 class AuthConfig(BaseSettings):
     """
@@ -498,6 +626,52 @@ class AuthConfig(BaseSettings):
         default=86400,
     )
 
+    SERVICE_API_AUTH_CACHE_ENABLED: bool = Field(
+        description="Cache the api token, tenant status and end users resolved by the service API authentication",
+        default=False,
+    )
+
+    SERVICE_API_AUTH_CACHE_TTL: PositiveInt = Field(
+        description="Time (in seconds) a service API authentication entry is kept in Redis."
+        " Nothing clears the cached tenant status when a workspace is archived, its service API keeps"
+        " accepting requests for up to SERVICE_API_AUTH_CACHE_TTL + SERVICE_API_AUTH_LOCAL_CACHE_TTL seconds",
+        default=300,
+    )
+
+    SERVICE_API_AUTH_LOCAL_CACHE_TTL: NonNegativeInt = Field(
+        description="Time (in seconds) a service API authentication entry is kept in process,"
+        " a revoked token is accepted by the other processes for up to this long",
+        default=10,
+    )
+
+    SERVICE_API_AUTH_LOCAL_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of service API authentication entries kept in process",
+        default=10000,
+    )
+
+    API_TOKEN_LAST_USED_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval (in seconds) between batched writes of api token last_used_at"
+        " when the service API authentication cache is enabled",
+        default=60,
+    )
+
+    CONSOLE_SESSION_CACHE_ENABLED: bool = Field(
+        description="Cache the status, current workspace and role of console accounts between requests",
+        default=False,
+    )
+
+    CONSOLE_SESSION_CACHE_TTL: PositiveInt = Field(
+        description="Time (in seconds) a console account session is cached,"
+        " bounds how long a ban made outside of Dify takes to apply",
+        default=60,
+    )
+
+    ACCOUNT_LAST_ACTIVE_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval (in seconds) between batched writes of account last_active_at"
+        " when the console session cache is enabled",
+        default=60,
+    )
+
 
 class ModerationConfig(BaseSettings):
     """
@@ -509,6 +683,11 @@ class ModerationConfig(BaseSettings):
         default=300,
     )
 
+    MODERATION_MAX_WORKERS: PositiveInt = Field(
+        description="Number of threads shared by all streaming responses to moderate their outputs",
+        default=8,
+    )
+
 
 class ToolConfig(BaseSettings):
     """
@@ -520,6 +699,12 @@ class ToolConfig(BaseSettings):
         default=3600,
     )
 
+    BUILTIN_TOOL_SNAPSHOT_ENABLED: bool = Field(
+        description="Load the builtin tool providers from the snapshot written by `flask build-builtin-tool-snapshot`"
+        " when it matches the sources, importing the module of a provider or tool only when it is used",
+        default=False,
+    )
+
 
 class MailConfig(BaseSettings):
     """
@@ -650,6 +835,85 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    RETENTION_BATCH_SIZE: PositiveInt = Field(
+        description="Number of rows deleted per transaction by the message, dataset and embedding cache cleanup tasks",
+        default=1000,
+    )
+
+    RETENTION_BATCH_INTERVAL: NonNegativeFloat = Field(
+        description="Seconds to sleep between two batches of the cleanup tasks, to throttle the load on the database",
+        default=0,
+    )
+
+    RETENTION_MAX_DURATION: NonNegativeInt = Field(
+        description="Maximum duration in seconds of a cleanup task run, the next run resumes where it stopped."
+        " 0 means unlimited",
+        default=0,
+    )
+
+    RETRIEVAL_EXECUTOR_MAX_WORKERS: PositiveInt = Field(
+        description="Number of threads shared by all knowledge retrievals of a process",
+        default=32,
+    )
+
+    RETRIEVAL_MAX_CONCURRENCY_PER_REQUEST: PositiveInt = Field(
+        description="Maximum number of searches or datasets a retrieval runs concurrently, including its own thread",
+        default=4,
+    )
+
+    RETRIEVAL_RERANK_CANDIDATE_FACTOR: NonNegativeInt = Field(
+        description="When retrieving from several datasets, rerank at most top_k times this factor documents,"
+        " chosen by their score normalized per dataset. 0 reranks every retrieved document",
+        default=0,
+    )
+
+    RETRIEVAL_TIMEOUT: NonNegativeFloat = Field(
+        description="Seconds to wait for the searches of a retrieval before giving up, 0 means no timeout",
+        default=0,
+    )
+
+    RETRIEVAL_CACHE_ENABLED: bool = Field(
+        description="Cache the knowledge retrieval results of apps in Redis until the dataset changes",
+        default=False,
+    )
+
+    RETRIEVAL_CACHE_TTL: PositiveInt = Field(
+        description="Seconds a cached retrieval result is kept",
+        default=600,
+    )
+
+    RETRIEVAL_CACHE_MAX_ENTRY_SIZE: PositiveInt = Field(
+        description="Maximum size in bytes of a cached retrieval result, larger results are not cached",
+        default=262144,
+    )
+
+    RETRIEVAL_CACHE_METRICS_LOG_INTERVAL: NonNegativeFloat = Field(
+        description="Interval in seconds at which the retrieval cache logs its hit, miss, store, oversized and error"
+        " counts while it is used, 0 to disable",
+        default=60.0,
+    )
+
+    RETRIEVAL_CACHE_DISABLED_APP_IDS: str = Field(
+        description="Comma-separated list of app ids whose retrievals are never cached",
+        default="",
+    )
+
+    @property
+    def RETRIEVAL_CACHE_DISABLED_APP_IDS_SET(self) -> set[str]:
+        return {item.strip() for item in self.RETRIEVAL_CACHE_DISABLED_APP_IDS.split(",") if item.strip() != ""}
+
+    PARTITION_RETENTION_ENABLED: bool = Field(
+        description="Enable dropping expired monthly partitions of the messages, workflow runs and embeddings tables"
+        " (Oracle only)",
+        default=False,
+    )
+
+    WORKFLOW_RUN_RETENTION_DAYS: NonNegativeInt = Field(
+        description="Days to keep workflow runs and node executions when partition retention is enabled,"
+        " 0 means forever",
+        default=0,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -672,6 +936,22 @@ class IndexingConfig(BaseSettings):
         default=4000,
     )
 
+    INDEXING_STREAMING_ENABLED: bool = Field(
+        description="Index uploaded files in paragraph mode with a streaming pipeline, extracting, splitting and"
+        " embedding batches of the document concurrently instead of holding the whole document in memory",
+        default=False,
+    )
+
+    INDEXING_STREAMING_BATCH_SIZE: PositiveInt = Field(
+        description="Number of extracted pages or rows transformed and loaded together by the streaming pipeline",
+        default=100,
+    )
+
+    INDEXING_STREAMING_QUEUE_SIZE: PositiveInt = Field(
+        description="Maximum number of batches buffered between two stages of the streaming pipeline",
+        default=2,
+    )
+
     CHILD_CHUNKS_PREVIEW_NUMBER: PositiveInt = Field(
         description="Maximum number of child chunks to preview",
         default=50,
@@ -692,6 +972,27 @@ class CeleryBeatConfig(BaseSettings):
     )
 
 
+class OpsTraceConfig(BaseSettings):
+    """
+    Configuration for ops tracing export
+    """
+
+    OPS_TRACE_BATCH_EXPORT_ENABLED: bool = Field(
+        description="Export traces to the tracing providers in compressed batches per app, one Celery task per batch",
+        default=False,
+    )
+
+    OPS_TRACE_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of traces in an exported batch",
+        default=100,
+    )
+
+    OPS_TRACE_BATCH_FLUSH_INTERVAL: NonNegativeFloat = Field(
+        description="Maximum time in seconds a trace waits for its batch to fill before the batch is exported",
+        default=10,
+    )
+
+
 class PositionConfig(BaseSettings):
     POSITION_PROVIDER_PINS: str = Field(
         description="Comma-separated list of pinned model providers",
@@ -800,6 +1101,7 @@ class FeatureConfig(
     ModelLoadBalanceConfig,
     ModerationConfig,
     MultiModalTransferConfig,
+    OpsTraceConfig,
     PositionConfig,
     RagEtlConfig,
     SecurityConfig,
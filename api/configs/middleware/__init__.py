@@ -66,6 +66,27 @@ class StorageConfig(BaseSettings):
         deprecated=True,
     )
 
+    STORAGE_LOCAL_CACHE_ENABLED: bool = Field(
+        description="Enable a local disk read-through cache in front of the storage",
+        default=False,
+    )
+
+    STORAGE_LOCAL_CACHE_PATH: str = Field(
+        description="Directory of the local storage cache",
+        default="storage_cache",
+    )
+
+    STORAGE_LOCAL_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum size in bytes of the local storage cache, least recently used files are evicted first",
+        default=1024 * 1024 * 1024,
+    )
+
+    STORAGE_LOCAL_CACHE_PREFIXES: str = Field(
+        description="Comma-separated list of key prefixes of the objects to cache locally. Saves and deletes only"
+        " invalidate the cache of the host making them, with several hosts only cache objects never rewritten in place",
+        default="privkeys/,upload_files/,tools/",
+    )
+
 
 class VectorStoreConfig(BaseSettings):
     VECTOR_STORE: Optional[str] = Field(
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import Field
+from pydantic import Field, PositiveInt
 from pydantic_settings import BaseSettings
 
 
@@ -33,3 +33,24 @@ class OCIStorageConfig(BaseSettings):
         description="Secret key associated with the access key for authenticating with OCI Object Storage",
         default=None,
     )
+
+    OCI_MULTIPART_THRESHOLD: PositiveInt = Field(
+        description="Size in bytes above which objects are uploaded with parallel multipart uploads"
+        " and read with parallel ranged requests",
+        default=16 * 1024 * 1024,
+    )
+
+    OCI_MULTIPART_CHUNKSIZE: PositiveInt = Field(
+        description="Size in bytes of each multipart upload part and ranged read, must be at least 5 MiB",
+        default=8 * 1024 * 1024,
+    )
+
+    OCI_MAX_CONCURRENCY: PositiveInt = Field(
+        description="Maximum number of parts uploaded or downloaded concurrently for a single object",
+        default=8,
+    )
+
+    OCI_MAX_POOL_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of connections kept in the OCI Object Storage client connection pool",
+        default=32,
+    )
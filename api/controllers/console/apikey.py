@@ -10,6 +10,7 @@ from libs.helper import TimestampField
 from libs.login import login_required
 from models.dataset import Dataset
 from models.model import ApiToken, App
+from services.api_token_service import ApiTokenService
 
 from . import api
 from .wraps import account_initialization_required, setup_required
@@ -116,9 +117,12 @@ class BaseApiKeyResource(Resource):
 
         if key is None:
             flask_restful.abort(404, message="API key not found")
+        assert key is not None
 
+        token, token_type = key.token, key.type
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenService.invalidate_token(token, token_type)
 
         return {"result": "success"}, 204
 
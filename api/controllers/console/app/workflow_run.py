@@ -1,5 +1,6 @@
 from flask_restful import Resource, marshal_with, reqparse  # type: ignore
 from flask_restful.inputs import int_range  # type: ignore
+from werkzeug.exceptions import NotFound
 
 from controllers.console import api
 from controllers.console.app.wraps import get_app_model
@@ -7,6 +8,7 @@ from controllers.console.wraps import account_initialization_required, setup_req
 from fields.workflow_run_fields import (
     advanced_chat_workflow_run_pagination_fields,
     workflow_run_detail_fields,
+    workflow_run_node_execution_fields,
     workflow_run_node_execution_list_fields,
     workflow_run_pagination_fields,
 )
@@ -95,7 +97,34 @@ class WorkflowRunNodeExecutionListApi(Resource):
         return {"data": node_executions}
 
 
+class WorkflowRunNodeExecutionDetailApi(Resource):
+    @setup_required
+    @login_required
+    @account_initialization_required
+    @get_app_model(mode=[AppMode.ADVANCED_CHAT, AppMode.WORKFLOW])
+    @marshal_with(workflow_run_node_execution_fields)
+    def get(self, app_model: App, run_id, node_execution_id):
+        """
+        Get workflow run node execution detail with its full inputs, process data and outputs
+        """
+        run_id = str(run_id)
+        node_execution_id = str(node_execution_id)
+
+        workflow_run_service = WorkflowRunService()
+        node_execution = workflow_run_service.get_workflow_run_node_execution(
+            app_model=app_model, run_id=run_id, node_execution_id=node_execution_id
+        )
+        if not node_execution:
+            raise NotFound("Node execution not found.")
+
+        return node_execution
+
+
 api.add_resource(AdvancedChatAppWorkflowRunListApi, "/apps/<uuid:app_id>/advanced-chat/workflow-runs")
 api.add_resource(WorkflowRunListApi, "/apps/<uuid:app_id>/workflow-runs")
 api.add_resource(WorkflowRunDetailApi, "/apps/<uuid:app_id>/workflow-runs/<uuid:run_id>")
 api.add_resource(WorkflowRunNodeExecutionListApi, "/apps/<uuid:app_id>/workflow-runs/<uuid:run_id>/node-executions")
+api.add_resource(
+    WorkflowRunNodeExecutionDetailApi,
+    "/apps/<uuid:app_id>/workflow-runs/<uuid:run_id>/node-executions/<uuid:node_execution_id>",
+)
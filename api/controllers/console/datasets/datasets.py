@@ -26,6 +26,7 @@ from fields.document_fields import document_status_fields
 from libs.login import login_required
 from models import ApiToken, Dataset, Document, DocumentSegment, UploadFile
 from models.dataset import DatasetPermissionEnum
+from services.api_token_service import ApiTokenService
 from services.dataset_service import DatasetPermissionService, DatasetService, DocumentService
 
 
@@ -597,9 +598,12 @@ class DatasetApiDeleteApi(Resource):
 
         if key is None:
             flask_restful.abort(404, message="API key not found")
+        assert key is not None
 
+        token, token_type = key.token, key.type
         db.session.query(ApiToken).filter(ApiToken.id == api_key_id).delete()
         db.session.commit()
+        ApiTokenService.invalidate_token(token, token_type)
 
         return {"result": "success"}, 204
 
@@ -41,6 +41,7 @@ from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.errors.invoke import InvokeAuthorizationError
 from core.rag.extractor.entity.extract_setting import ExtractSetting
+from core.rag.retrieval.retrieval_cache import RetrievalCache
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from fields.document_fields import (
@@ -870,6 +871,7 @@ class DocumentStatusApi(DocumentResource):
 
             else:
                 raise InvalidActionError()
+        RetrievalCache.bump_dataset_version(dataset_id)
         return {"result": "success"}, 200
 
 
@@ -71,7 +71,7 @@ class FileApi(Resource):
         try:
             upload_file = FileService.upload_file(
                 filename=file.filename,
-                content=file.read(),
+                content=file.stream,
                 mimetype=file.mimetype,
                 user=current_user,
                 source=source,
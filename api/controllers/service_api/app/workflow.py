@@ -36,7 +36,7 @@ workflow_run_fields = {
     "workflow_id": fields.String,
     "status": fields.String,
     "inputs": fields.Raw,
-    "outputs": fields.Raw,
+    "outputs": fields.Raw(attribute="outputs_text"),
     "error": fields.String,
     "total_steps": fields.Integer,
     "total_tokens": fields.Integer,
@@ -12,10 +12,12 @@ from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import Forbidden, Unauthorized
 
+from configs import dify_config
 from extensions.ext_database import db
 from libs.login import _get_user
 from models.account import Account, Tenant, TenantAccountJoin, TenantStatus
 from models.model import ApiToken, App, EndUser
+from services.api_token_service import ApiTokenService
 from services.feature_service import FeatureService
 
 
@@ -40,7 +42,8 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
         def decorated_view(*args, **kwargs):
             api_token = validate_and_get_api_token("app")
 
-            app_model = db.session.query(App).filter(App.id == api_token.app_id).first()
+            # loaded by primary key on every request, so publishing or disabling the app takes effect at once
+            app_model = db.session.get(App, api_token.app_id)
             if not app_model:
                 raise Forbidden("The app no longer exists.")
 
@@ -50,10 +53,14 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
             if not app_model.enable_api:
                 raise Forbidden("The app's API service has been disabled.")
 
-            tenant = db.session.query(Tenant).filter(Tenant.id == app_model.tenant_id).first()
-            if tenant is None:
+            if dify_config.SERVICE_API_AUTH_CACHE_ENABLED:
+                tenant_status = ApiTokenService.get_tenant_status(app_model.tenant_id)
+            else:
+                tenant = db.session.query(Tenant).filter(Tenant.id == app_model.tenant_id).first()
+                tenant_status = tenant.status if tenant is not None else None
+            if tenant_status is None:
                 raise ValueError("Tenant does not exist.")
-            if tenant.status == TenantStatus.ARCHIVE:
+            if tenant_status == TenantStatus.ARCHIVE:
                 raise Forbidden("The workspace's status is archived.")
 
             kwargs["app_model"] = app_model
@@ -190,6 +197,13 @@ def validate_and_get_api_token(scope: str | None = None):
     if auth_scheme != "bearer":
         raise Unauthorized("Authorization scheme must be 'Bearer'")
 
+    if dify_config.SERVICE_API_AUTH_CACHE_ENABLED:
+        auth_context = ApiTokenService.get_auth_context(auth_token, scope)
+        if auth_context is None:
+            raise Unauthorized("Access token is invalid")
+        ApiTokenService.record_usage(auth_context.token_id)
+        return auth_context.to_api_token()
+
     current_time = datetime.now(UTC).replace(tzinfo=None)
     cutoff_time = current_time - timedelta(minutes=1)
     with Session(db.engine, expire_on_commit=False) as session:
@@ -224,6 +238,13 @@ def create_or_update_end_user_for_user_id(app_model: App, user_id: Optional[str]
     if not user_id:
         user_id = "DEFAULT-USER"
 
+    if dify_config.SERVICE_API_AUTH_CACHE_ENABLED:
+        end_user = ApiTokenService.get_end_user(app_model, user_id)
+        if end_user is None:
+            end_user = _create_end_user(app_model, user_id)
+            ApiTokenService.set_end_user(end_user)
+        return end_user
+
     end_user = (
         db.session.query(EndUser)
         .filter(
@@ -236,18 +257,23 @@ def create_or_update_end_user_for_user_id(app_model: App, user_id: Optional[str]
     )
 
     if end_user is None:
-        end_user = EndUser(
-            tenant_id=app_model.tenant_id,
-            app_id=app_model.id,
-            type="service_api",
-            is_anonymous=user_id == "DEFAULT-USER",
-            session_id=user_id,
-        )
-        db.session.add(end_user)
-        db.session.commit()
+        end_user = _create_end_user(app_model, user_id)
 
     return end_user
 
 
+def _create_end_user(app_model: App, user_id: str) -> EndUser:
+    end_user = EndUser(
+        tenant_id=app_model.tenant_id,
+        app_id=app_model.id,
+        type="service_api",
+        is_anonymous=user_id == "DEFAULT-USER",
+        session_id=user_id,
+    )
+    db.session.add(end_user)
+    db.session.commit()
+    return end_user
+
+
 class DatasetApiResource(Resource):
     method_decorators = [validate_dataset_token]
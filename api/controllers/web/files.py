@@ -30,7 +30,7 @@ class FileApi(WebApiResource):
         try:
             upload_file = FileService.upload_file(
                 filename=file.filename,
-                content=file.read(),
+                content=file.stream,
                 mimetype=file.mimetype,
                 user=end_user,
                 source="datasets" if source == "datasets" else None,
@@ -100,6 +100,7 @@ class BaseAgentRunner(AppRunner):
             return_resource=app_config.additional_features.show_retrieve_source,
             invoke_from=application_generate_entity.invoke_from,
             hit_callback=hit_callback,
+            app_id=self.app_config.app_id,
         )
         # get how many agent thoughts have been created
         self.agent_thought_count = (
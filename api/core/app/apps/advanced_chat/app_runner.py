@@ -145,7 +145,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=workflow.graph_dict, workflow_id=workflow.id)
 
         db.session.close()
 
@@ -166,6 +166,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             invoke_from=self.application_generate_entity.invoke_from,
             call_depth=self.application_generate_entity.call_depth,
             variable_pool=variable_pool,
+            interactive=self.application_generate_entity.stream,
         )
 
         generator = workflow_entry.run(
@@ -1,13 +1,30 @@
+import json
 import logging
+import time
 from abc import ABC, abstractmethod
 from collections.abc import Generator, Mapping
-from typing import Any, Union
+from typing import Any, Optional, Union
 
+from configs import dify_config
+from core.app.apps.base_app_queue_manager import stream_flush_at
 from core.app.entities.app_invoke_entities import InvokeFrom
-from core.app.entities.task_entities import AppBlockingResponse, AppStreamResponse
+from core.app.entities.task_entities import (
+    AgentMessageStreamResponse,
+    AppBlockingResponse,
+    AppStreamResponse,
+    MessageStreamResponse,
+    PingStreamResponse,
+    TextChunkStreamResponse,
+)
 from core.errors.error import ModelCurrentlyNotSupportError, ProviderTokenNotInitError, QuotaExceededError
 from core.model_runtime.errors.invoke import InvokeError
 
+try:
+    import orjson
+except ImportError:
+    # a dependency of the project, the events are still encoded if an install misses it
+    orjson = None  # type: ignore
+
 
 class AppGenerateResponseConverter(ABC):
     _blocking_response_type: type[AppBlockingResponse]
@@ -18,6 +35,9 @@ class AppGenerateResponseConverter(ABC):
         response: Union[AppBlockingResponse, Generator[AppStreamResponse, Any, None]],
         invoke_from: InvokeFrom,
     ) -> Mapping[str, Any] | Generator[str, None, None]:
+        if not isinstance(response, AppBlockingResponse) and dify_config.APP_STREAM_COALESCE_WINDOW_MS:
+            response = cls._coalesce_stream_response(response)
+
         if invoke_from in {InvokeFrom.DEBUGGER, InvokeFrom.SERVICE_API}:
             if isinstance(response, AppBlockingResponse):
                 return cls.convert_blocking_full_response(response)
@@ -69,6 +89,113 @@ class AppGenerateResponseConverter(ABC):
     ) -> Generator[str, None, None]:
         raise NotImplementedError
 
+    @classmethod
+    def _coalesce_stream_response(
+        cls, stream_response: Generator[AppStreamResponse, None, None]
+    ) -> Generator[AppStreamResponse, None, None]:
+        """
+        Merge consecutive text deltas of the same message or node into one event, flushed once
+        APP_STREAM_COALESCE_WINDOW_MS passed since its first delta or it holds APP_STREAM_COALESCE_MAX_BYTES.
+        A pending text is also flushed by any other event. The queue listener of the stream publishes a ping at
+        the end of the window if nothing came in meanwhile, so a slow model does not hold a delta back longer.
+        """
+        window = dify_config.APP_STREAM_COALESCE_WINDOW_MS / 1000
+        max_bytes = dify_config.APP_STREAM_COALESCE_MAX_BYTES
+        pending: Optional[AppStreamResponse] = None
+        flush_at = 0.0
+        try:
+            for chunk in stream_response:
+                if pending is not None:
+                    if cls._merge_stream_response(pending, chunk):
+                        if (
+                            time.monotonic() >= flush_at
+                            or len(cls._get_stream_response_text(pending).encode()) >= max_bytes
+                        ):
+                            stream_flush_at.set(None)
+                            yield pending
+                            pending = None
+                        continue
+                    stream_flush_at.set(None)
+                    yield pending
+                    pending = None
+                    if isinstance(chunk.stream_response, PingStreamResponse) and time.monotonic() >= flush_at:
+                        # the ping of the window, the flushed text keeps the connection alive
+                        continue
+
+                if isinstance(
+                    chunk.stream_response, MessageStreamResponse | AgentMessageStreamResponse | TextChunkStreamResponse
+                ):
+                    # copied, the merged deltas are appended to it
+                    stream_response_copy = chunk.stream_response.model_copy(deep=True)
+                    pending = chunk.model_copy(update={"stream_response": stream_response_copy})
+                    flush_at = time.monotonic() + window
+                    stream_flush_at.set(flush_at)
+                else:
+                    yield chunk
+
+            if pending is not None:
+                yield pending
+        finally:
+            stream_flush_at.set(None)
+
+    @staticmethod
+    def _merge_stream_response(pending: AppStreamResponse, chunk: AppStreamResponse) -> bool:
+        """
+        Append the text of `chunk` to `pending` if it continues it
+        :return: False if the chunks can't be merged
+        """
+        if type(pending) is not type(chunk) or type(pending.stream_response) is not type(chunk.stream_response):
+            return False
+        for field in type(pending).model_fields:
+            if field != "stream_response" and getattr(pending, field) != getattr(chunk, field):
+                return False
+
+        target, delta = pending.stream_response, chunk.stream_response
+        if isinstance(target, MessageStreamResponse) and isinstance(delta, MessageStreamResponse):
+            if (target.task_id, target.id, target.from_variable_selector) != (
+                delta.task_id,
+                delta.id,
+                delta.from_variable_selector,
+            ):
+                return False
+            target.answer += delta.answer
+        elif isinstance(target, AgentMessageStreamResponse) and isinstance(delta, AgentMessageStreamResponse):
+            if (target.task_id, target.id) != (delta.task_id, delta.id):
+                return False
+            target.answer += delta.answer
+        elif isinstance(target, TextChunkStreamResponse) and isinstance(delta, TextChunkStreamResponse):
+            if (target.task_id, target.data.from_variable_selector) != (
+                delta.task_id,
+                delta.data.from_variable_selector,
+            ):
+                return False
+            target.data.text += delta.data.text
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def _get_stream_response_text(chunk: AppStreamResponse) -> str:
+        stream_response = chunk.stream_response
+        if isinstance(stream_response, TextChunkStreamResponse):
+            return stream_response.data.text
+        if isinstance(stream_response, MessageStreamResponse | AgentMessageStreamResponse):
+            return stream_response.answer
+        return ""
+
+    @staticmethod
+    def _dumps(response_chunk: Mapping[str, Any]) -> str:
+        """
+        Encode an event, with orjson when the stream is coalesced
+        """
+        if dify_config.APP_STREAM_COALESCE_WINDOW_MS and orjson is not None:
+            try:
+                return orjson.dumps(response_chunk).decode()
+            except TypeError:
+                # orjson only encodes the standard types
+                pass
+        return json.dumps(response_chunk)
+
     @classmethod
     def _get_simple_metadata(cls, metadata: dict[str, Any]):
         """
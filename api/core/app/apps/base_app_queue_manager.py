@@ -1,12 +1,14 @@
+import contextvars
 import queue
 import time
 from abc import abstractmethod
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_watcher import TaskStopWatcher
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -18,6 +20,11 @@ from core.app.entities.queue_entities import (
 )
 from extensions.ext_redis import redis_client
 
+# monotonic time at which the consumer of the stream has to flush the text deltas it holds back, set by the
+# coalescing response converter while a text is pending. The stream is iterated in one context, so it is read by
+# the listener of the same stream, which publishes a ping at that time if no event came in meanwhile.
+stream_flush_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("stream_flush_at", default=None)
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
@@ -42,6 +49,10 @@ class AppQueueManager:
 
         self._q = q
 
+        self._stopped = False
+        if dify_config.APP_TASK_STOP_WATCHER_ENABLED:
+            TaskStopWatcher.watch(self._task_id, self)
+
     def listen(self):
         """
         Listen to queue
@@ -51,27 +62,56 @@ class AppQueueManager:
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
         start_time = time.time()
         last_ping_time: int | float = 0
-        while True:
-            try:
-                message = self._q.get(timeout=1)
-                if message is None:
-                    break
-
-                yield message
-            except queue.Empty:
-                continue
-            finally:
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= listen_timeout or self._is_stopped():
-                    # publish two messages to make sure the client can receive the stop signal
-                    # and stop listening after the stop signal processed
-                    self.publish(
-                        QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
-                    )
-
-                if elapsed_time // 10 > last_ping_time:
-                    self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
-                    last_ping_time = elapsed_time // 10
+        last_flush_at: Optional[float] = None
+        try:
+            while True:
+                flush_at = stream_flush_at.get()
+                try:
+                    wait_time = self._get_listen_wait_time(time.time() - start_time)
+                    if flush_at is not None and flush_at != last_flush_at:
+                        wait_time = max(min(wait_time, flush_at - time.monotonic()), 0)
+                    message = self._q.get(timeout=wait_time)
+                    if message is None:
+                        break
+
+                    yield message
+                except queue.Empty:
+                    if flush_at is not None and flush_at != last_flush_at and time.monotonic() >= flush_at:
+                        # wake the consumer up to flush its pending text, once per window
+                        last_flush_at = flush_at
+                        self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                    continue
+                finally:
+                    elapsed_time = time.time() - start_time
+                    if elapsed_time >= listen_timeout or self._is_stopped():
+                        # publish two messages to make sure the client can receive the stop signal
+                        # and stop listening after the stop signal processed
+                        self.publish(
+                            QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
+                        )
+
+                    if elapsed_time // 10 > last_ping_time:
+                        self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                        last_ping_time = elapsed_time // 10
+        finally:
+            TaskStopWatcher.unwatch(self._task_id)
+
+    def _get_listen_wait_time(self, elapsed_time: float) -> float:
+        """
+        Seconds to wait for the next message. A watched task is woken up by its stop event, so it only wakes up
+        for the next ping or the end of APP_MAX_EXECUTION_TIME instead of every second.
+        """
+        if not TaskStopWatcher.is_watched(self._task_id):
+            return 1
+        next_ping = (elapsed_time // 10 + 1) * 10
+        return max(min(next_ping, dify_config.APP_MAX_EXECUTION_TIME) - elapsed_time, 0.01)
+
+    def on_stopped(self) -> None:
+        """
+        Called by the TaskStopWatcher when the stop flag of the task is set
+        """
+        self._stopped = True
+        self.publish(QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE)
 
     def stop_listen(self) -> None:
         """
@@ -131,6 +171,12 @@ class AppQueueManager:
         Check if task is stopped
         :return:
         """
+        if self._stopped:
+            return True
+        if TaskStopWatcher.is_watched(self._task_id):
+            # checked by the watcher
+            return False
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
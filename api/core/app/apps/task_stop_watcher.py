@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+if TYPE_CHECKING:
+    from core.app.apps.base_app_queue_manager import AppQueueManager
+
+logger = logging.getLogger(__name__)
+
+
+class TaskStopWatcher:
+    """
+    Watches the stop flags of all the generate tasks of the process with one MGET every
+    APP_TASK_STOP_WATCHER_INTERVAL seconds, instead of one GET per queued event of each task.
+
+    A stopped task is marked on its queue manager, which then publishes the stop event and fails the next
+    publish of the app runner, as a check of the flag would have.
+    """
+
+    MGET_BATCH_SIZE = 500
+
+    _managers: dict[str, tuple[float, "AppQueueManager"]] = {}
+    _lock = threading.Lock()
+    _watcher: Optional[threading.Thread] = None
+
+    @classmethod
+    def watch(cls, task_id: str, queue_manager: "AppQueueManager") -> None:
+        # a task whose listener never ended is dropped after the longest run it could have
+        expire_at = time.monotonic() + dify_config.APP_MAX_EXECUTION_TIME + 60
+        with cls._lock:
+            cls._managers[task_id] = (expire_at, queue_manager)
+            if cls._watcher is None:
+                cls._watcher = threading.Thread(target=cls._run, name="app_task_stop_watcher", daemon=True)
+                cls._watcher.start()
+
+    @classmethod
+    def unwatch(cls, task_id: str) -> None:
+        with cls._lock:
+            cls._managers.pop(task_id, None)
+
+    @classmethod
+    def is_watched(cls, task_id: str) -> bool:
+        return task_id in cls._managers
+
+    @classmethod
+    def check(cls) -> int:
+        """
+        Check the stop flags of the watched tasks once
+        :return: number of stopped tasks
+        """
+        now = time.monotonic()
+        with cls._lock:
+            for task_id in [task_id for task_id, (expire_at, _) in cls._managers.items() if expire_at < now]:
+                del cls._managers[task_id]
+            entries = [(task_id, queue_manager) for task_id, (_, queue_manager) in cls._managers.items()]
+
+        stopped = 0
+        for i in range(0, len(entries), cls.MGET_BATCH_SIZE):
+            batch = entries[i : i + cls.MGET_BATCH_SIZE]
+            flags = redis_client.mget(
+                [queue_manager._generate_stopped_cache_key(task_id) for task_id, queue_manager in batch]
+            )
+            for (task_id, _), flag in zip(batch, flags):
+                if flag is None:
+                    continue
+                with cls._lock:
+                    entry = cls._managers.pop(task_id, None)
+                if entry is not None:
+                    entry[1].on_stopped()
+                    stopped += 1
+        return stopped
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            time.sleep(dify_config.APP_TASK_STOP_WATCHER_INTERVAL)
+            try:
+                cls.check()
+            except Exception:
+                logger.exception("Failed to check the stop flags of generate tasks")
@@ -102,7 +102,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=workflow.graph_dict, workflow_id=workflow.id)
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
@@ -122,6 +122,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             call_depth=self.application_generate_entity.call_depth,
             variable_pool=variable_pool,
             thread_pool_id=self.workflow_thread_pool_id,
+            interactive=self.application_generate_entity.stream,
         )
 
         generator = workflow_entry.run(callbacks=workflow_callbacks)
@@ -0,0 +1,157 @@
+import logging
+import threading
+from typing import Any, Optional
+
+from sqlalchemy import Engine, insert, update
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from models.workflow import WorkflowNodeExecution
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowNodeExecutionBuffer:
+    """
+    Write-behind buffer for workflow node execution records.
+
+    Inserts and updates are recorded as row snapshots and written to the database in batches,
+    either when `batch_size` pending rows are reached, every `flush_interval` seconds, or when
+    `flush`/`close` is called at the end of a workflow run. Stream responses are built from the
+    in-memory WorkflowNodeExecution objects, so the streaming thread never waits for the database.
+
+    With `flush_interval <= 0` no background flusher is started and rows are written synchronously
+    by the caller once `batch_size` is reached, `batch_size=1` being the legacy write-through mode.
+    """
+
+    def __init__(self, *, engine: Engine, batch_size: int = 1, flush_interval: float = 0) -> None:
+        self._engine = engine
+        self._batch_size = max(batch_size, 1)
+        self._flush_interval = flush_interval
+        self._pending_inserts: dict[str, dict[str, Any]] = {}
+        self._pending_updates: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, *, engine: Engine) -> "WorkflowNodeExecutionBuffer":
+        if not dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED:
+            return cls(engine=engine)
+
+        return cls(
+            engine=engine,
+            batch_size=dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_FLUSH_INTERVAL,
+        )
+
+    def add(self, workflow_node_execution: WorkflowNodeExecution) -> None:
+        """
+        Buffer the insert of a new workflow node execution
+        :param workflow_node_execution: transient workflow node execution
+        """
+        row = self._to_row(workflow_node_execution, for_insert=True)
+        with self._lock:
+            self._pending_inserts[row["id"]] = row
+            pending_count = len(self._pending_inserts) + len(self._pending_updates)
+
+        self._on_enqueued(pending_count)
+
+    def update(self, workflow_node_execution: WorkflowNodeExecution) -> None:
+        """
+        Buffer the update of a workflow node execution, an insert not yet flushed is replaced in place
+        :param workflow_node_execution: workflow node execution previously passed to `add`
+        """
+        with self._lock:
+            if workflow_node_execution.id in self._pending_inserts:
+                row = self._to_row(workflow_node_execution, for_insert=True)
+                self._pending_inserts[row["id"]] = row
+            else:
+                row = self._to_row(workflow_node_execution, for_insert=False)
+                self._pending_updates[row["id"]] = row
+            pending_count = len(self._pending_inserts) + len(self._pending_updates)
+
+        self._on_enqueued(pending_count)
+
+    def flush(self) -> None:
+        """
+        Write all pending rows in a single transaction.
+        Rows are put back into the buffer if the transaction fails, so a later flush can retry them.
+        """
+        with self._flush_lock:
+            with self._lock:
+                inserts, self._pending_inserts = self._pending_inserts, {}
+                updates, self._pending_updates = self._pending_updates, {}
+
+            if not inserts and not updates:
+                return
+
+            try:
+                with Session(self._engine) as session:
+                    if inserts:
+                        session.execute(insert(WorkflowNodeExecution), list(inserts.values()))
+                    if updates:
+                        session.execute(update(WorkflowNodeExecution), list(updates.values()))
+                    session.commit()
+            except Exception:
+                with self._lock:
+                    # rows buffered while flushing are newer than the ones that failed
+                    for execution_id, row in inserts.items():
+                        newer_row = self._pending_updates.pop(execution_id, None)
+                        self._pending_inserts[execution_id] = {**row, **newer_row} if newer_row else row
+                    for execution_id, row in updates.items():
+                        self._pending_updates.setdefault(execution_id, row)
+                raise
+
+    def close(self) -> None:
+        """
+        Stop the background flusher and write all pending rows.
+        The buffer keeps working in write-through mode afterwards.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        flusher = self._flusher
+        if flusher and flusher is not threading.current_thread():
+            flusher.join()
+
+        self.flush()
+
+    def _on_enqueued(self, pending_count: int) -> None:
+        if self._flush_interval <= 0 or self._stopped.is_set():
+            if pending_count >= self._batch_size or self._stopped.is_set():
+                self.flush()
+            return
+
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="workflow-node-execution-flusher", daemon=True
+            )
+            self._flusher.start()
+
+        if pending_count >= self._batch_size:
+            self._wakeup.set()
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                # the final flush is done by `close` in the caller thread
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush workflow node executions, will retry on next flush")
+
+    @staticmethod
+    def _to_row(workflow_node_execution: WorkflowNodeExecution, *, for_insert: bool) -> dict[str, Any]:
+        row = {}
+        for column in WorkflowNodeExecution.__table__.columns:
+            value = getattr(workflow_node_execution, column.key)
+            # let the database fill server defaults instead of inserting NULL
+            if for_insert and value is None and column.server_default is not None:
+                continue
+            row[column.key] = value
+        return row
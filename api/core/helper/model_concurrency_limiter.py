@@ -0,0 +1,187 @@
+import contextvars
+import itertools
+import threading
+from collections import deque
+from collections.abc import Callable, Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from configs import dify_config
+from core.model_runtime.errors.invoke import InvokeServerUnavailableError
+
+
+class ModelConcurrencyQueueTimeoutError(InvokeServerUnavailableError):
+    """Raised when a call waited MODEL_CONCURRENCY_QUEUE_TIMEOUT seconds without getting a free slot."""
+
+    description = "Too many concurrent calls to the model provider, please try again later."
+
+
+class ModelConcurrencyLimiter:
+    """
+    Adaptive limit of the concurrent calls of a process to one provider credential and model (AIMD).
+
+    Every call that completes under twice the baseline latency raises the limit by 1 / limit, so by one per
+    round of calls. A slower call multiplies it by 0.9, a rate limit error halves it. Calls over the limit wait for a
+    free slot instead of failing, so embedding-heavy indexing and chat share the quota of a credential
+    without one of them running into rate limit errors that cool the credential down for everyone.
+
+    The baseline is the lowest latency observed, drifting slowly towards recent latencies so it follows a
+    provider that got slower for good.
+
+    Limiters are kept for at most MAX_TRACKED_KEYS credentials and models, the oldest ones without calls in flight
+    are dropped first and start over when used again.
+    """
+
+    _limiters: dict[str, "ModelConcurrencyLimiter"] = {}
+    _limiters_lock = threading.Lock()
+
+    MAX_TRACKED_KEYS = 10000
+    LATENCY_TOLERANCE = 2.0
+    BASELINE_DRIFT = 0.01
+    DECREASE_FACTOR = 0.9
+
+    def __init__(self, initial_limit: int, max_limit: int) -> None:
+        self._limit = float(min(initial_limit, max_limit))
+        self._max_limit = max_limit
+        self._in_flight = 0
+        self._baseline_latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @classmethod
+    def get(cls, key: str) -> "ModelConcurrencyLimiter":
+        limiter = cls._limiters.get(key)
+        if limiter is None:
+            with cls._limiters_lock:
+                limiter = cls._limiters.get(key)
+                if limiter is None:
+                    limiter = cls(
+                        initial_limit=dify_config.MODEL_CONCURRENCY_INITIAL_LIMIT,
+                        max_limit=dify_config.MODEL_CONCURRENCY_MAX_LIMIT,
+                    )
+                    cls._limiters[key] = limiter
+                    cls._drop_oldest()
+        return limiter
+
+    @classmethod
+    def _drop_oldest(cls) -> None:
+        # called with the lock held, dicts keep the insertion order. A limiter with calls in flight is kept, a new
+        # one would let through more calls than the limit.
+        excess = len(cls._limiters) - cls.MAX_TRACKED_KEYS
+        if excess <= 0:
+            return
+        idle_keys = (key for key, limiter in cls._limiters.items() if not limiter.in_flight)
+        for key in list(itertools.islice(idle_keys, excess)):
+            del cls._limiters[key]
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a free slot
+        :param timeout: seconds to wait, None waits forever
+        :return: False if no slot was freed in time
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < self.limit, timeout=timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, rate_limited: bool = False) -> None:
+        """
+        Free a slot and adapt the limit
+        :param latency: seconds the call took, None if it failed or its duration says nothing about the load
+        :param rate_limited: the provider rejected the call with a rate limit error
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if rate_limited:
+                self._limit = max(self._limit / 2, 1.0)
+            elif latency is not None:
+                if self._baseline_latency is None or latency < self._baseline_latency:
+                    self._baseline_latency = latency
+                else:
+                    self._baseline_latency += (latency - self._baseline_latency) * self.BASELINE_DRIFT
+
+                if latency > self._baseline_latency * self.LATENCY_TOLERANCE:
+                    self._limit = max(self._limit * self.DECREASE_FACTOR, 1.0)
+                else:
+                    self._limit = min(self._limit + 1 / self._limit, float(self._max_limit))
+            self._condition.notify_all()
+
+    def release_after(self, generator: Generator, latency: Optional[float]) -> Generator:
+        """
+        Hold the slot of a streamed call until the stream is consumed or closed
+        """
+        try:
+            yield from generator
+        finally:
+            self.release(latency)
+
+
+class ModelLatencyTracker:
+    """
+    Latencies of the last successful calls of a model, used to decide when a call is slow enough to be hedged.
+    Trackers are kept for at most MAX_TRACKED_KEYS models, the oldest ones are dropped first.
+    """
+
+    _trackers: dict[str, "ModelLatencyTracker"] = {}
+    _trackers_lock = threading.Lock()
+
+    MAX_TRACKED_KEYS = 10000
+    WINDOW = 200
+    MIN_SAMPLES = 20
+
+    def __init__(self) -> None:
+        self._latencies: deque[float] = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key: str) -> "ModelLatencyTracker":
+        tracker = cls._trackers.get(key)
+        if tracker is None:
+            with cls._trackers_lock:
+                tracker = cls._trackers.setdefault(key, cls())
+                while len(cls._trackers) > cls.MAX_TRACKED_KEYS:
+                    cls._trackers.pop(next(iter(cls._trackers)))
+        return tracker
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def p95(self) -> Optional[float]:
+        """
+        :return: None until MIN_SAMPLES calls were observed
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.MIN_SAMPLES:
+            return None
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+
+class ModelHedgingExecutor:
+    """
+    Thread pool running hedged model calls, the waiting request thread returns the first successful result.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.MODEL_HEDGING_MAX_WORKERS, thread_name_prefix="model_hedging"
+                    )
+        context = contextvars.copy_context()
+        return cls._executor.submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,203 @@
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from enum import StrEnum
+from typing import Optional
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLBStrategy(StrEnum):
+    ROUND_ROBIN = "round_robin"
+    # random choice weighted by the inverse of the observed latency
+    LATENCY_WEIGHTED = "latency_weighted"
+    LEAST_LATENCY = "least_latency"
+
+
+class ModelLBScheduler:
+    """
+    Process-wide state of model load balancing.
+
+    Round-robin counters live in process: `next()` on an `itertools.count` is atomic, so picking the next
+    config costs neither a lock nor a Redis round trip. Cooldowns are still written to Redis, for the other
+    processes and the console, and announced on a pub/sub channel; every process keeps the cooldowns it heard
+    of in a local set. When a model is first used after subscribing, its current cooldowns are read from
+    Redis in one pipeline, so cooldowns set before the process subscribed are not missed. While the
+    subscription is down, cooldowns are checked in Redis as before.
+
+    Counters, latencies and synced models are kept for at most MAX_TRACKED_KEYS models and configs each, the
+    oldest ones are dropped first and start over when used again, a dropped model is synced again. Expired
+    cooldowns are dropped every COOLDOWN_PRUNE_INTERVAL seconds.
+    """
+
+    COOLDOWN_CHANNEL = "model_lb_cooldown"
+    # weight of a new observation in the moving average of a config's latency
+    LATENCY_DECAY = 0.2
+    MAX_TRACKED_KEYS = 10000
+    COOLDOWN_PRUNE_INTERVAL = 60
+
+    _counters: dict[str, Iterator[int]] = {}
+    # cooldown cache key -> expiry timestamp
+    _cooldowns: dict[str, float] = {}
+    # latency key -> moving average of the latency in seconds
+    _latencies: dict[str, float] = {}
+    # models whose cooldowns were read from Redis since the current subscription started, a dict keeps their order
+    _synced_models: dict[str, None] = {}
+    _cooldowns_pruned_at = 0.0
+    _listener: Optional[threading.Thread] = None
+    _listening = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def next_index(cls, model_key: str) -> int:
+        counter = cls._counters.get(model_key)
+        if counter is None:
+            with cls._lock:
+                counter = cls._counters.setdefault(model_key, itertools.count())
+                cls._drop_oldest(cls._counters)
+        return next(counter)
+
+    @classmethod
+    def cooldown(cls, cooldown_key: str, expire: int) -> None:
+        cls._set_cooldown(cooldown_key, time.time() + expire)
+        try:
+            redis_client.setex(cooldown_key, expire, "true")
+            redis_client.publish(cls.COOLDOWN_CHANNEL, json.dumps({"key": cooldown_key, "expire": expire}))
+        except Exception:
+            logger.exception(f"Failed to publish the cooldown {cooldown_key}")
+
+    @classmethod
+    def in_cooldown(cls, cooldown_key: str) -> bool:
+        if not cls._ensure_listening():
+            return bool(redis_client.exists(cooldown_key))
+
+        expire_at = cls._cooldowns.get(cooldown_key)
+        if expire_at is None:
+            return False
+        if expire_at > time.time():
+            return True
+        cls._cooldowns.pop(cooldown_key, None)
+        return False
+
+    @classmethod
+    def sync_cooldowns(cls, model_key: str, cooldown_keys: Sequence[str]) -> None:
+        """
+        Read the current cooldowns of a model from Redis, once per model and subscription
+        """
+        if not cls._listening or model_key in cls._synced_models:
+            return
+
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for cooldown_key in cooldown_keys:
+                pipeline.ttl(cooldown_key)
+            ttls = pipeline.execute()
+        except Exception:
+            logger.exception(f"Failed to read the cooldowns of {model_key}")
+            return
+
+        now = time.time()
+        for cooldown_key, ttl in zip(cooldown_keys, ttls):
+            if ttl and ttl > 0:
+                cls._set_cooldown(cooldown_key, now + ttl)
+        with cls._lock:
+            cls._synced_models[model_key] = None
+            cls._drop_oldest(cls._synced_models)
+
+    @classmethod
+    def observe_latency(cls, latency_key: str, latency: float) -> None:
+        average = cls._latencies.get(latency_key)
+        if average is None:
+            with cls._lock:
+                cls._latencies[latency_key] = latency
+                cls._drop_oldest(cls._latencies)
+            return
+        cls._latencies[latency_key] = average + cls.LATENCY_DECAY * (latency - average)
+
+    @classmethod
+    def select_by_latency(cls, latency_keys: Sequence[str], strategy: ModelLBStrategy) -> int:
+        """
+        Index of the config to use among configs not in cooldown.
+        Configs without observed latency are tried first with least latency, and weighted as the fastest config
+        with latency weighted selection, so new or recovered configs get measured.
+        """
+        latencies = [cls._latencies.get(latency_key) for latency_key in latency_keys]
+        observed = [latency for latency in latencies if latency is not None]
+        if strategy == ModelLBStrategy.LEAST_LATENCY:
+            if len(observed) < len(latencies):
+                return latencies.index(None)
+            return min(range(len(latencies)), key=lambda index: latencies[index] or 0)
+
+        fastest = min(observed, default=1.0)
+        weights = [1 / max(latency if latency is not None else fastest, 1e-3) for latency in latencies]
+        return random.choices(range(len(latency_keys)), weights=weights)[0]
+
+    @classmethod
+    def _set_cooldown(cls, cooldown_key: str, expire_at: float) -> None:
+        cls._cooldowns[cooldown_key] = max(cls._cooldowns.get(cooldown_key, 0), expire_at)
+
+        now = time.time()
+        if now - cls._cooldowns_pruned_at < cls.COOLDOWN_PRUNE_INTERVAL:
+            return
+        with cls._lock:
+            cls._cooldowns_pruned_at = now
+            # the cooldowns are set without the lock, copy them at once
+            for key, key_expire_at in list(cls._cooldowns.items()):
+                if key_expire_at <= now:
+                    cls._cooldowns.pop(key, None)
+
+    @classmethod
+    def _drop_oldest(cls, entries: dict) -> None:
+        # called with the lock held, dicts keep the insertion order
+        while len(entries) > cls.MAX_TRACKED_KEYS:
+            entries.pop(next(iter(entries)), None)
+
+    @classmethod
+    def _ensure_listening(cls) -> bool:
+        if cls._listener is None:
+            with cls._lock:
+                if cls._listener is None:
+                    cls._listener = threading.Thread(target=cls._listen, name="model_lb_cooldown_listener", daemon=True)
+                    cls._listener.start()
+        return cls._listening
+
+    @classmethod
+    def _listen(cls) -> None:
+        retry_interval = 1
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.COOLDOWN_CHANNEL)
+                # cooldowns set before the subscription are read again when their model is used
+                with cls._lock:
+                    cls._synced_models.clear()
+                cls._listening = True
+                retry_interval = 1
+                for message in pubsub.listen():
+                    cls._on_message(message)
+            except Exception:
+                logger.warning("Model load balancing cooldown subscription lost, checking cooldowns in Redis")
+            finally:
+                cls._listening = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, 30)
+
+    @classmethod
+    def _on_message(cls, message: dict) -> None:
+        try:
+            data = json.loads(message["data"])
+            cls._set_cooldown(data["key"], time.time() + int(data["expire"]))
+        except Exception:
+            logger.exception("Invalid model load balancing cooldown message")
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Sized
+from os import path
+from typing import Any, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=Sized)
+
+
+def get_source_fingerprint(source_path: str) -> str:
+    """
+    Fingerprint of the python and yaml sources under `source_path`, by their path, size and modification time
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(source_path):
+        # the sources of a package like `__base` are part of the fingerprint, only the bytecode is not
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for file in sorted(files):
+            if not file.endswith((".py", ".yaml")):
+                continue
+            stat = os.stat(path.join(root, file))
+            digest.update(f"{path.relpath(path.join(root, file), source_path)}:{stat.st_size}".encode())
+            digest.update(f":{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def write_source_snapshot(snapshot_path: str, snapshot: dict[str, Any]) -> None:
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+
+
+def load_source_snapshot(
+    snapshot_path: str,
+    fingerprint: Callable[[], str],
+    parse: Callable[[list[dict[str, Any]]], T],
+    *,
+    name: str,
+    command: str,
+) -> Optional[T]:
+    """
+    Load the providers of a snapshot written by `write_source_snapshot`
+
+    :param fingerprint: fingerprint of the current sources, the snapshot is only used if it was built from them
+    :param parse: builds the providers from the `providers` of the snapshot
+    :param name: name of the providers in the logs
+    :param command: flask command building the snapshot
+    :return: None if there is no snapshot, it does not match the sources or it is invalid
+    """
+    if not path.exists(snapshot_path):
+        return None
+
+    start_at = time.perf_counter()
+    try:
+        with open(snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("fingerprint") != fingerprint():
+            logger.warning(f"{name} snapshot is outdated, run `flask {command}`")
+            return None
+
+        providers = parse(snapshot["providers"])
+    except Exception:
+        logger.exception(f"failed to load the {name} snapshot")
+        return None
+
+    logger.info(f"loaded {len(providers)} {name}s from the snapshot in {time.perf_counter() - start_at:.3f}s")
+    return providers
@@ -0,0 +1,113 @@
+"""
+Offloading of large workflow payloads (node inputs, process data, outputs and workflow run outputs).
+
+Payloads whose JSON text exceeds `WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD` bytes are written to the storage and the
+database column keeps a compact reference with a preview of the payload instead, for example:
+
+    {"__dify_offloaded_payload__": {"storage_key": "...", "size": 5242880, "preview": {"text": "Lorem ipsum..."}}}
+
+Storage keys are content addressed per tenant, so saving the same payload twice writes the same object.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from configs import dify_config
+from extensions.ext_storage import storage
+
+OFFLOADED_PAYLOAD_IDENTITY = "__dify_offloaded_payload__"
+
+_OFFLOADED_PAYLOAD_PREFIX = '{"' + OFFLOADED_PAYLOAD_IDENTITY + '"'
+
+
+class OffloadedPayloadLoadError(Exception):
+    """
+    Raised when an offloaded payload can not be loaded from the storage
+    """
+
+
+def offload(text: str, *, tenant_id: str) -> str:
+    """
+    Offload a serialized payload to the storage if it exceeds the configured threshold
+    :param text: payload JSON text
+    :param tenant_id: tenant id
+    :return: the text itself, or a reference to the offloaded payload
+    """
+    threshold = dify_config.WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD
+    data = text.encode("utf-8")
+    if not threshold or len(data) <= threshold or is_offloaded(text):
+        return text
+
+    storage_key = f"workflow_payloads/{tenant_id}/{hashlib.sha256(data).hexdigest()}.json"
+    storage.save(storage_key, data)
+
+    return json.dumps(
+        {
+            OFFLOADED_PAYLOAD_IDENTITY: {
+                "storage_key": storage_key,
+                "size": len(data),
+                "preview": _preview(json.loads(text)),
+            }
+        }
+    )
+
+
+def is_offloaded(text: Optional[str]) -> bool:
+    return text is not None and text.startswith(_OFFLOADED_PAYLOAD_PREFIX)
+
+
+def loads(text: Optional[str]) -> Any:
+    """
+    Deserialize a payload column, loading the full payload from the storage if it was offloaded
+    :param text: column value
+    :return: payload, None if empty
+    """
+    text = resolve(text)
+    return json.loads(text) if text else None
+
+
+def resolve(text: Optional[str]) -> Optional[str]:
+    """
+    Get the full JSON text of a payload column
+    :param text: column value
+    :return: payload JSON text
+    :raises OffloadedPayloadLoadError: if the offloaded payload can not be loaded, use `preview` where a truncated
+        payload is acceptable
+    """
+    if not text or not is_offloaded(text):
+        return text
+
+    storage_key = json.loads(text)[OFFLOADED_PAYLOAD_IDENTITY]["storage_key"]
+    try:
+        return storage.load_once(storage_key).decode("utf-8")
+    except Exception as e:
+        raise OffloadedPayloadLoadError(f"Failed to load offloaded workflow payload {storage_key}") from e
+
+
+def preview(text: Optional[str]) -> Any:
+    """
+    Deserialize a payload column without touching the storage, offloaded payloads are returned truncated
+    :param text: column value
+    :return: payload or its preview, None if empty
+    """
+    if not text:
+        return None
+    if is_offloaded(text):
+        return json.loads(text)[OFFLOADED_PAYLOAD_IDENTITY]["preview"]
+    return json.loads(text)
+
+
+def _preview(payload: Any) -> Any:
+    if isinstance(payload, dict):
+        return {key: _truncate(value) for key, value in payload.items()}
+    return _truncate(payload)
+
+
+def _truncate(value: Any) -> Any:
+    length = dify_config.WORKFLOW_PAYLOAD_PREVIEW_LENGTH
+    if isinstance(value, str):
+        return value if len(value) <= length else value[:length] + "..."
+
+    text = json.dumps(value)
+    return value if len(text) <= length else text[:length] + "..."
@@ -2,13 +2,14 @@ import concurrent.futures
 import datetime
 import json
 import logging
+import queue
 import re
 import threading
 import time
 import uuid
 from typing import Any, Optional, cast
 
-from flask import current_app
+from flask import Flask, current_app
 from flask_login import current_user  # type: ignore
 from sqlalchemy.orm.exc import ObjectDeletedError
 
@@ -35,6 +36,7 @@ from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import helper
+from libs.batching import MAX_IN_LIST_SIZE, chunked
 from models.dataset import ChildChunk, Dataset, DatasetProcessRule, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
@@ -66,6 +68,10 @@ class IndexingRunner:
                     raise ValueError("no process rule found")
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
+                if self._is_streaming_supported(dataset_document):
+                    self._run_streaming(index_processor, dataset, dataset_document, processing_rule.to_dict())
+                    continue
+
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
@@ -529,6 +535,39 @@ class IndexingRunner:
 
         # chunk nodes by chunk size
         indexing_start_at = time.perf_counter()
+        tokens = self._load_documents(
+            index_processor=index_processor,
+            dataset=dataset,
+            dataset_document=dataset_document,
+            documents=documents,
+            embedding_model_instance=embedding_model_instance,
+        )
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    def _load_documents(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        documents: list[Document],
+        embedding_model_instance: Optional[ModelInstance],
+    ) -> int:
+        """
+        insert index of the documents and update their segment status to completed
+        :return: embedding tokens used
+        """
         tokens = 0
         if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
             # create keyword index
@@ -570,19 +609,8 @@ class IndexingRunner:
                     tokens += future.result()
         if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
             create_keyword_thread.join()
-        indexing_end_at = time.perf_counter()
 
-        # update document status to completed
-        self._update_document_index_status(
-            document_id=dataset_document.id,
-            after_indexing_status="completed",
-            extra_update_params={
-                DatasetDocument.tokens: tokens,
-                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
-                DatasetDocument.error: None,
-            },
-        )
+        return tokens
 
     @staticmethod
     def _process_keyword_index(flask_app, dataset_id, document_id, documents):
@@ -745,6 +773,232 @@ class IndexingRunner:
         )
         pass
 
+    @staticmethod
+    def _is_streaming_supported(dataset_document: DatasetDocument) -> bool:
+        # other index types transform the document as a whole, e.g. parent-child in full doc mode
+        return (
+            dify_config.INDEXING_STREAMING_ENABLED
+            and dataset_document.data_source_type == "upload_file"
+            and dataset_document.doc_form == IndexType.PARAGRAPH_INDEX
+        )
+
+    def _run_streaming(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        Index an uploaded file with a pipeline of three stages connected by bounded queues:
+        extract (extractor thread) -> clean, split and save segments (this thread) -> embed and load (loader thread).
+        At most INDEXING_STREAMING_QUEUE_SIZE batches wait between two stages, so the memory used does not grow
+        with the size of the file.
+        """
+        data_source_info = dataset_document.data_source_info_dict
+        if not data_source_info or "upload_file_id" not in data_source_info:
+            raise ValueError("no upload file found")
+
+        flask_app = current_app._get_current_object()  # type: ignore
+        stop_event = threading.Event()
+        errors: list[BaseException] = []
+        stats = {"word_count": 0, "tokens": 0}
+        text_queue: queue.Queue[Optional[list[Document]]] = queue.Queue(dify_config.INDEXING_STREAMING_QUEUE_SIZE)
+        segment_queue: queue.Queue[Optional[list[Document]]] = queue.Queue(dify_config.INDEXING_STREAMING_QUEUE_SIZE)
+
+        # the stages load their own rows, the instances of this thread's session expire on each of its commits
+        extractor_thread = threading.Thread(
+            target=self._run_streaming_extractor,
+            args=(
+                flask_app,
+                index_processor,
+                data_source_info["upload_file_id"],
+                dataset_document.doc_form,
+                process_rule,
+                text_queue,
+                stop_event,
+                errors,
+                stats,
+            ),
+        )
+        loader_thread = threading.Thread(
+            target=self._run_streaming_loader,
+            args=(
+                flask_app,
+                index_processor,
+                dataset.id,
+                dataset_document.id,
+                segment_queue,
+                stop_event,
+                errors,
+                stats,
+            ),
+        )
+
+        indexing_start_at = time.perf_counter()
+        extractor_thread.start()
+        loader_thread.start()
+        try:
+            doc_store = DatasetDocumentStore(
+                dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+            )
+            while (text_docs := self._get_until_stopped(text_queue, stop_event)) is not None:
+                for text_doc in text_docs:
+                    if text_doc.metadata is not None:
+                        text_doc.metadata["document_id"] = dataset_document.id
+                        text_doc.metadata["dataset_id"] = dataset_document.dataset_id
+                documents = self._transform(
+                    index_processor, dataset, text_docs, dataset_document.doc_language, process_rule
+                )
+                doc_store.add_documents(docs=documents)
+
+                self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="indexing")
+                indexing_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+                # a batch may have more segments than the IN list limit of Oracle
+                for index_node_ids in chunked(
+                    [document.metadata["doc_id"] for document in documents], MAX_IN_LIST_SIZE
+                ):
+                    DocumentSegment.query.filter(
+                        DocumentSegment.document_id == dataset_document.id,
+                        DocumentSegment.index_node_id.in_(index_node_ids),
+                    ).update({DocumentSegment.status: "indexing", DocumentSegment.indexing_at: indexing_at})
+                db.session.commit()
+                self._put_until_stopped(segment_queue, documents, stop_event)
+
+            cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            self._update_document_index_status(
+                document_id=dataset_document.id,
+                after_indexing_status="indexing",
+                extra_update_params={
+                    DatasetDocument.word_count: stats["word_count"],
+                    DatasetDocument.parsing_completed_at: cur_time,
+                    DatasetDocument.cleaning_completed_at: cur_time,
+                    DatasetDocument.splitting_completed_at: cur_time,
+                },
+            )
+            self._put_until_stopped(segment_queue, None, stop_event)
+        except StreamingPipelineStoppedError:
+            # another stage failed, its error is raised below
+            pass
+        except BaseException:
+            stop_event.set()
+            raise
+        finally:
+            extractor_thread.join()
+            loader_thread.join()
+
+        if errors:
+            raise errors[0]
+
+        indexing_end_at = time.perf_counter()
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: stats["tokens"],
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    def _run_streaming_extractor(
+        self,
+        flask_app: Flask,
+        index_processor: BaseIndexProcessor,
+        upload_file_id: str,
+        doc_form: str,
+        process_rule: dict,
+        text_queue: queue.Queue,
+        stop_event: threading.Event,
+        errors: list[BaseException],
+        stats: dict,
+    ) -> None:
+        with flask_app.app_context():
+            try:
+                upload_file = db.session.query(UploadFile).filter(UploadFile.id == upload_file_id).one_or_none()
+                if upload_file:
+                    extract_setting = ExtractSetting(
+                        datasource_type="upload_file", upload_file=upload_file, document_model=doc_form
+                    )
+                    batch: list[Document] = []
+                    for text_doc in index_processor.extract_iter(
+                        extract_setting, process_rule_mode=process_rule["mode"]
+                    ):
+                        stats["word_count"] += len(text_doc.page_content)
+                        batch.append(text_doc)
+                        if len(batch) >= dify_config.INDEXING_STREAMING_BATCH_SIZE:
+                            self._put_until_stopped(text_queue, batch, stop_event)
+                            batch = []
+                    if batch:
+                        self._put_until_stopped(text_queue, batch, stop_event)
+                self._put_until_stopped(text_queue, None, stop_event)
+            except StreamingPipelineStoppedError:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop_event.set()
+
+    def _run_streaming_loader(
+        self,
+        flask_app: Flask,
+        index_processor: BaseIndexProcessor,
+        dataset_id: str,
+        document_id: str,
+        segment_queue: queue.Queue,
+        stop_event: threading.Event,
+        errors: list[BaseException],
+        stats: dict,
+    ) -> None:
+        with flask_app.app_context():
+            try:
+                dataset = Dataset.query.filter_by(id=dataset_id).first()
+                if not dataset:
+                    raise ValueError("no dataset found")
+                dataset_document = DatasetDocument.query.filter_by(id=document_id).first()
+                if not dataset_document:
+                    raise DocumentIsDeletedPausedError()
+                embedding_model_instance = None
+                if dataset.indexing_technique == "high_quality":
+                    embedding_model_instance = self.model_manager.get_model_instance(
+                        tenant_id=dataset.tenant_id,
+                        provider=dataset.embedding_model_provider,
+                        model_type=ModelType.TEXT_EMBEDDING,
+                        model=dataset.embedding_model,
+                    )
+                while (documents := self._get_until_stopped(segment_queue, stop_event)) is not None:
+                    stats["tokens"] += self._load_documents(
+                        index_processor=index_processor,
+                        dataset=dataset,
+                        dataset_document=dataset_document,
+                        documents=documents,
+                        embedding_model_instance=embedding_model_instance,
+                    )
+            except StreamingPipelineStoppedError:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop_event.set()
+
+    @staticmethod
+    def _put_until_stopped(q: queue.Queue, item: Any, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                q.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise StreamingPipelineStoppedError()
+
+    @staticmethod
+    def _get_until_stopped(q: queue.Queue, stop_event: threading.Event) -> Any:
+        while not stop_event.is_set():
+            try:
+                return q.get(timeout=1)
+            except queue.Empty:
+                continue
+        raise StreamingPipelineStoppedError()
+
 
 class DocumentIsPausedError(Exception):
     pass
@@ -752,3 +1006,7 @@ class DocumentIsPausedError(Exception):
 
 class DocumentIsDeletedPausedError(Exception):
     pass
+
+
+class StreamingPipelineStoppedError(Exception):
+    pass
@@ -1,5 +1,7 @@
 import logging
+import time
 from collections.abc import Callable, Generator, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, wait
 from typing import IO, Any, Optional, Union, cast
 
 from configs import dify_config
@@ -7,6 +9,13 @@ from core.entities.embedding_type import EmbeddingInputType
 from core.entities.provider_configuration import ProviderConfiguration, ProviderModelBundle
 from core.entities.provider_entities import ModelLoadBalancingConfiguration
 from core.errors.error import ProviderTokenNotInitError
+from core.helper.model_concurrency_limiter import (
+    ModelConcurrencyLimiter,
+    ModelConcurrencyQueueTimeoutError,
+    ModelHedgingExecutor,
+    ModelLatencyTracker,
+)
+from core.helper.model_lb_scheduler import ModelLBScheduler, ModelLBStrategy
 from core.model_runtime.callbacks.base_callback import Callback
 from core.model_runtime.entities.llm_entities import LLMResult
 from core.model_runtime.entities.message_entities import PromptMessage, PromptMessageTool
@@ -158,6 +167,7 @@ class ModelInstance:
             int,
             self._round_robin_invoke(
                 function=self.model_type_instance.get_num_tokens,
+                concurrency_limited=False,
                 model=self.model,
                 credentials=self.credentials,
                 prompt_messages=prompt_messages,
@@ -189,6 +199,7 @@ class ModelInstance:
                 texts=texts,
                 user=user,
                 input_type=input_type,
+                hedged=True,
             ),
         )
 
@@ -207,6 +218,7 @@ class ModelInstance:
             int,
             self._round_robin_invoke(
                 function=self.model_type_instance.get_num_tokens,
+                concurrency_limited=False,
                 model=self.model,
                 credentials=self.credentials,
                 texts=texts,
@@ -246,6 +258,7 @@ class ModelInstance:
                 score_threshold=score_threshold,
                 top_n=top_n,
                 user=user,
+                hedged=True,
             ),
         )
 
@@ -322,16 +335,28 @@ class ModelInstance:
             ),
         )
 
-    def _round_robin_invoke(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+    def _round_robin_invoke(
+        self,
+        function: Callable[..., Any],
+        *args,
+        concurrency_limited: bool = True,
+        hedged: bool = False,
+        **kwargs,
+    ) -> Any:
         """
         Round-robin invoke
         :param function: function to invoke
         :param args: function args
+        :param concurrency_limited: the function calls the provider and counts against the concurrency limit
+        :param hedged: the function is idempotent and may be sent to a second credential when it is slow
         :param kwargs: function kwargs
         :return:
         """
         if not self.load_balancing_manager:
-            return function(*args, **kwargs)
+            return self._invoke_with_credential(function, None, concurrency_limited, *args, **kwargs)
+
+        if hedged and dify_config.MODEL_HEDGING_ENABLED and len(self.load_balancing_manager.configs) > 1:
+            return self._hedged_invoke(function, *args, **kwargs)
 
         last_exception: Union[InvokeRateLimitError, InvokeAuthorizationError, InvokeConnectionError, None] = None
         while True:
@@ -345,20 +370,132 @@ class ModelInstance:
             try:
                 if "credentials" in kwargs:
                     del kwargs["credentials"]
-                return function(*args, **kwargs, credentials=lb_config.credentials)
-            except InvokeRateLimitError as e:
-                # expire in 60 seconds
-                self.load_balancing_manager.cooldown(lb_config, expire=60)
-                last_exception = e
-                continue
-            except (InvokeAuthorizationError, InvokeConnectionError) as e:
-                # expire in 10 seconds
-                self.load_balancing_manager.cooldown(lb_config, expire=10)
+                return self._invoke_with_credential(
+                    function, lb_config, concurrency_limited, *args, **kwargs, credentials=lb_config.credentials
+                )
+            except (InvokeRateLimitError, InvokeAuthorizationError, InvokeConnectionError) as e:
+                self._cooldown(lb_config, e)
                 last_exception = e
                 continue
             except Exception as e:
                 raise e
 
+    def _cooldown(self, lb_config: ModelLoadBalancingConfiguration, error: Exception) -> None:
+        if not self.load_balancing_manager:
+            return
+        if isinstance(error, InvokeRateLimitError):
+            # expire in 60 seconds
+            self.load_balancing_manager.cooldown(lb_config, expire=60)
+        elif isinstance(error, InvokeAuthorizationError | InvokeConnectionError):
+            # expire in 10 seconds
+            self.load_balancing_manager.cooldown(lb_config, expire=10)
+
+    def _invoke_with_credential(
+        self,
+        function: Callable[..., Any],
+        lb_config: Optional[ModelLoadBalancingConfiguration],
+        concurrency_limited: bool,
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        Invoke with one credential, waiting for a free slot of its adaptive concurrency limit if enabled
+        """
+        limiter = None
+        if concurrency_limited and dify_config.MODEL_CONCURRENCY_LIMIT_ENABLED:
+            limiter = ModelConcurrencyLimiter.get(
+                "{}:{}:{}:{}:{}".format(
+                    self.provider_model_bundle.configuration.tenant_id,
+                    self.provider,
+                    self.model_type_instance.model_type.value,
+                    self.model,
+                    lb_config.id if lb_config else "default",
+                )
+            )
+            if not limiter.acquire(timeout=dify_config.MODEL_CONCURRENCY_QUEUE_TIMEOUT):
+                raise ModelConcurrencyQueueTimeoutError()
+
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except InvokeRateLimitError:
+            if limiter:
+                limiter.release(rate_limited=True)
+            raise
+        except BaseException:
+            if limiter:
+                limiter.release()
+            raise
+
+        # for streamed responses, the time until the provider started answering
+        latency = time.perf_counter() - start
+        if lb_config and self.load_balancing_manager:
+            self.load_balancing_manager.observe_latency(lb_config, latency)
+
+        if limiter:
+            if isinstance(result, Generator):
+                return limiter.release_after(result, latency)
+            # the duration of a blocking llm call depends on the length of the answer, not on the load
+            limiter.release(None if isinstance(result, LLMResult) else latency)
+        return result
+
+    def _hedged_invoke(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Invoke an idempotent function with a load balanced credential, and again with another one if the first
+        call takes longer than the p95 latency of the model. The first successful result wins, if both calls fail
+        the usual round-robin retries the remaining credentials.
+        """
+        assert self.load_balancing_manager is not None
+        tracker = ModelLatencyTracker.get(
+            "{}:{}:{}:{}".format(
+                self.provider_model_bundle.configuration.tenant_id,
+                self.provider,
+                self.model_type_instance.model_type.value,
+                self.model,
+            )
+        )
+        kwargs.pop("credentials", None)
+        p95 = tracker.p95()
+        primary_config = self.load_balancing_manager.fetch_next() if p95 is not None else None
+        if p95 is None or primary_config is None:
+            start = time.perf_counter()
+            result = self._round_robin_invoke(function, *args, **kwargs, credentials=self.credentials)
+            tracker.observe(time.perf_counter() - start)
+            return result
+
+        def invoke(lb_config: ModelLoadBalancingConfiguration) -> Any:
+            return self._invoke_with_credential(
+                function, lb_config, True, *args, **kwargs, credentials=lb_config.credentials
+            )
+
+        start = time.perf_counter()
+        futures = {ModelHedgingExecutor.submit(invoke, primary_config): primary_config}
+        done, _ = wait(futures, timeout=p95)
+        if not done:
+            hedge_config = self.load_balancing_manager.fetch_next()
+            if hedge_config is not None and hedge_config.id == primary_config.id:
+                hedge_config = self.load_balancing_manager.fetch_next()
+            if hedge_config is not None and hedge_config.id != primary_config.id:
+                logger.debug(f"Hedging a call to {self.provider} {self.model} slower than {p95:.3f}s")
+                futures[ModelHedgingExecutor.submit(invoke, hedge_config)] = hedge_config
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    tracker.observe(time.perf_counter() - start)
+                    return future.result()
+                if not isinstance(error, Exception):
+                    # e.g. GeneratorExit or KeyboardInterrupt, not an error of the credential
+                    raise error
+                self._cooldown(futures[future], error)
+                if not isinstance(error, InvokeRateLimitError | InvokeAuthorizationError | InvokeConnectionError):
+                    raise error
+
+        return self._round_robin_invoke(function, *args, **kwargs, credentials=self.credentials)
+
     def get_tts_voices(self, language: Optional[str] = None) -> list:
         """
         Invoke large language tts model voices
@@ -450,6 +587,7 @@ class LBModelManager:
         self._model_type = model_type
         self._model = model
         self._load_balancing_configs = load_balancing_configs
+        self._cache_key = "model_lb_index:{}:{}:{}:{}".format(tenant_id, provider, model_type.value, model)
 
         for load_balancing_config in self._load_balancing_configs[:]:  # Iterate over a shallow copy of the list
             if load_balancing_config.name == "__inherit__":
@@ -459,53 +597,52 @@ class LBModelManager:
                 else:
                     load_balancing_config.credentials = managed_credentials
 
+    @property
+    def configs(self) -> list[ModelLoadBalancingConfiguration]:
+        return self._load_balancing_configs
+
     def fetch_next(self) -> Optional[ModelLoadBalancingConfiguration]:
         """
         Get next model load balancing config
-        Strategy: Round Robin
+        Strategy: MODEL_LB_STRATEGY, Round Robin by default
         :return:
         """
-        cache_key = "model_lb_index:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model
+        ModelLBScheduler.sync_cooldowns(
+            self._cache_key, [self._get_cooldown_cache_key(config) for config in self._load_balancing_configs]
         )
 
-        cooldown_load_balancing_configs = []
-        max_index = len(self._load_balancing_configs)
-
-        while True:
-            current_index = redis_client.incr(cache_key)
-            current_index = cast(int, current_index)
-            if current_index >= 10000000:
-                current_index = 1
-                redis_client.set(cache_key, current_index)
-
-            redis_client.expire(cache_key, 3600)
-            if current_index > max_index:
-                current_index = current_index % max_index
-
-            real_index = current_index - 1
-            if real_index > max_index:
-                real_index = 0
-
-            config: ModelLoadBalancingConfiguration = self._load_balancing_configs[real_index]
-
-            if self.in_cooldown(config):
-                cooldown_load_balancing_configs.append(config)
-                if len(cooldown_load_balancing_configs) >= len(self._load_balancing_configs):
-                    # all configs are in cooldown
-                    return None
+        strategy = ModelLBStrategy(dify_config.MODEL_LB_STRATEGY)
+        if strategy == ModelLBStrategy.ROUND_ROBIN:
+            config = self._fetch_next_round_robin()
+        else:
+            available_configs = [config for config in self._load_balancing_configs if not self.in_cooldown(config)]
+            if not available_configs:
+                # all configs are in cooldown
+                return None
+            config = available_configs[
+                ModelLBScheduler.select_by_latency(
+                    [self._get_latency_key(config) for config in available_configs], strategy
+                )
+            ]
 
-                continue
+        if config and dify_config.DEBUG:
+            logger.info(
+                f"Model LB\nid: {config.id}\nname:{config.name}\n"
+                f"tenant_id: {self._tenant_id}\nprovider: {self._provider}\n"
+                f"model_type: {self._model_type.value}\nmodel: {self._model}"
+            )
 
-            if dify_config.DEBUG:
-                logger.info(
-                    f"Model LB\nid: {config.id}\nname:{config.name}\n"
-                    f"tenant_id: {self._tenant_id}\nprovider: {self._provider}\n"
-                    f"model_type: {self._model_type.value}\nmodel: {self._model}"
-                )
+        return config
 
-            return config
+    def _fetch_next_round_robin(self) -> Optional[ModelLoadBalancingConfiguration]:
+        max_index = len(self._load_balancing_configs)
+        for _ in range(max_index):
+            index = ModelLBScheduler.next_index(self._cache_key) % max_index
+            config = self._load_balancing_configs[index]
+            if not self.in_cooldown(config):
+                return config
 
+        # all configs are in cooldown
         return None
 
     def cooldown(self, config: ModelLoadBalancingConfiguration, expire: int = 60) -> None:
@@ -515,11 +652,7 @@ class LBModelManager:
         :param expire: cooldown time
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model, config.id
-        )
-
-        redis_client.setex(cooldown_cache_key, expire, "true")
+        ModelLBScheduler.cooldown(self._get_cooldown_cache_key(config), expire)
 
     def in_cooldown(self, config: ModelLoadBalancingConfiguration) -> bool:
         """
@@ -527,12 +660,24 @@ class LBModelManager:
         :param config: model load balancing config
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
+        return ModelLBScheduler.in_cooldown(self._get_cooldown_cache_key(config))
+
+    def observe_latency(self, config: ModelLoadBalancingConfiguration, latency: float) -> None:
+        """
+        Record the latency of a successful call, used by the latency based strategies
+        :param config: model load balancing config
+        :param latency: seconds until the call returned
+        :return:
+        """
+        ModelLBScheduler.observe_latency(self._get_latency_key(config), latency)
+
+    def _get_cooldown_cache_key(self, config: ModelLoadBalancingConfiguration) -> str:
+        return "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
             self._tenant_id, self._provider, self._model_type.value, self._model, config.id
         )
 
-        res: bool = redis_client.exists(cooldown_cache_key)
-        return res
+    def _get_latency_key(self, config: ModelLoadBalancingConfiguration) -> str:
+        return f"{self._cache_key}:{config.id}"
 
     @staticmethod
     def get_config_in_cooldown_and_ttl(
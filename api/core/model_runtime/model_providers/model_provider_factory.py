@@ -1,14 +1,17 @@
 import logging
 import os
 from collections.abc import Sequence
+from threading import Lock
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from configs import dify_config
 from core.helper.module_import_helper import load_single_subclass_from_source
 from core.helper.position_helper import get_provider_position_map, sort_to_dict_by_position_map
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import ProviderConfig, ProviderEntity, SimpleProviderEntity
+from core.model_runtime.model_providers import model_provider_snapshot
 from core.model_runtime.model_providers.__base.model_provider import ModelProvider
 from core.model_runtime.schema_validators.model_credential_schema_validator import ModelCredentialSchemaValidator
 from core.model_runtime.schema_validators.provider_credential_schema_validator import ProviderCredentialSchemaValidator
@@ -19,13 +22,19 @@ logger = logging.getLogger(__name__)
 class ModelProviderExtension(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    provider_instance: ModelProvider
+    # None until the provider is used when it is loaded from the snapshot
+    provider_instance: Optional[ModelProvider] = None
+    # provider schema with the predefined models
+    provider_schema: Optional[ProviderEntity] = None
     name: str
     position: Optional[int] = None
 
 
 class ModelProviderFactory:
     model_provider_extensions: Optional[dict[str, ModelProviderExtension]] = None
+    providers: Optional[tuple[ProviderEntity, ...]] = None
+
+    _lock = Lock()
 
     def __init__(self) -> None:
         # for cache in memory
@@ -33,31 +42,33 @@ class ModelProviderFactory:
 
     def get_providers(self) -> Sequence[ProviderEntity]:
         """
-        Get all providers
+        Get all providers, the providers are built once and shared, they must not be modified
         :return: list of providers
         """
+        if self.providers is not None:
+            return self.providers
+
         # scan all providers
         model_provider_extensions = self._get_model_provider_map()
 
-        # traverse all model_provider_extensions
-        providers = []
-        for model_provider_extension in model_provider_extensions.values():
-            # get model_provider instance
-            model_provider_instance = model_provider_extension.provider_instance
+        self.providers = tuple(
+            self._get_provider_schema(model_provider_extension)
+            for model_provider_extension in model_provider_extensions.values()
+        )
 
-            # get provider schema
-            provider_schema = model_provider_instance.get_provider_schema()
+        return self.providers
 
-            for model_type in provider_schema.supported_model_types:
-                # get predefined models for given model type
-                models = model_provider_instance.models(model_type)
-                if models:
-                    provider_schema.models.extend(models)
-
-            providers.append(provider_schema)
+    def get_provider_schema(self, provider: str) -> ProviderEntity:
+        """
+        Get provider schema with the predefined models by provider name, without loading the provider
+        :param provider: provider name
+        :return: provider schema
+        """
+        model_provider_extension = self._get_model_provider_map().get(provider)
+        if not model_provider_extension:
+            raise Exception(f"Invalid provider: {provider}")
 
-        # return providers
-        return providers
+        return self._get_provider_schema(model_provider_extension)
 
     def provider_credentials_validate(self, *, provider: str, credentials: dict) -> dict:
         """
@@ -156,11 +167,8 @@ class ModelProviderFactory:
             if provider and name != provider:
                 continue
 
-            # get model_provider instance
-            model_provider_instance = model_provider_extension.provider_instance
-
-            # get provider schema
-            provider_schema = model_provider_instance.get_provider_schema()
+            # get provider schema with the predefined models
+            provider_schema = self._get_provider_schema(model_provider_extension)
 
             model_types = provider_schema.supported_model_types
             if model_type:
@@ -172,13 +180,11 @@ class ModelProviderFactory:
             all_model_type_models = []
             for model_type in model_types:
                 # get predefined models for given model type
-                models = model_provider_instance.models(
-                    model_type=model_type,
+                all_model_type_models.extend(
+                    model for model in provider_schema.models if model.model_type == model_type
                 )
 
-                all_model_type_models.extend(models)
-
-            simple_provider_schema = provider_schema.to_simple_provider()
+            simple_provider_schema = provider_schema.model_copy(update={"models": []}).to_simple_provider()
             simple_provider_schema.models.extend(all_model_type_models)
 
             providers.append(simple_provider_schema)
@@ -200,10 +206,50 @@ class ModelProviderFactory:
             raise Exception(f"Invalid provider: {provider}")
 
         # get the provider instance
-        model_provider_instance = model_provider_extension.provider_instance
+        model_provider_instance = self._get_provider_instance(model_provider_extension)
 
         return model_provider_instance
 
+    def _get_provider_instance(self, model_provider_extension: ModelProviderExtension) -> ModelProvider:
+        if model_provider_extension.provider_instance is not None:
+            return model_provider_extension.provider_instance
+
+        # import the provider loaded from the snapshot when it is first used
+        with self._lock:
+            if model_provider_extension.provider_instance is None:
+                model_provider_class = self._load_model_provider_class(model_provider_extension.name)
+                model_provider_extension.provider_instance = model_provider_class()
+
+        return model_provider_extension.provider_instance
+
+    def _get_provider_schema(self, model_provider_extension: ModelProviderExtension) -> ProviderEntity:
+        if model_provider_extension.provider_schema is not None:
+            return model_provider_extension.provider_schema
+
+        model_provider_instance = self._get_provider_instance(model_provider_extension)
+
+        # copy the schema cached by the provider, the predefined models are not added to it
+        provider_schema = model_provider_instance.get_provider_schema()
+        models = list(provider_schema.models)
+        for model_type in provider_schema.supported_model_types:
+            # get predefined models for given model type
+            models.extend(model_provider_instance.models(model_type))
+
+        model_provider_extension.provider_schema = provider_schema.model_copy(update={"models": models})
+        return model_provider_extension.provider_schema
+
+    def write_providers_snapshot(self) -> int:
+        """
+        write the snapshot of the providers loaded by MODEL_PROVIDER_SNAPSHOT_ENABLED
+
+        :return: number of providers in the snapshot
+        """
+        model_provider_extensions = self._scan_model_providers()
+        model_provider_snapshot.write_snapshot(
+            {name: self._get_provider_schema(extension) for name, extension in model_provider_extensions.items()}
+        )
+        return len(model_provider_extensions)
+
     def _get_model_provider_map(self) -> dict[str, ModelProviderExtension]:
         """
         Retrieves the model provider map.
@@ -221,6 +267,27 @@ class ModelProviderFactory:
         if self.model_provider_extensions:
             return self.model_provider_extensions
 
+        if dify_config.MODEL_PROVIDER_SNAPSHOT_ENABLED:
+            provider_schemas = model_provider_snapshot.load_snapshot()
+            if provider_schemas is not None:
+                position_map = get_provider_position_map(model_provider_snapshot.MODEL_PROVIDERS_PATH)
+                model_providers = [
+                    ModelProviderExtension(name=name, provider_schema=provider_schema, position=position_map.get(name))
+                    for name, provider_schema in provider_schemas.items()
+                ]
+                self.model_provider_extensions = sort_to_dict_by_position_map(
+                    position_map, model_providers, lambda x: x.name
+                )
+                return self.model_provider_extensions
+
+        self.model_provider_extensions = self._scan_model_providers()
+
+        return self.model_provider_extensions
+
+    def _scan_model_providers(self) -> dict[str, ModelProviderExtension]:
+        """
+        Import the modules of all the model providers
+        """
         # get the path of current classes
         current_path = os.path.abspath(__file__)
         model_providers_path = os.path.dirname(current_path)
@@ -250,11 +317,7 @@ class ModelProviderFactory:
 
             # Dynamic loading {model_provider_name}.py file and find the subclass of ModelProvider
             py_path = os.path.join(model_provider_dir_path, model_provider_name + ".py")
-            model_provider_class = load_single_subclass_from_source(
-                module_name=f"core.model_runtime.model_providers.{model_provider_name}.{model_provider_name}",
-                script_path=py_path,
-                parent_type=ModelProvider,
-            )
+            model_provider_class = self._load_model_provider_class(model_provider_name)
 
             if not model_provider_class:
                 logger.warning(f"Missing Model Provider Class that extends ModelProvider in {py_path}, Skip.")
@@ -274,6 +337,14 @@ class ModelProviderFactory:
 
         sorted_extensions = sort_to_dict_by_position_map(position_map, model_providers, lambda x: x.name)
 
-        self.model_provider_extensions = sorted_extensions
-
         return sorted_extensions
+
+    @staticmethod
+    def _load_model_provider_class(model_provider_name: str) -> type[ModelProvider]:
+        return load_single_subclass_from_source(
+            module_name=f"core.model_runtime.model_providers.{model_provider_name}.{model_provider_name}",
+            script_path=os.path.join(
+                model_provider_snapshot.MODEL_PROVIDERS_PATH, model_provider_name, f"{model_provider_name}.py"
+            ),
+            parent_type=ModelProvider,
+        )
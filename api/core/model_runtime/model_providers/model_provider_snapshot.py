@@ -0,0 +1,60 @@
+from os import path
+from typing import Any, Optional
+
+from core.helper.source_snapshot import get_source_fingerprint, load_source_snapshot, write_source_snapshot
+from core.model_runtime.entities.model_entities import AIModelEntity
+from core.model_runtime.entities.provider_entities import ProviderEntity
+
+MODEL_PROVIDERS_PATH = path.dirname(path.realpath(__file__))
+SNAPSHOT_PATH = path.join(MODEL_PROVIDERS_PATH, "_snapshot.json")
+
+
+def get_fingerprint() -> str:
+    """
+    Fingerprint of the sources of the model providers, a snapshot of other sources is ignored
+    """
+    return get_source_fingerprint(MODEL_PROVIDERS_PATH)
+
+
+def build_snapshot(provider_schemas: dict[str, ProviderEntity]) -> dict[str, Any]:
+    """
+    Snapshot of the provider schemas with their predefined models, by the name of the provider package
+    """
+    return {
+        "fingerprint": get_fingerprint(),
+        "providers": [
+            {
+                "name": name,
+                "schema": provider_schema.model_dump(mode="json", exclude={"models"}),
+                "models": [model.model_dump(mode="json") for model in provider_schema.models],
+            }
+            for name, provider_schema in provider_schemas.items()
+        ],
+    }
+
+
+def write_snapshot(provider_schemas: dict[str, ProviderEntity]) -> None:
+    write_source_snapshot(SNAPSHOT_PATH, build_snapshot(provider_schemas))
+
+
+def _parse_providers(providers: list[dict[str, Any]]) -> dict[str, ProviderEntity]:
+    provider_schemas: dict[str, ProviderEntity] = {}
+    for provider in providers:
+        # keep the models as AIModelEntity, as ModelProvider.models returns them
+        models = [AIModelEntity(**model) for model in provider["models"]]
+        provider_schemas[provider["name"]] = ProviderEntity(**provider["schema"]).model_copy(update={"models": models})
+    return provider_schemas
+
+
+def load_snapshot() -> Optional[dict[str, ProviderEntity]]:
+    """
+    :return: provider schemas with their predefined models by the name of the provider package,
+        None if there is no snapshot or it does not match the sources
+    """
+    return load_source_snapshot(
+        SNAPSHOT_PATH,
+        get_fingerprint,
+        _parse_providers,
+        name="model provider",
+        command="build-model-provider-snapshot",
+    )
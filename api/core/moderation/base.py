@@ -27,6 +27,23 @@ class ModerationOutputsResult(BaseModel):
     text: str = ""
 
 
+class ModerationOutputsScanner(ABC):
+    """
+    Incremental moderation of streamed outputs.
+    Each piece of the output is fed once, in order, instead of moderating the whole output again.
+    """
+
+    @abstractmethod
+    def feed(self, text: str) -> ModerationOutputsResult:
+        """
+        Moderate the next piece of the output.
+
+        :param text: output content appended since the previous call
+        :return: flagged if the output so far violates the rule
+        """
+        raise NotImplementedError
+
+
 class Moderation(Extensible, ABC):
     """
     The base class of moderation.
@@ -75,6 +92,15 @@ class Moderation(Extensible, ABC):
         """
         raise NotImplementedError
 
+    def create_outputs_scanner(self) -> Optional[ModerationOutputsScanner]:
+        """
+        Create a scanner for streamed outputs, if the moderation can review the output incrementally.
+        Otherwise the accumulated output is passed to moderation_for_outputs.
+
+        :return:
+        """
+        return None
+
     @classmethod
     def _validate_inputs_and_outputs_config(cls, config: dict, is_preset_response_required: bool) -> None:
         # inputs_config
@@ -1,5 +1,12 @@
+from typing import Optional
+
 from core.extension.extensible import ExtensionModule
-from core.moderation.base import Moderation, ModerationInputsResult, ModerationOutputsResult
+from core.moderation.base import (
+    Moderation,
+    ModerationInputsResult,
+    ModerationOutputsResult,
+    ModerationOutputsScanner,
+)
 from extensions.ext_code_based_extension import code_based_extension
 
 
@@ -47,3 +54,11 @@ class ModerationFactory:
         :return:
         """
         return self.__extension_instance.moderation_for_outputs(text)
+
+    def create_outputs_scanner(self) -> Optional[ModerationOutputsScanner]:
+        """
+        Create a scanner for streamed outputs, None if the moderation does not support incremental review.
+
+        :return:
+        """
+        return self.__extension_instance.create_outputs_scanner()
@@ -0,0 +1,93 @@
+from collections import deque
+from collections.abc import Iterable
+from functools import lru_cache
+
+
+class KeywordsMatcher:
+    """
+    Case-insensitive multi-keyword matcher built on an Aho-Corasick automaton.
+
+    The automaton is compiled once per keywords config and scans a text in a single pass, whatever the number
+    of keywords. Streamed text can be fed piece by piece with a `KeywordsScanner`, which carries the automaton
+    state between pieces so keywords split across two tokens are still found and every token is scanned once.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        # state 0 is the root, a state is matched if a keyword ends there or at one of its suffixes
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._matched: list[bool] = [False]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword.lower())
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._matched.append(False)
+            state = next_state
+        self._matched[state] = True
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._matched[next_state] = self._matched[next_state] or self._matched[self._fail[next_state]]
+                queue.append(next_state)
+
+    def feed(self, state: int, text: str) -> tuple[int, bool]:
+        """
+        Advance the automaton over text
+        :param state: state returned by the previous call, 0 at the start of a text
+        :return: new state, whether a keyword ended in text
+        """
+        goto, fail, matched = self._goto, self._fail, self._matched
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if matched[state]:
+                return state, True
+        return state, False
+
+    def match(self, text: str) -> bool:
+        return self.feed(0, text)[1]
+
+    def scanner(self) -> "KeywordsScanner":
+        return KeywordsScanner(self)
+
+
+class KeywordsScanner:
+    """Incremental scan of a streamed text, matched stays True once a keyword was found."""
+
+    def __init__(self, matcher: KeywordsMatcher) -> None:
+        self.matcher = matcher
+        self.state = 0
+        self.matched = False
+
+    def feed(self, text: str) -> bool:
+        if not self.matched:
+            self.state, self.matched = self.matcher.feed(self.state, text)
+        return self.matched
+
+
+@lru_cache(maxsize=256)
+def get_keywords_matcher(keywords: str) -> KeywordsMatcher:
+    """
+    Compiled matcher of a keywords config, one keyword per line.
+    Cached by the config text, so every request of an app shares the same automaton until the config changes.
+    """
+    return KeywordsMatcher(keywords.split("\n"))
@@ -1,15 +1,15 @@
 import logging
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.entities.queue_entities import QueueMessageReplaceEvent
-from core.moderation.base import ModerationAction, ModerationOutputsResult
+from core.moderation.base import ModerationAction, ModerationOutputsResult, ModerationOutputsScanner
 from core.moderation.factory import ModerationFactory
 
 logger = logging.getLogger(__name__)
@@ -20,6 +20,28 @@ class ModerationRule(BaseModel):
     config: dict[str, Any]
 
 
+class OutputModerationScheduler:
+    """
+    Worker pool shared by the output moderation of every streaming response of the process.
+
+    A response submits a review when its buffer grew by MODERATION_BUFFER_SIZE characters, so idle streams cost
+    no thread and reviews start as soon as the threshold is crossed.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, fn, *args, **kwargs) -> None:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.MODERATION_MAX_WORKERS, thread_name_prefix="output_moderation"
+                    )
+        cls._executor.submit(fn, *args, **kwargs)
+
+
 class OutputModeration(BaseModel):
     tenant_id: str
     app_id: str
@@ -27,13 +49,20 @@ class OutputModeration(BaseModel):
     rule: ModerationRule
     queue_manager: AppQueueManager
 
-    thread: Optional[threading.Thread] = None
-    thread_running: bool = True
+    running: bool = True
     buffer: str = ""
-    is_final_chunk: bool = False
     final_output: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _flask_app: Optional[Flask] = PrivateAttr(default=None)
+    # length of the buffer covered by the last submitted review
+    _reviewed_length: int = PrivateAttr(default=0)
+    # at most one review of a response is queued or running, newer tokens are reviewed by the next one
+    _review_pending: bool = PrivateAttr(default=False)
+    _scanner: Optional[ModerationOutputsScanner] = PrivateAttr(default=None)
+    _scanner_created: bool = PrivateAttr(default=False)
+
     def should_direct_output(self) -> bool:
         return self.final_output is not None
 
@@ -41,14 +70,15 @@ class OutputModeration(BaseModel):
         return self.final_output or ""
 
     def append_new_token(self, token: str) -> None:
-        self.buffer += token
+        if self._flask_app is None:
+            self._flask_app = current_app._get_current_object()  # type: ignore
 
-        if not self.thread:
-            self.thread = self.start_thread()
+        with self._lock:
+            self.buffer += token
+            self._submit_review_if_needed()
 
     def moderation_completion(self, completion: str, public_event: bool = False) -> str:
         self.buffer = completion
-        self.is_final_chunk = True
 
         result = self.moderation(tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=completion)
 
@@ -65,57 +95,63 @@ class OutputModeration(BaseModel):
 
         return final_output
 
-    def start_thread(self) -> threading.Thread:
-        buffer_size = dify_config.MODERATION_BUFFER_SIZE
-        thread = threading.Thread(
-            target=self.worker,
-            kwargs={
-                "flask_app": current_app._get_current_object(),  # type: ignore
-                "buffer_size": buffer_size if buffer_size > 0 else dify_config.MODERATION_BUFFER_SIZE,
-            },
-        )
-
-        thread.start()
-
-        return thread
-
-    def stop_thread(self):
-        if self.thread and self.thread.is_alive():
-            self.thread_running = False
-
-    def worker(self, flask_app: Flask, buffer_size: int):
-        with flask_app.app_context():
-            current_length = 0
-            while self.thread_running:
-                moderation_buffer = self.buffer
-                buffer_length = len(moderation_buffer)
-                if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
-                    if 0 <= chunk_length < buffer_size:
-                        time.sleep(1)
-                        continue
-
-                current_length = buffer_length
-
-                result = self.moderation(
-                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
-                )
-
-                if not result or not result.flagged:
-                    continue
-
-                if result.action == ModerationAction.DIRECT_OUTPUT:
-                    final_output = result.preset_response
-                    self.final_output = final_output
-                else:
-                    final_output = result.text + self.buffer[len(moderation_buffer) :]
-
-                # trigger replace event
-                if self.thread_running:
-                    self.queue_manager.publish(QueueMessageReplaceEvent(text=final_output), PublishFrom.TASK_PIPELINE)
-
-                if result.action == ModerationAction.DIRECT_OUTPUT:
-                    break
+    def stop(self) -> None:
+        self.running = False
+
+    def _submit_review_if_needed(self) -> None:
+        """
+        Must be called with the lock held.
+        """
+        if not self.running or self._review_pending or self.final_output is not None:
+            return
+        if len(self.buffer) - self._reviewed_length < dify_config.MODERATION_BUFFER_SIZE:
+            return
+
+        self._review_pending = True
+        OutputModerationScheduler.submit(self._review_with_app_context)
+
+    def _review_with_app_context(self) -> None:
+        try:
+            if self._flask_app is None:
+                self._review()
+            else:
+                with self._flask_app.app_context():
+                    self._review()
+        except Exception:
+            logger.exception(f"Moderation Output error, app_id: {self.app_id}")
+        finally:
+            with self._lock:
+                self._review_pending = False
+                self._submit_review_if_needed()
+
+    def _review(self) -> None:
+        with self._lock:
+            moderation_buffer = self.buffer
+            reviewed_length = self._reviewed_length
+            self._reviewed_length = len(moderation_buffer)
+
+        if not self._scanner_created:
+            self._scanner = self.create_outputs_scanner(tenant_id=self.tenant_id, app_id=self.app_id)
+            self._scanner_created = True
+
+        if self._scanner:
+            # only the text appended since the previous review is scanned
+            result = self.scan(self._scanner, app_id=self.app_id, text=moderation_buffer[reviewed_length:])
+        else:
+            result = self.moderation(tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer)
+
+        if not result or not result.flagged:
+            return
+
+        if result.action == ModerationAction.DIRECT_OUTPUT:
+            final_output = result.preset_response
+            self.final_output = final_output
+        else:
+            final_output = result.text + self.buffer[len(moderation_buffer) :]
+
+        # trigger replace event
+        if self.running:
+            self.queue_manager.publish(QueueMessageReplaceEvent(text=final_output), PublishFrom.TASK_PIPELINE)
 
     def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
         try:
@@ -129,3 +165,23 @@ class OutputModeration(BaseModel):
             logger.exception(f"Moderation Output error, app_id: {app_id}")
 
         return None
+
+    def create_outputs_scanner(self, tenant_id: str, app_id: str) -> Optional[ModerationOutputsScanner]:
+        try:
+            moderation_factory = ModerationFactory(
+                name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
+            )
+
+            return moderation_factory.create_outputs_scanner()
+        except Exception as e:
+            logger.exception(f"Moderation Output error, app_id: {app_id}")
+
+        return None
+
+    def scan(self, scanner: ModerationOutputsScanner, app_id: str, text: str) -> Optional[ModerationOutputsResult]:
+        try:
+            return scanner.feed(text)
+        except Exception as e:
+            logger.exception(f"Moderation Output error, app_id: {app_id}")
+
+        return None
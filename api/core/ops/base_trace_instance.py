@@ -1,8 +1,12 @@
+import logging
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
 from core.ops.entities.config_entity import BaseTracingConfig
 from core.ops.entities.trace_entity import BaseTraceInfo
 
+logger = logging.getLogger(__name__)
+
 
 class BaseTraceInstance(ABC):
     """
@@ -24,3 +28,27 @@ class BaseTraceInstance(ABC):
         Subclasses must implement specific tracing logic for activities.
         """
         ...
+
+    def batch_trace(self, trace_infos: Sequence[BaseTraceInfo]) -> int:
+        """
+        Trace a batch of activities, one failing trace does not prevent the others from being sent.
+        The traces are flushed once at the end, so clients buffering their events send the whole batch
+        through their bulk ingestion API.
+        :return: number of traces that failed
+        """
+        failed_count = 0
+        for trace_info in trace_infos:
+            try:
+                self.trace(trace_info)
+            except Exception:
+                logger.exception(f"Failed to trace {type(trace_info).__name__}")
+                failed_count += 1
+
+        self.flush()
+        return failed_count
+
+    def flush(self) -> None:
+        """
+        Send the events buffered by the client, clients sending every event immediately have nothing to do.
+        """
+        return None
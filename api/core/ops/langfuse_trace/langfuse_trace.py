@@ -6,6 +6,7 @@ from typing import Optional
 
 from langfuse import Langfuse  # type: ignore
 
+from core.helper import workflow_payload
 from core.ops.base_trace_instance import BaseTraceInstance
 from core.ops.entities.config_entity import LangfuseConfig
 from core.ops.entities.trace_entity import (
@@ -148,11 +149,13 @@ class LangFuseDataTrace(BaseTraceInstance):
             status = node_execution.status
             if node_type == "llm":
                 inputs = (
-                    json.loads(node_execution.process_data).get("prompts", {}) if node_execution.process_data else {}
+                    workflow_payload.loads(node_execution.process_data).get("prompts", {})
+                    if node_execution.process_data
+                    else {}
                 )
             else:
-                inputs = json.loads(node_execution.inputs) if node_execution.inputs else {}
-            outputs = json.loads(node_execution.outputs) if node_execution.outputs else {}
+                inputs = workflow_payload.loads(node_execution.inputs) if node_execution.inputs else {}
+            outputs = workflow_payload.loads(node_execution.outputs) if node_execution.outputs else {}
             created_at = node_execution.created_at or datetime.now()
             elapsed_time = node_execution.elapsed_time
             finished_at = created_at + timedelta(seconds=elapsed_time)
@@ -169,7 +172,7 @@ class LangFuseDataTrace(BaseTraceInstance):
                     "status": status,
                 }
             )
-            process_data = json.loads(node_execution.process_data) if node_execution.process_data else {}
+            process_data = workflow_payload.loads(node_execution.process_data) if node_execution.process_data else {}
             model_provider = process_data.get("model_provider", None)
             model_name = process_data.get("model_name", None)
             if model_provider is not None and model_name is not None:
@@ -439,6 +442,10 @@ class LangFuseDataTrace(BaseTraceInstance):
 
         generation.end(**format_generation_data)
 
+    def flush(self):
+        # the client queues events and sends them through the ingestion API in batches
+        self.langfuse_client.flush()
+
     def api_check(self):
         try:
             return self.langfuse_client.auth_check()
@@ -2,12 +2,14 @@ import json
 import logging
 import os
 import uuid
+from collections.abc import Sequence
 from datetime import datetime, timedelta
-from typing import Optional, cast
+from typing import Any, Optional, cast
 
 from langsmith import Client
 from langsmith.schemas import RunBase
 
+from core.helper import workflow_payload
 from core.ops.base_trace_instance import BaseTraceInstance
 from core.ops.entities.config_entity import LangSmithConfig
 from core.ops.entities.trace_entity import (
@@ -45,6 +47,8 @@ class LangSmithDataTrace(BaseTraceInstance):
         self.project_id = None
         self.langsmith_client = Client(api_key=langsmith_config.api_key, api_url=langsmith_config.endpoint)
         self.file_base_url = os.getenv("FILES_URL", "http://127.0.0.1:5001")
+        # runs buffered while a batch is traced, None outside of batch_trace
+        self.pending_runs: Optional[list[dict[str, Any]]] = None
 
     def trace(self, trace_info: BaseTraceInfo):
         if isinstance(trace_info, WorkflowTraceInfo):
@@ -172,11 +176,13 @@ class LangSmithDataTrace(BaseTraceInstance):
             status = node_execution.status
             if node_type == "llm":
                 inputs = (
-                    json.loads(node_execution.process_data).get("prompts", {}) if node_execution.process_data else {}
+                    workflow_payload.loads(node_execution.process_data).get("prompts", {})
+                    if node_execution.process_data
+                    else {}
                 )
             else:
-                inputs = json.loads(node_execution.inputs) if node_execution.inputs else {}
-            outputs = json.loads(node_execution.outputs) if node_execution.outputs else {}
+                inputs = workflow_payload.loads(node_execution.inputs) if node_execution.inputs else {}
+            outputs = workflow_payload.loads(node_execution.outputs) if node_execution.outputs else {}
             created_at = node_execution.created_at or datetime.now()
             elapsed_time = node_execution.elapsed_time
             finished_at = created_at + timedelta(seconds=elapsed_time)
@@ -198,7 +204,7 @@ class LangSmithDataTrace(BaseTraceInstance):
                 }
             )
 
-            process_data = json.loads(node_execution.process_data) if node_execution.process_data else {}
+            process_data = workflow_payload.loads(node_execution.process_data) if node_execution.process_data else {}
             if process_data and process_data.get("model_mode") == "chat":
                 run_type = LangSmithRunType.llm
                 metadata.update(
@@ -479,6 +485,10 @@ class LangSmithDataTrace(BaseTraceInstance):
             data["session_name"] = self.project_name
 
         data = filter_none_values(data)
+        if self.pending_runs is not None and data.get("trace_id") and data.get("dotted_order"):
+            # the bulk ingestion API only accepts runs positioned in their trace
+            self.pending_runs.append(data)
+            return
         try:
             self.langsmith_client.create_run(**data)
             logger.debug("LangSmith Run created successfully.")
@@ -494,6 +504,24 @@ class LangSmithDataTrace(BaseTraceInstance):
         except Exception as e:
             raise ValueError(f"LangSmith Failed to update run: {str(e)}")
 
+    def batch_trace(self, trace_infos: Sequence[BaseTraceInfo]) -> int:
+        self.pending_runs = []
+        try:
+            return super().batch_trace(trace_infos)
+        finally:
+            self.pending_runs = None
+
+    def flush(self):
+        if not self.pending_runs:
+            return
+        try:
+            self.langsmith_client.batch_ingest_runs(create=self.pending_runs)
+            logger.debug("LangSmith Runs created successfully.")
+        except Exception as e:
+            raise ValueError(f"LangSmith Failed to create runs: {str(e)}")
+        finally:
+            self.pending_runs = []
+
     def api_check(self):
         try:
             random_project_name = f"test_project_{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -8,6 +8,7 @@ from typing import Optional, cast
 from opik import Opik, Trace
 from opik.id_helpers import uuid4_to_uuid7
 
+from core.helper import workflow_payload
 from core.ops.base_trace_instance import BaseTraceInstance
 from core.ops.entities.config_entity import OpikConfig
 from core.ops.entities.trace_entity import (
@@ -185,11 +186,13 @@ class OpikDataTrace(BaseTraceInstance):
             status = node_execution.status
             if node_type == "llm":
                 inputs = (
-                    json.loads(node_execution.process_data).get("prompts", {}) if node_execution.process_data else {}
+                    workflow_payload.loads(node_execution.process_data).get("prompts", {})
+                    if node_execution.process_data
+                    else {}
                 )
             else:
-                inputs = json.loads(node_execution.inputs) if node_execution.inputs else {}
-            outputs = json.loads(node_execution.outputs) if node_execution.outputs else {}
+                inputs = workflow_payload.loads(node_execution.inputs) if node_execution.inputs else {}
+            outputs = workflow_payload.loads(node_execution.outputs) if node_execution.outputs else {}
             created_at = node_execution.created_at or datetime.now()
             elapsed_time = node_execution.elapsed_time
             finished_at = created_at + timedelta(seconds=elapsed_time)
@@ -210,7 +213,7 @@ class OpikDataTrace(BaseTraceInstance):
                 }
             )
 
-            process_data = json.loads(node_execution.process_data) if node_execution.process_data else {}
+            process_data = workflow_payload.loads(node_execution.process_data) if node_execution.process_data else {}
 
             provider = None
             model = None
@@ -453,6 +456,10 @@ class OpikDataTrace(BaseTraceInstance):
         except Exception as e:
             raise ValueError(f"Opik Failed to create span: {str(e)}")
 
+    def flush(self):
+        # the client queues traces and spans and sends them in batches
+        self.opik_client.flush()
+
     def api_check(self):
         try:
             self.opik_client.auth_check()
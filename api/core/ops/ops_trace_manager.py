@@ -1,3 +1,4 @@
+import gzip
 import json
 import logging
 import os
@@ -12,6 +13,7 @@ from flask import current_app
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
     OPS_FILE_PATH,
@@ -39,7 +41,7 @@ from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_batch_tasks, process_trace_tasks
 
 provider_config_map: dict[str, dict[str, Any]] = {
     TracingProviderEnum.LANGFUSE.value: {
@@ -344,7 +346,7 @@ class TraceTask:
         self.user_id = user_id
         self.timer = timer
         self.file_base_url = os.getenv("FILES_URL", "http://127.0.0.1:5001")
-        self.app_id = None
+        self.app_id: Optional[str] = None
 
         self.kwargs = kwargs
 
@@ -741,6 +743,10 @@ trace_manager_timer: Optional[threading.Timer] = None
 trace_manager_queue: queue.Queue = queue.Queue()
 trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
 trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
+# traces waiting to be exported when OPS_TRACE_BATCH_EXPORT_ENABLED,
+# app_id -> (monotonic time the oldest trace was added, serialized task data)
+trace_manager_pending_batches: dict[str, tuple[float, list[str]]] = {}
+trace_manager_pending_batches_lock = threading.Lock()
 
 
 class TraceQueueManager:
@@ -777,18 +783,36 @@ class TraceQueueManager:
     def run(self):
         try:
             tasks = self.collect_tasks()
-            if tasks:
+            if dify_config.OPS_TRACE_BATCH_EXPORT_ENABLED:
+                self.send_batches_to_celery(tasks)
+            elif tasks:
                 self.send_to_celery(tasks)
         except Exception as e:
             logging.exception("Error processing trace tasks")
+        finally:
+            if not trace_manager_queue.empty() or trace_manager_pending_batches:
+                # the timer is only restarted when a trace is added, keep running until everything is sent
+                self._start_timer_thread()
 
     def start_timer(self):
         global trace_manager_timer
         if trace_manager_timer is None or not trace_manager_timer.is_alive():
-            trace_manager_timer = threading.Timer(trace_manager_interval, self.run)
-            trace_manager_timer.name = f"trace_manager_timer_{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}"
-            trace_manager_timer.daemon = False
-            trace_manager_timer.start()
+            self._start_timer_thread()
+
+    def _start_timer_thread(self):
+        global trace_manager_timer
+        trace_manager_timer = threading.Timer(trace_manager_interval, self.run)
+        trace_manager_timer.name = f"trace_manager_timer_{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}"
+        trace_manager_timer.daemon = False
+        trace_manager_timer.start()
+
+    def build_task_data(self, app_id: str, task: TraceTask) -> TaskData:
+        trace_info = task.execute()
+        return TaskData(
+            app_id=app_id,
+            trace_info_type=type(trace_info).__name__,
+            trace_info=trace_info.model_dump() if trace_info else None,
+        )
 
     def send_to_celery(self, tasks: list[TraceTask]):
         with self.flask_app.app_context():
@@ -796,12 +820,7 @@ class TraceQueueManager:
                 if task.app_id is None:
                     continue
                 file_id = uuid4().hex
-                trace_info = task.execute()
-                task_data = TaskData(
-                    app_id=task.app_id,
-                    trace_info_type=type(trace_info).__name__,
-                    trace_info=trace_info.model_dump() if trace_info else None,
-                )
+                task_data = self.build_task_data(task.app_id, task)
                 file_path = f"{OPS_FILE_PATH}{task.app_id}/{file_id}.json"
                 storage.save(file_path, task_data.model_dump_json().encode("utf-8"))
                 file_info = {
@@ -809,3 +828,39 @@ class TraceQueueManager:
                     "app_id": task.app_id,
                 }
                 process_trace_tasks.delay(file_info)
+
+    def send_batches_to_celery(self, tasks: list[TraceTask]):
+        """
+        Group the traces per app and export them as compressed NDJSON batches, one Celery task per batch.
+        A batch is sent once it holds OPS_TRACE_BATCH_SIZE traces or its oldest trace waited
+        OPS_TRACE_BATCH_FLUSH_INTERVAL seconds.
+        """
+        with self.flask_app.app_context():
+            for task in tasks:
+                if task.app_id is None:
+                    continue
+                line = self.build_task_data(task.app_id, task).model_dump_json()
+                with trace_manager_pending_batches_lock:
+                    trace_manager_pending_batches.setdefault(task.app_id, (time.monotonic(), []))[1].append(line)
+
+            for app_id, lines in self.collect_batches():
+                file_id = uuid4().hex
+                file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.ndjson.gz"
+                storage.save(file_path, gzip.compress("\n".join(lines).encode("utf-8")))
+                process_trace_batch_tasks.delay({"file_id": file_id, "app_id": app_id})
+
+    def collect_batches(self) -> list[tuple[str, list[str]]]:
+        batch_size = dify_config.OPS_TRACE_BATCH_SIZE
+        now = time.monotonic()
+        batches = []
+        with trace_manager_pending_batches_lock:
+            for app_id, (created_at, lines) in list(trace_manager_pending_batches.items()):
+                while len(lines) >= batch_size:
+                    batches.append((app_id, lines[:batch_size]))
+                    del lines[:batch_size]
+                if lines and now - created_at >= dify_config.OPS_TRACE_BATCH_FLUSH_INTERVAL:
+                    batches.append((app_id, lines[:]))
+                    lines.clear()
+                if not lines:
+                    del trace_manager_pending_batches[app_id]
+        return batches
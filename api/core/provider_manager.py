@@ -263,8 +263,7 @@ class ProviderManager:
         if not default_model:
             return None
 
-        provider_instance = model_provider_factory.get_provider_instance(default_model.provider_name)
-        provider_schema = provider_instance.get_provider_schema()
+        provider_schema = model_provider_factory.get_provider_schema(default_model.provider_name)
 
         return DefaultModelEntity(
             model=default_model.model_name,
@@ -1,4 +1,5 @@
-import threading
+from collections.abc import Callable
+from functools import partial
 from typing import Optional
 
 from flask import Flask, current_app
@@ -10,6 +11,8 @@ from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
+from core.rag.retrieval.retrieval_cache import RetrievalCache
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from extensions.ext_database import db
 from models.dataset import ChildChunk, Dataset, DocumentSegment
@@ -37,6 +40,7 @@ class RetrievalService:
         reranking_model: Optional[dict] = None,
         reranking_mode: str = "reranking_model",
         weights: Optional[dict] = None,
+        app_id: Optional[str] = None,
     ):
         if not query:
             return []
@@ -46,64 +50,78 @@ class RetrievalService:
 
         if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
             return []
+
+        cache_key = None
+        if RetrievalCache.is_enabled(app_id):
+            cache_key = RetrievalCache.get_key(
+                dataset_id,
+                query,
+                {
+                    "retrieval_method": retrieval_method,
+                    "top_k": top_k,
+                    "score_threshold": score_threshold,
+                    "reranking_model": reranking_model,
+                    "reranking_mode": reranking_mode,
+                    "weights": weights,
+                },
+            )
+            if cache_key:
+                cached_documents = RetrievalCache.get(cache_key)
+                if cached_documents is not None:
+                    return cached_documents
+
         all_documents: list[Document] = []
-        threads: list[threading.Thread] = []
         exceptions: list[str] = []
+        flask_app = current_app._get_current_object()  # type: ignore
+        tasks: list[Callable[[], None]] = []
         # retrieval_model source with keyword
         if retrieval_method == "keyword_search":
-            keyword_thread = threading.Thread(
-                target=RetrievalService.keyword_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            tasks.append(
+                partial(
+                    RetrievalService.keyword_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    all_documents=all_documents,
+                    exceptions=exceptions,
+                )
             )
-            threads.append(keyword_thread)
-            keyword_thread.start()
         # retrieval_model source with semantic
         if RetrievalMethod.is_support_semantic_search(retrieval_method):
-            embedding_thread = threading.Thread(
-                target=RetrievalService.embedding_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "score_threshold": score_threshold,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "retrieval_method": retrieval_method,
-                    "exceptions": exceptions,
-                },
+            tasks.append(
+                partial(
+                    RetrievalService.embedding_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    reranking_model=reranking_model,
+                    all_documents=all_documents,
+                    retrieval_method=retrieval_method,
+                    exceptions=exceptions,
+                )
             )
-            threads.append(embedding_thread)
-            embedding_thread.start()
 
         # retrieval source with full text
         if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-            full_text_index_thread = threading.Thread(
-                target=RetrievalService.full_text_index_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "retrieval_method": retrieval_method,
-                    "score_threshold": score_threshold,
-                    "top_k": top_k,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            tasks.append(
+                partial(
+                    RetrievalService.full_text_index_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    retrieval_method=retrieval_method,
+                    score_threshold=score_threshold,
+                    top_k=top_k,
+                    reranking_model=reranking_model,
+                    all_documents=all_documents,
+                    exceptions=exceptions,
+                )
             )
-            threads.append(full_text_index_thread)
-            full_text_index_thread.start()
 
-        for thread in threads:
-            thread.join()
+        RetrievalExecutor.run(tasks)
 
         if exceptions:
             exception_message = ";\n".join(exceptions)
@@ -120,6 +138,8 @@ class RetrievalService:
                 top_n=top_k,
             )
 
+        if cache_key:
+            RetrievalCache.set(cache_key, all_documents)
         return all_documents
 
     @classmethod
@@ -9,6 +9,7 @@ from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.embedding.embedding_base import Embeddings
 from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_cache import RetrievalCache
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import Dataset, Whitelist
@@ -155,6 +156,7 @@ class Vector:
         if texts:
             embeddings = self._embeddings.embed_documents([document.page_content for document in texts])
             self._vector_processor.create(texts=texts, embeddings=embeddings, **kwargs)
+            RetrievalCache.bump_dataset_version(self._dataset.id)
 
     def add_texts(self, documents: list[Document], **kwargs):
         if kwargs.get("duplicate_check", False):
@@ -162,15 +164,18 @@ class Vector:
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in documents])
         self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        RetrievalCache.bump_dataset_version(self._dataset.id)
 
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]) -> None:
         self._vector_processor.delete_by_ids(ids)
+        RetrievalCache.bump_dataset_version(self._dataset.id)
 
     def delete_by_metadata_field(self, key: str, value: str) -> None:
         self._vector_processor.delete_by_metadata_field(key, value)
+        RetrievalCache.bump_dataset_version(self._dataset.id)
 
     def search_by_vector(self, query: str, **kwargs: Any) -> list[Document]:
         query_vector = self._embeddings.embed_query(query)
@@ -181,6 +186,7 @@ class Vector:
 
     def delete(self) -> None:
         self._vector_processor.delete()
+        RetrievalCache.bump_dataset_version(self._dataset.id)
         # delete collection redis cache
         if self._vector_processor.collection_name:
             collection_exist_cache_key = "vector_indexing_{}".format(self._vector_processor.collection_name)
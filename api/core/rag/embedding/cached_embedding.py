@@ -1,5 +1,6 @@
 import base64
 import logging
+from contextvars import ContextVar
 from typing import Any, Optional, cast
 
 import numpy as np
@@ -18,6 +19,11 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# query embeddings computed during the current retrieval, shared by the datasets using the same embedding model
+shared_query_embeddings: ContextVar[Optional[dict[str, list[float]]]] = ContextVar(
+    "shared_query_embeddings", default=None
+)
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
@@ -102,9 +108,18 @@ class CacheEmbedding(Embeddings):
 
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
         hash = helper.generate_text_hash(text)
         embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+        shared_embeddings = shared_query_embeddings.get()
+        if shared_embeddings is None:
+            return self._embed_query(text, embedding_cache_key)
+
+        if embedding_cache_key not in shared_embeddings:
+            shared_embeddings[embedding_cache_key] = self._embed_query(text, embedding_cache_key)
+        return shared_embeddings[embedding_cache_key]
+
+    def _embed_query(self, text: str, embedding_cache_key: str) -> list[float]:
+        # use doc embedding cache or store if not exists
         embedding = redis_client.get(embedding_cache_key)
         if embedding:
             redis_client.expire(embedding_cache_key, 600)
@@ -1,6 +1,8 @@
 """Abstract interface for document loader implementations."""
 
 import csv
+from collections.abc import Iterator
+from itertools import islice
 from typing import Optional
 
 import pandas as pd
@@ -9,6 +11,8 @@ from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.extractor.helpers import detect_file_encodings
 from core.rag.models.document import Document
 
+CSV_READ_CHUNK_SIZE = 10000
+
 
 class CSVExtractor(BaseExtractor):
     """Load CSV files.
@@ -35,44 +39,43 @@ class CSVExtractor(BaseExtractor):
 
     def extract(self) -> list[Document]:
         """Load data into document objects."""
-        docs = []
+        return list(self.extract_iter())
+
+    def extract_iter(self) -> Iterator[Document]:
+        """Load data into document objects row by row, reading the file in chunks."""
+        yielded = 0
         try:
             with open(self._file_path, newline="", encoding=self._encoding) as csvfile:
-                docs = self._read_from_file(csvfile)
+                for doc in self._read_from_file(csvfile):
+                    yield doc
+                    yielded += 1
         except UnicodeDecodeError as e:
             if self._autodetect_encoding:
                 detected_encodings = detect_file_encodings(self._file_path)
                 for encoding in detected_encodings:
                     try:
                         with open(self._file_path, newline="", encoding=encoding.encoding) as csvfile:
-                            docs = self._read_from_file(csvfile)
+                            # rows decoded before the error were already yielded
+                            yield from islice(self._read_from_file(csvfile), yielded, None)
                         break
                     except UnicodeDecodeError:
                         continue
             else:
                 raise RuntimeError(f"Error loading {self._file_path}") from e
 
-        return docs
-
-    def _read_from_file(self, csvfile) -> list[Document]:
-        docs = []
+    def _read_from_file(self, csvfile) -> Iterator[Document]:
         try:
-            # load csv file into pandas dataframe
-            df = pd.read_csv(csvfile, on_bad_lines="skip", **self.csv_args)
+            # load csv file into pandas dataframes of CSV_READ_CHUNK_SIZE rows
+            for df in pd.read_csv(csvfile, on_bad_lines="skip", chunksize=CSV_READ_CHUNK_SIZE, **self.csv_args):
+                # check source column exists
+                if self.source_column and self.source_column not in df.columns:
+                    raise ValueError(f"Source column '{self.source_column}' not found in CSV file.")
 
-            # check source column exists
-            if self.source_column and self.source_column not in df.columns:
-                raise ValueError(f"Source column '{self.source_column}' not found in CSV file.")
-
-            # create document objects
-
-            for i, row in df.iterrows():
-                content = ";".join(f"{col.strip()}: {str(row[col]).strip()}" for col in df.columns)
-                source = row[self.source_column] if self.source_column else ""
-                metadata = {"source": source, "row": i}
-                doc = Document(page_content=content, metadata=metadata)
-                docs.append(doc)
+                # create document objects
+                for i, row in df.iterrows():
+                    content = ";".join(f"{col.strip()}: {str(row[col]).strip()}" for col in df.columns)
+                    source = row[self.source_column] if self.source_column else ""
+                    metadata = {"source": source, "row": i}
+                    yield Document(page_content=content, metadata=metadata)
         except csv.Error as e:
             raise e
-
-        return docs
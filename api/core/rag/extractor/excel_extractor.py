@@ -1,14 +1,26 @@
 """Abstract interface for document loader implementations."""
 
 import os
-from typing import Optional, cast
+import posixpath
+import zipfile
+from collections.abc import Iterator
+from typing import Optional
 
 import pandas as pd
 from openpyxl import load_workbook  # type: ignore
+from openpyxl.utils.cell import range_boundaries  # type: ignore
+from openpyxl.xml.constants import PKG_REL_NS, REL_NS, SHEET_MAIN_NS  # type: ignore
+from openpyxl.xml.functions import fromstring, iterparse  # type: ignore
 
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
 
+_HYPERLINK_TAG = f"{{{SHEET_MAIN_NS}}}hyperlink"
+_SHEET_TAG = f"{{{SHEET_MAIN_NS}}}sheet"
+_RELATIONSHIP_TAG = f"{{{PKG_REL_NS}}}Relationship"
+_RELATIONSHIP_ID = f"{{{REL_NS}}}id"
+_OFFICE_DOCUMENT_TYPE = f"{REL_NS}/officeDocument"
+
 
 class ExcelExtractor(BaseExtractor):
     """Load Excel files.
@@ -26,37 +38,47 @@ class ExcelExtractor(BaseExtractor):
 
     def extract(self) -> list[Document]:
         """Load from Excel file in xls or xlsx format using Pandas and openpyxl."""
-        documents = []
+        return list(self.extract_iter())
+
+    def extract_iter(self) -> Iterator[Document]:
+        """Load from Excel file row by row."""
         file_extension = os.path.splitext(self._file_path)[-1].lower()
 
         if file_extension == ".xlsx":
-            wb = load_workbook(self._file_path, data_only=True)
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                data = sheet.values
-                try:
-                    cols = next(data)
-                except StopIteration:
-                    continue
-                df = pd.DataFrame(data, columns=cols)
+            # read only workbooks stream the rows of a sheet instead of loading all its cells
+            wb = load_workbook(self._file_path, read_only=True, data_only=True)
+            archive = zipfile.ZipFile(self._file_path)
+            try:
+                sheet_paths = self._read_sheet_paths(archive)
+                for sheet_name in wb.sheetnames:
+                    sheet = wb[sheet_name]
+                    # the dimensions recorded in the file may be wrong, read the rows until the end of the sheet
+                    sheet.reset_dimensions()
+                    sheet_path = sheet_paths.get(sheet_name)
+                    hyperlinks = self._read_hyperlinks(archive, sheet_path) if sheet_path else {}
+                    cols: Optional[tuple] = None
+                    for row_number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                        if all(pd.isna(v) for v in row):
+                            continue
+                        if cols is None:
+                            cols = row
+                            continue
 
-                df.dropna(how="all", inplace=True)
-
-                for index, row in df.iterrows():
-                    page_content = []
-                    for col_index, (k, v) in enumerate(row.items()):
-                        if pd.notna(v):
-                            cell = sheet.cell(
-                                row=cast(int, index) + 2, column=col_index + 1
-                            )  # +2 to account for header and 1-based index
-                            if cell.hyperlink:
-                                value = f"[{v}]({cell.hyperlink.target})"
+                        page_content = []
+                        for col_index, v in enumerate(row):
+                            if pd.isna(v):
+                                continue
+                            k = cols[col_index] if col_index < len(cols) else None
+                            target = hyperlinks.get((row_number, col_index + 1))
+                            if target:
+                                value = f"[{v}]({target})"
                                 page_content.append(f'"{k}":"{value}"')
                             else:
                                 page_content.append(f'"{k}":"{v}"')
-                    documents.append(
-                        Document(page_content=";".join(page_content), metadata={"source": self._file_path})
-                    )
+                        yield Document(page_content=";".join(page_content), metadata={"source": self._file_path})
+            finally:
+                archive.close()
+                wb.close()
 
         elif file_extension == ".xls":
             excel_file = pd.ExcelFile(self._file_path, engine="xlrd")
@@ -69,10 +91,63 @@ class ExcelExtractor(BaseExtractor):
                     for k, v in row.items():
                         if pd.notna(v):
                             page_content.append(f'"{k}":"{v}"')
-                    documents.append(
-                        Document(page_content=";".join(page_content), metadata={"source": self._file_path})
-                    )
+                    yield Document(page_content=";".join(page_content), metadata={"source": self._file_path})
         else:
             raise ValueError(f"Unsupported file extension: {file_extension}")
 
-        return documents
+    @staticmethod
+    def _read_relationships(archive: zipfile.ZipFile, part_path: str) -> list[tuple[str, str, str]]:
+        """
+        (id, type, target path) of the relationships of a part of the package, internal targets are resolved
+        relative to the part, external ones are kept as is.
+        """
+        part_dir, part_name = posixpath.split(part_path)
+        rels_path = posixpath.join(part_dir, "_rels", f"{part_name}.rels")
+        if rels_path not in archive.namelist():
+            return []
+        relationships = []
+        for element in fromstring(archive.read(rels_path)).iter(_RELATIONSHIP_TAG):
+            target = element.get("Target", "")
+            if element.get("TargetMode") != "External":
+                target = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join(part_dir, target))
+            relationships.append((element.get("Id"), element.get("Type"), target))
+        return relationships
+
+    @classmethod
+    def _read_sheet_paths(cls, archive: zipfile.ZipFile) -> dict[str, str]:
+        """
+        Paths of the worksheets in the package by sheet name.
+        """
+        workbook_path = next(
+            (target for _, type_, target in cls._read_relationships(archive, "") if type_ == _OFFICE_DOCUMENT_TYPE),
+            None,
+        )
+        if workbook_path is None:
+            return {}
+        targets = {id_: target for id_, _, target in cls._read_relationships(archive, workbook_path)}
+        return {
+            element.get("name"): targets[element.get(_RELATIONSHIP_ID)]
+            for element in fromstring(archive.read(workbook_path)).iter(_SHEET_TAG)
+            if element.get(_RELATIONSHIP_ID) in targets
+        }
+
+    @classmethod
+    def _read_hyperlinks(cls, archive: zipfile.ZipFile, sheet_path: str) -> dict[tuple[int, int], str]:
+        """
+        Hyperlink targets by row and column of a sheet, read only worksheets do not load them.
+        """
+        rels = {id_: target for id_, _, target in cls._read_relationships(archive, sheet_path)}
+        if not rels:
+            return {}
+
+        hyperlinks = {}
+        with archive.open(sheet_path) as src:
+            for _, element in iterparse(src):
+                if element.tag == _HYPERLINK_TAG and rels.get(element.get(_RELATIONSHIP_ID)):
+                    min_col, min_row, max_col, max_row = range_boundaries(element.get("ref"))
+                    for row in range(min_row, max_row + 1):
+                        for col in range(min_col, max_col + 1):
+                            hyperlinks[(row, col)] = rels[element.get(_RELATIONSHIP_ID)]
+                # the hyperlinks follow the cells, the cells are dropped once parsed
+                element.clear()
+        return hyperlinks
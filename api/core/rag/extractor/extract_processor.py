@@ -1,5 +1,6 @@
 import re
 import tempfile
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Optional, Union
 from urllib.parse import unquote
@@ -90,6 +91,16 @@ class ExtractProcessor:
     def extract(
         cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
     ) -> list[Document]:
+        return list(cls.extract_iter(extract_setting, is_automatic, file_path))
+
+    @classmethod
+    def extract_iter(
+        cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
+    ) -> Iterator[Document]:
+        """
+        Extract documents incrementally, so large files are not held in memory as a whole
+        where the extractor supports it (e.g. PDF pages, CSV and Excel rows).
+        """
         if extract_setting.datasource_type == DatasourceType.FILE.value:
             with tempfile.TemporaryDirectory() as temp_dir:
                 if not file_path:
@@ -158,7 +169,7 @@ class ExtractProcessor:
                     else:
                         # txt
                         extractor = TextExtractor(file_path, autodetect_encoding=True)
-                return extractor.extract()
+                yield from extractor.extract_iter()
         elif extract_setting.datasource_type == DatasourceType.NOTION.value:
             assert extract_setting.notion_info is not None, "notion_info is required"
             extractor = NotionExtractor(
@@ -168,7 +179,7 @@ class ExtractProcessor:
                 document_model=extract_setting.notion_info.document,
                 tenant_id=extract_setting.notion_info.tenant_id,
             )
-            return extractor.extract()
+            yield from extractor.extract_iter()
         elif extract_setting.datasource_type == DatasourceType.WEBSITE.value:
             assert extract_setting.website_info is not None, "website_info is required"
             if extract_setting.website_info.provider == "firecrawl":
@@ -179,7 +190,7 @@ class ExtractProcessor:
                     mode=extract_setting.website_info.mode,
                     only_main_content=extract_setting.website_info.only_main_content,
                 )
-                return extractor.extract()
+                yield from extractor.extract_iter()
             elif extract_setting.website_info.provider == "jinareader":
                 extractor = JinaReaderWebExtractor(
                     url=extract_setting.website_info.url,
@@ -188,7 +199,7 @@ class ExtractProcessor:
                     mode=extract_setting.website_info.mode,
                     only_main_content=extract_setting.website_info.only_main_content,
                 )
-                return extractor.extract()
+                yield from extractor.extract_iter()
             else:
                 raise ValueError(f"Unsupported website provider: {extract_setting.website_info.provider}")
         else:
@@ -1,6 +1,7 @@
 """Abstract interface for document loader implementations."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
 
 class BaseExtractor(ABC):
@@ -9,3 +10,10 @@ class BaseExtractor(ABC):
     @abstractmethod
     def extract(self):
         raise NotImplementedError
+
+    def extract_iter(self) -> Iterator:
+        """
+        Extract documents incrementally, for example page by page or row by row.
+        Extractors which cannot stream their source yield the result of `extract`.
+        """
+        yield from self.extract()
@@ -43,6 +43,13 @@ class PdfExtractor(BaseExtractor):
 
         return documents
 
+    def extract_iter(self) -> Iterator[Document]:
+        if self._file_cache_key:
+            # the plaintext cache is written from the whole text
+            yield from self.extract()
+        else:
+            yield from self.load()
+
     def load(
         self,
     ) -> Iterator[Document]:
@@ -1,10 +1,12 @@
+import logging
 import math
-import threading
 from collections import Counter
+from functools import partial
 from typing import Any, Optional, cast
 
 from flask import Flask, current_app
 
+from configs import dify_config
 from core.app.app_config.entities import DatasetEntity, DatasetRetrieveConfigEntity
 from core.app.entities.app_invoke_entities import InvokeFrom, ModelConfigWithCredentialsEntity
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
@@ -23,6 +25,8 @@ from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.entities.context_entities import DocumentContext
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
+from core.rag.retrieval.federated_retrieval import merge_top_k, select_rerank_candidates, share_query_embedding
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
@@ -34,6 +38,8 @@ from models.dataset import Dataset, DatasetQuery, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -324,6 +330,7 @@ class DatasetRetrieval:
                             reranking_model=reranking_model,
                             reranking_mode=retrieval_model_config.get("reranking_mode", "reranking_model"),
                             weights=retrieval_model_config.get("weights", None),
+                            app_id=app_id,
                         )
                 self._on_query(query, [dataset_id], app_id, user_from, user_id)
 
@@ -351,7 +358,6 @@ class DatasetRetrieval:
     ):
         if not available_datasets:
             return []
-        threads = []
         all_documents: list[Document] = []
         dataset_ids = [dataset.id for dataset in available_datasets]
         index_type_check = all(
@@ -385,25 +391,36 @@ class DatasetRetrieval:
                     ].embedding_model_provider
                     weights["vector_setting"]["embedding_model_name"] = available_datasets[0].embedding_model
 
-        for dataset in available_datasets:
+        flask_app = current_app._get_current_object()  # type: ignore
+        # results are kept per dataset for the federated merge
+        dataset_documents: list[list[Document]] = [[] for _ in available_datasets]
+        tasks = []
+        for dataset, documents in zip(available_datasets, dataset_documents):
             index_type = dataset.indexing_technique
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset.id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                },
+            tasks.append(
+                partial(
+                    self._retriever,
+                    flask_app=flask_app,
+                    dataset_id=dataset.id,
+                    query=query,
+                    top_k=top_k,
+                    all_documents=documents,
+                    app_id=app_id,
+                )
             )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+        with share_query_embedding(available_datasets, query):
+            for result in RetrievalExecutor.run(tasks, return_exceptions=True):
+                # a failing dataset does not fail the whole retrieval
+                if isinstance(result, Exception):
+                    logger.error("Dataset retrieval failed", exc_info=result)
+        all_documents = [document for documents in dataset_documents for document in documents]
 
         with measure_time() as timer:
             if reranking_enable:
+                candidate_limit = top_k * dify_config.RETRIEVAL_RERANK_CANDIDATE_FACTOR
+                if candidate_limit and len(all_documents) > candidate_limit:
+                    all_documents = select_rerank_candidates(dataset_documents, candidate_limit)
+
                 # do rerank for searched documents
                 data_post_processor = DataPostProcessor(tenant_id, reranking_mode, reranking_model, weights, False)
 
@@ -414,7 +431,7 @@ class DatasetRetrieval:
                 if index_type == "economy":
                     all_documents = self.calculate_keyword_score(query, all_documents, top_k)
                 elif index_type == "high_quality":
-                    all_documents = self.calculate_vector_score(all_documents, top_k, score_threshold)
+                    all_documents = merge_top_k(dataset_documents, top_k, score_threshold)
 
         self._on_query(query, dataset_ids, app_id, user_from, user_id)
 
@@ -475,7 +492,15 @@ class DatasetRetrieval:
             db.session.add_all(dataset_queries)
         db.session.commit()
 
-    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list):
+    def _retriever(
+        self,
+        flask_app: Flask,
+        dataset_id: str,
+        query: str,
+        top_k: int,
+        all_documents: list,
+        app_id: Optional[str] = None,
+    ):
         with flask_app.app_context():
             dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
 
@@ -508,7 +533,11 @@ class DatasetRetrieval:
                 if dataset.indexing_technique == "economy":
                     # use keyword table query
                     documents = RetrievalService.retrieve(
-                        retrieval_method="keyword_search", dataset_id=dataset.id, query=query, top_k=top_k
+                        retrieval_method="keyword_search",
+                        dataset_id=dataset.id,
+                        query=query,
+                        top_k=top_k,
+                        app_id=app_id,
                     )
                     if documents:
                         all_documents.extend(documents)
@@ -528,6 +557,7 @@ class DatasetRetrieval:
                             else None,
                             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                             weights=retrieval_model.get("weights", None),
+                            app_id=app_id,
                         )
 
                         all_documents.extend(documents)
@@ -540,6 +570,7 @@ class DatasetRetrieval:
         return_resource: bool,
         invoke_from: InvokeFrom,
         hit_callback: DatasetIndexToolCallbackHandler,
+        app_id: Optional[str] = None,
     ) -> Optional[list[DatasetRetrieverBaseTool]]:
         """
         A dataset tool is a tool that can be used to retrieve information from a dataset
@@ -549,6 +580,7 @@ class DatasetRetrieval:
         :param return_resource: return resource
         :param invoke_from: invoke from
         :param hit_callback: hit callback
+        :param app_id: app id, enables the retrieval result cache
         """
         tools = []
         available_datasets = []
@@ -595,6 +627,7 @@ class DatasetRetrieval:
                     hit_callbacks=[hit_callback],
                     return_resource=return_resource,
                     retriever_from=invoke_from.to_source(),
+                    app_id=app_id,
                 )
 
                 tools.append(tool)
@@ -610,6 +643,7 @@ class DatasetRetrieval:
                     retriever_from=invoke_from.to_source(),
                     reranking_provider_name=retrieve_config.reranking_model.get("reranking_provider_name"),
                     reranking_model_name=retrieve_config.reranking_model.get("reranking_model_name"),
+                    app_id=app_id,
                 )
 
                 tools.append(tool)
@@ -694,18 +728,3 @@ class DatasetRetrieval:
                 document.metadata["score"] = score
         documents = sorted(documents, key=lambda x: x.metadata.get("score", 0) if x.metadata else 0, reverse=True)
         return documents[:top_k] if top_k else documents
-
-    def calculate_vector_score(
-        self, all_documents: list[Document], top_k: int, score_threshold: float
-    ) -> list[Document]:
-        filter_documents = []
-        for document in all_documents:
-            if score_threshold is None or (document.metadata and document.metadata.get("score", 0) >= score_threshold):
-                filter_documents.append(document)
-
-        if not filter_documents:
-            return []
-        filter_documents = sorted(
-            filter_documents, key=lambda x: x.metadata.get("score", 0) if x.metadata else 0, reverse=True
-        )
-        return filter_documents[:top_k] if top_k else filter_documents
@@ -0,0 +1,93 @@
+import heapq
+import logging
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from itertools import islice, takewhile
+from operator import itemgetter
+from typing import Optional
+
+from core.model_manager import ModelManager
+from core.model_runtime.entities.model_entities import ModelType
+from core.rag.embedding.cached_embedding import CacheEmbedding, shared_query_embeddings
+from core.rag.models.document import Document
+from models.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+def _score(document: Document) -> float:
+    return document.metadata.get("score", 0) if document.metadata else 0
+
+
+@contextmanager
+def share_query_embedding(datasets: Sequence[Dataset], query: str) -> Generator[None, None, None]:
+    """
+    Embed the query once per embedding model shared by several datasets.
+    The vectors are published through a context variable, which the retrieval executor propagates to its tasks,
+    so the dataset searches reuse them instead of each calling the embedding model.
+    """
+    embedding_models: dict[tuple[str, str, str], int] = {}
+    for dataset in datasets:
+        if dataset.provider == "external" or dataset.indexing_technique != "high_quality":
+            continue
+        key = (dataset.tenant_id, dataset.embedding_model_provider, dataset.embedding_model)
+        embedding_models[key] = embedding_models.get(key, 0) + 1
+
+    token = shared_query_embeddings.set({})
+    try:
+        for (tenant_id, provider, model), dataset_count in embedding_models.items():
+            if dataset_count < 2:
+                continue
+            try:
+                model_instance = ModelManager().get_model_instance(
+                    tenant_id=tenant_id, provider=provider, model_type=ModelType.TEXT_EMBEDDING, model=model
+                )
+                CacheEmbedding(model_instance).embed_query(query)
+            except Exception:
+                # every dataset search embeds the query again and reports the error itself
+                logger.exception(f"Failed to embed the query with {provider}/{model}")
+        yield
+    finally:
+        shared_query_embeddings.reset(token)
+
+
+def merge_top_k(
+    dataset_documents: Sequence[list[Document]], top_k: int, score_threshold: Optional[float] = None
+) -> list[Document]:
+    """
+    Merge the results of several datasets into the overall top k with a k-way heap merge.
+    Each list is sorted by score, datasets whose best score is below the threshold are skipped and the merge
+    stops at the first document below the threshold or once top_k documents were taken.
+    """
+    sorted_lists = []
+    for documents in dataset_documents:
+        if not documents:
+            continue
+        documents = sorted(documents, key=_score, reverse=True)
+        if score_threshold is not None and _score(documents[0]) < score_threshold:
+            continue
+        sorted_lists.append(documents)
+
+    merged = heapq.merge(*sorted_lists, key=_score, reverse=True)
+    if score_threshold is not None:
+        # the merged stream is sorted, nothing after the first document below the threshold can qualify
+        merged = takewhile(lambda document: _score(document) >= score_threshold, merged)
+    return list(islice(merged, top_k) if top_k else merged)
+
+
+def select_rerank_candidates(dataset_documents: Sequence[list[Document]], limit: int) -> list[Document]:
+    """
+    Keep the best `limit` documents across datasets before reranking.
+    Scores of different datasets are not comparable (vector, full text or keyword search, own rerank), so each
+    dataset's scores are normalized by its best score before the merge.
+    """
+    normalized_lists = []
+    for documents in dataset_documents:
+        if not documents:
+            continue
+        documents = sorted(documents, key=_score, reverse=True)
+        best_score = _score(documents[0]) or 1
+        normalized_lists.append([(_score(document) / best_score, document) for document in documents])
+
+    merged = heapq.merge(*normalized_lists, key=itemgetter(0), reverse=True)
+    return [document for _, document in islice(merged, limit)]
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCacheMetrics(BaseModel):
+    hits: int
+    misses: int
+    stores: int
+    # results not cached because their serialized size exceeds RETRIEVAL_CACHE_MAX_ENTRY_SIZE
+    oversized: int
+    errors: int
+
+
+class RetrievalCache:
+    """
+    Cache of RetrievalService results in Redis, keyed by dataset id, dataset content version, retrieval config
+    hash and normalized query.
+
+    The content version of a dataset is bumped whenever its index changes (documents or segments added, enabled,
+    disabled or deleted), which makes every cached result of the dataset unreachable at once; the entries left
+    behind expire with RETRIEVAL_CACHE_TTL. Redis errors never fail a retrieval, they count as misses.
+    """
+
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _stores = 0
+    _oversized = 0
+    _errors = 0
+    _metrics_logger: Optional[threading.Thread] = None
+
+    @staticmethod
+    def is_enabled(app_id: Optional[str]) -> bool:
+        """
+        Results are only cached for retrievals of an app, hit testing always searches the index.
+        """
+        if not dify_config.RETRIEVAL_CACHE_ENABLED or not app_id:
+            return False
+        return app_id not in dify_config.RETRIEVAL_CACHE_DISABLED_APP_IDS_SET
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Questions differing only by case, unicode form or whitespace share a cache entry.
+        """
+        return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+    @staticmethod
+    def _dataset_version_key(dataset_id: str) -> str:
+        return f"dataset_content_version:{dataset_id}"
+
+    @classmethod
+    def bump_dataset_version(cls, dataset_id: str) -> None:
+        """
+        Invalidate the cached results of a dataset, called after any change of its documents, segments or index.
+        """
+        try:
+            redis_client.incr(cls._dataset_version_key(dataset_id))
+        except Exception:
+            logger.exception(f"Failed to bump the content version of dataset {dataset_id}")
+
+    @classmethod
+    def get_key(cls, dataset_id: str, query: str, retrieval_config: dict[str, Any]) -> Optional[str]:
+        """
+        Cache key of a retrieval, must be computed before searching the index, so results of a search racing with
+        an index change are stored under the outdated version and never served.
+        :return: None if the content version can not be read
+        """
+        try:
+            version = redis_client.get(cls._dataset_version_key(dataset_id))
+        except Exception:
+            logger.exception(f"Failed to get the content version of dataset {dataset_id}")
+            with cls._lock:
+                cls._errors += 1
+            return None
+
+        config_hash = hashlib.sha256(
+            json.dumps(retrieval_config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        query_hash = hashlib.sha256(cls.normalize_query(query).encode("utf-8")).hexdigest()
+        return f"retrieval_cache:{dataset_id}:{int(version or 0)}:{config_hash}:{query_hash}"
+
+    @classmethod
+    def get(cls, key: str) -> Optional[list[Document]]:
+        cls._start_metrics_logger()
+        try:
+            cached = redis_client.get(key)
+            documents = [Document(**document) for document in json.loads(cached)] if cached is not None else None
+        except Exception:
+            logger.exception("Failed to get cached retrieval results")
+            documents = None
+            with cls._lock:
+                cls._errors += 1
+
+        with cls._lock:
+            if documents is None:
+                cls._misses += 1
+            else:
+                cls._hits += 1
+        return documents
+
+    @classmethod
+    def set(cls, key: str, documents: list[Document]) -> None:
+        try:
+            # vectors are not needed once the search is done and would make up most of the entry
+            value = json.dumps(
+                [
+                    document.model_dump(exclude={"vector": True, "children": {"__all__": {"vector"}}})
+                    for document in documents
+                ]
+            )
+            if len(value) > dify_config.RETRIEVAL_CACHE_MAX_ENTRY_SIZE:
+                with cls._lock:
+                    cls._oversized += 1
+                return
+            redis_client.setex(key, dify_config.RETRIEVAL_CACHE_TTL, value)
+        except Exception:
+            logger.exception("Failed to cache retrieval results")
+            with cls._lock:
+                cls._errors += 1
+            return
+
+        with cls._lock:
+            cls._stores += 1
+
+    @classmethod
+    def metrics(cls) -> RetrievalCacheMetrics:
+        with cls._lock:
+            return RetrievalCacheMetrics(
+                hits=cls._hits,
+                misses=cls._misses,
+                stores=cls._stores,
+                oversized=cls._oversized,
+                errors=cls._errors,
+            )
+
+    @classmethod
+    def _start_metrics_logger(cls) -> None:
+        if not dify_config.RETRIEVAL_CACHE_METRICS_LOG_INTERVAL or cls._metrics_logger is not None:
+            return
+        with cls._lock:
+            if cls._metrics_logger is None:
+                cls._metrics_logger = threading.Thread(
+                    target=cls._log_metrics,
+                    args=(dify_config.RETRIEVAL_CACHE_METRICS_LOG_INTERVAL,),
+                    name="retrieval_cache_metrics",
+                    daemon=True,
+                )
+                cls._metrics_logger.start()
+
+    @classmethod
+    def _log_metrics(cls, interval: float) -> None:
+        """
+        Log the metrics every `interval` seconds while the cache is used, with the hit ratio of the interval
+        """
+        last = cls.metrics()
+        while True:
+            time.sleep(interval)
+            metrics = cls.metrics()
+            lookups = metrics.hits + metrics.misses - last.hits - last.misses
+            if lookups:
+                hit_ratio = (metrics.hits - last.hits) / lookups
+                logger.info(f"retrieval cache metrics: {metrics.model_dump()}, hit ratio {hit_ratio:.2f}")
+            last = metrics
@@ -0,0 +1,240 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+# set in the context of the tasks running on the pool, a fan-out started by one of them runs inline
+_on_retrieval_worker: contextvars.ContextVar[bool] = contextvars.ContextVar("on_retrieval_worker", default=False)
+# deadline of the enclosing fan-out, inherited by the fan-outs its tasks start
+_fan_out_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("fan_out_deadline", default=None)
+
+
+class RetrievalTimeoutError(ValueError):
+    pass
+
+
+class RetrievalExecutorMetrics(BaseModel):
+    # tasks submitted to the pool and not started yet
+    queue_depth: int
+    # tasks running on the pool
+    active: int
+    submitted: int
+    # tasks run by the waiting thread instead of a worker: taken back from the queue, or started on a worker
+    run_inline: int
+    timed_out: int
+
+
+class RetrievalExecutor:
+    """
+    Bounded thread pool shared by every retrieval fan-out of the process: the searches of RetrievalService and
+    the per dataset retrievals of multi dataset retrieval.
+
+    A fan-out never uses more than RETRIEVAL_MAX_CONCURRENCY_PER_REQUEST threads, including its own. Without a
+    deadline the request thread runs the tasks still queued itself while waiting, so a saturated pool degrades to
+    sequential retrieval. A fan-out started by a task already running on the pool (a dataset retrieval starting
+    its searches) runs its tasks inline on that worker, so workers never wait for tasks queued behind them and
+    nested fan-outs can not deadlock the pool. Nested fan-outs share the deadline of the outermost one.
+    Tasks run in a copy of the caller's context variables; tasks touching the database still push their own
+    Flask app context, so each of them gets its own session.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    _queue_depth = 0
+    _active = 0
+    _submitted = 0
+    _run_inline = 0
+    _timed_out = 0
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.RETRIEVAL_EXECUTOR_MAX_WORKERS, thread_name_prefix="retrieval"
+                    )
+        return cls._executor
+
+    @classmethod
+    def metrics(cls) -> RetrievalExecutorMetrics:
+        with cls._lock:
+            return RetrievalExecutorMetrics(
+                queue_depth=cls._queue_depth,
+                active=cls._active,
+                submitted=cls._submitted,
+                run_inline=cls._run_inline,
+                timed_out=cls._timed_out,
+            )
+
+    @classmethod
+    def run(
+        cls,
+        tasks: Sequence[Callable[[], Any]],
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """
+        Run tasks concurrently and wait for all of them
+        :param tasks: callables without arguments
+        :param timeout: seconds to wait for the whole fan-out, defaults to RETRIEVAL_TIMEOUT, 0 waits forever.
+            Tasks not started when it expires are cancelled and RetrievalTimeoutError is raised. A nested fan-out
+            never waits longer than the remaining time of the enclosing one.
+        :param return_exceptions: return the exception raised by a task as its result instead of raising it
+        :return: results in the order of the tasks
+        """
+        outer_deadline = _fan_out_deadline.get()
+        if timeout is None:
+            timeout = 0 if outer_deadline is not None else dify_config.RETRIEVAL_TIMEOUT
+        deadline = time.monotonic() + timeout if timeout else None
+        if outer_deadline is not None:
+            deadline = outer_deadline if deadline is None else min(deadline, outer_deadline)
+
+        token = _fan_out_deadline.set(deadline)
+        try:
+            if _on_retrieval_worker.get():
+                return cls._run_on_worker(tasks, deadline, return_exceptions)
+            return cls._run_on_pool(tasks, deadline, return_exceptions)
+        finally:
+            _fan_out_deadline.reset(token)
+
+    @classmethod
+    def _run_on_worker(
+        cls, tasks: Sequence[Callable[[], Any]], deadline: Optional[float], return_exceptions: bool
+    ) -> list[Any]:
+        """
+        Run the tasks of a fan-out started on a worker one by one, on that worker
+        """
+        results: list[Any] = []
+        for task in tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                with cls._lock:
+                    cls._timed_out += 1
+                raise RetrievalTimeoutError("Retrieval timed out")
+            with cls._lock:
+                cls._run_inline += 1
+            try:
+                results.append(task())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    @classmethod
+    def _run_on_pool(
+        cls, tasks: Sequence[Callable[[], Any]], deadline: Optional[float], return_exceptions: bool
+    ) -> list[Any]:
+        results: list[Any] = [None] * len(tasks)
+        errors: dict[int, BaseException] = {}
+        pending = deque(range(len(tasks)))
+        running: dict[Future, int] = {}
+        # without a deadline the request thread takes its share of the tasks, with one it only waits, so the
+        # deadline is not delayed by a task it can not interrupt
+        inline_slots = 0 if deadline is not None else 1
+        pool_slots = max(dify_config.RETRIEVAL_MAX_CONCURRENCY_PER_REQUEST - inline_slots, 1)
+
+        def run_inline(index: int) -> None:
+            try:
+                results[index] = tasks[index]()
+            except Exception as e:
+                errors[index] = e
+
+        def collect(done: set[Future]) -> None:
+            for future in done:
+                index = running.pop(future)
+                exception = future.exception()
+                if exception is not None:
+                    errors[index] = exception
+                else:
+                    results[index] = future.result()
+
+        try:
+            while pending or running:
+                # free the slots of the finished tasks before refilling the pool, otherwise the request thread
+                # would run all the remaining tasks itself
+                if running:
+                    collect(wait(running, timeout=0).done)
+
+                while len(pending) > inline_slots and len(running) < pool_slots:
+                    index = pending.popleft()
+                    running[cls._submit(tasks[index])] = index
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise RetrievalTimeoutError("Retrieval timed out")
+
+                if pending and inline_slots:
+                    run_inline(pending.popleft())
+                    continue
+
+                if inline_slots:
+                    # take back a task the pool did not start yet instead of waiting for a free worker
+                    taken_back = next((future for future in running if future.cancel()), None)
+                    if taken_back is not None:
+                        cls._on_taken_back()
+                        run_inline(running.pop(taken_back))
+                        continue
+
+                if not running:
+                    continue
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise RetrievalTimeoutError("Retrieval timed out")
+                collect(done)
+        except RetrievalTimeoutError:
+            with cls._lock:
+                cls._timed_out += 1
+            for future in running:
+                if future.cancel():
+                    cls._on_taken_back(run=False)
+            raise
+
+        if errors and not return_exceptions:
+            raise errors[min(errors)]
+        for index, error in errors.items():
+            results[index] = error
+        return results
+
+    @classmethod
+    def _submit(cls, task: Callable[[], Any]) -> Future:
+        context = contextvars.copy_context()
+
+        def run_on_worker():
+            _on_retrieval_worker.set(True)
+            return task()
+
+        def run_task():
+            with cls._lock:
+                cls._queue_depth -= 1
+                cls._active += 1
+            try:
+                return context.run(run_on_worker)
+            finally:
+                with cls._lock:
+                    cls._active -= 1
+
+        with cls._lock:
+            cls._queue_depth += 1
+            cls._submitted += 1
+            queue_depth = cls._queue_depth
+        if queue_depth > dify_config.RETRIEVAL_EXECUTOR_MAX_WORKERS:
+            logger.debug(f"Retrieval executor saturated, {queue_depth} tasks waiting for a worker")
+        return cls._get_executor().submit(run_task)
+
+    @classmethod
+    def _on_taken_back(cls, run: bool = True) -> None:
+        with cls._lock:
+            cls._queue_depth -= 1
+            if run:
+                cls._run_inline += 1
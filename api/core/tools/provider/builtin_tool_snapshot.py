@@ -0,0 +1,199 @@
+from os import path
+from typing import Any, ClassVar, Optional
+
+from pydantic import PrivateAttr
+
+from core.helper.module_import_helper import load_single_subclass_from_source
+from core.helper.source_snapshot import get_source_fingerprint, load_source_snapshot, write_source_snapshot
+from core.tools.entities.tool_entities import ToolParameter
+from core.tools.provider.builtin_tool_provider import BuiltinToolProviderController
+from core.tools.provider.tool_provider import ToolProviderController
+from core.tools.tool.builtin_tool import BuiltinTool
+from core.tools.tool.tool import Tool
+
+BUILTIN_PROVIDERS_PATH = path.join(path.dirname(path.realpath(__file__)), "builtin")
+SNAPSHOT_PATH = path.join(BUILTIN_PROVIDERS_PATH, "_snapshot.json")
+
+
+def _load_provider_class(provider: str) -> type[BuiltinToolProviderController]:
+    return load_single_subclass_from_source(
+        module_name=f"core.tools.provider.builtin.{provider}.{provider}",
+        script_path=path.join(BUILTIN_PROVIDERS_PATH, provider, f"{provider}.py"),
+        parent_type=BuiltinToolProviderController,
+    )
+
+
+def _load_tool_class(provider: str, tool_module: str) -> type[BuiltinTool]:
+    return load_single_subclass_from_source(
+        module_name=f"core.tools.provider.builtin.{provider}.tools.{tool_module}",
+        script_path=path.join(BUILTIN_PROVIDERS_PATH, provider, "tools", f"{tool_module}.py"),
+        parent_type=BuiltinTool,
+    )
+
+
+class SnapshotBuiltinTool(BuiltinTool):
+    """
+    Builtin tool loaded from the snapshot, it describes the tool without importing its module.
+    ToolManager resolves the tool class before running it.
+    """
+
+    _provider: str = PrivateAttr(default="")
+    _tool_module: str = PrivateAttr(default="")
+    _dynamic_parameters: bool = PrivateAttr(default=False)
+
+    def resolve(self) -> BuiltinTool:
+        """
+        Instance of the tool class, importing its module
+        """
+        return SnapshotBuiltinToolProviderController.get_tool_class(self._provider, self._tool_module)(
+            identity=self.identity.model_copy() if self.identity else None,
+            parameters=self.parameters.copy() if self.parameters else None,
+            description=self.description.model_copy() if self.description else None,
+            runtime=self.runtime,
+            variables=self.variables,
+        )
+
+    def fork_tool_runtime(self, runtime: dict[str, Any]) -> "Tool":
+        tool = super().fork_tool_runtime(runtime)
+        tool._provider, tool._tool_module, tool._dynamic_parameters = (  # type: ignore[attr-defined]
+            self._provider,
+            self._tool_module,
+            self._dynamic_parameters,
+        )
+        return tool
+
+    def get_runtime_parameters(self) -> list[ToolParameter]:
+        if self._dynamic_parameters:
+            return self.resolve().get_runtime_parameters()
+        return super().get_runtime_parameters()
+
+    def _invoke(self, user_id: str, tool_parameters: dict[str, Any]):
+        return self.resolve()._invoke(user_id, tool_parameters)
+
+
+class SnapshotBuiltinToolProviderController(BuiltinToolProviderController):
+    """
+    Builtin tool provider loaded from the snapshot written at build time by `build_snapshot`.
+    The identities, credentials and tools come from the snapshot, the modules of the provider and of a tool are
+    only imported when credentials are validated or the tool runs.
+    """
+
+    _provider: str = PrivateAttr(default="")
+    _tool_snapshots: list[dict[str, Any]] = PrivateAttr(default_factory=list)
+
+    _classes: ClassVar[dict[tuple[str, str], type]] = {}
+
+    def __init__(self, provider: str, tool_snapshots: list[dict[str, Any]], **data: Any) -> None:
+        # skip the yaml loading of BuiltinToolProviderController
+        ToolProviderController.__init__(self, **data)
+        self._provider = provider
+        self._tool_snapshots = tool_snapshots
+
+    @classmethod
+    def get_provider_class(cls, provider: str) -> type[BuiltinToolProviderController]:
+        key = (provider, "")
+        if key not in cls._classes:
+            cls._classes[key] = _load_provider_class(provider)
+        return cls._classes[key]
+
+    @classmethod
+    def get_tool_class(cls, provider: str, tool_module: str) -> type[BuiltinTool]:
+        key = (provider, tool_module)
+        if key not in cls._classes:
+            cls._classes[key] = _load_tool_class(provider, tool_module)
+        return cls._classes[key]
+
+    def _get_builtin_tools(self) -> list[Tool]:
+        if self.tools:
+            return self.tools
+
+        tools: list[Tool] = []
+        for tool_snapshot in self._tool_snapshots:
+            tool = SnapshotBuiltinTool(**tool_snapshot["tool"])
+            tool._provider = self._provider
+            tool._tool_module = tool_snapshot["module"]
+            tool._dynamic_parameters = tool_snapshot["dynamic_parameters"]
+            tools.append(tool)
+        self.tools = tools
+        return tools
+
+    def get_tool(self, tool_name: str) -> Optional[Tool]:
+        tool = super().get_tool(tool_name)
+        if isinstance(tool, SnapshotBuiltinTool):
+            return tool.resolve()
+        return tool
+
+    def _validate_credentials(self, credentials: dict[str, Any]) -> None:
+        provider_class = self.get_provider_class(self._provider)
+        provider_class.model_construct(
+            identity=self.identity, credentials_schema=self.credentials_schema
+        )._validate_credentials(credentials)
+
+
+def get_fingerprint() -> str:
+    """
+    Fingerprint of the sources of the builtin providers, a snapshot of other sources is ignored
+    """
+    return get_source_fingerprint(BUILTIN_PROVIDERS_PATH)
+
+
+def build_snapshot(providers: list[BuiltinToolProviderController]) -> dict[str, Any]:
+    """
+    Snapshot of the loaded builtin providers
+    """
+    snapshot_providers = []
+    for provider_controller in providers:
+        if provider_controller.identity is None:
+            continue
+        tools = []
+        for tool in provider_controller.get_tools() or []:
+            tools.append(
+                {
+                    "module": type(tool).__module__.rsplit(".", 1)[-1],
+                    "dynamic_parameters": type(tool).get_runtime_parameters is not Tool.get_runtime_parameters,
+                    "tool": tool.model_dump(mode="json", include={"identity", "parameters", "description"}),
+                }
+            )
+        snapshot_providers.append(
+            {
+                "provider": type(provider_controller).__module__.rsplit(".", 1)[-1],
+                "identity": provider_controller.identity.model_dump(mode="json"),
+                "credentials_schema": {
+                    name: credential.model_dump(mode="json")
+                    for name, credential in provider_controller.credentials_schema.items()
+                }
+                if provider_controller.credentials_schema is not None
+                else None,
+                "tools": tools,
+            }
+        )
+    return {"fingerprint": get_fingerprint(), "providers": snapshot_providers}
+
+
+def write_snapshot(providers: list[BuiltinToolProviderController]) -> None:
+    write_source_snapshot(SNAPSHOT_PATH, build_snapshot(providers))
+
+
+def _parse_providers(providers: list[dict[str, Any]]) -> list[SnapshotBuiltinToolProviderController]:
+    return [
+        SnapshotBuiltinToolProviderController(
+            provider=provider["provider"],
+            tool_snapshots=provider["tools"],
+            identity=provider["identity"],
+            credentials_schema=provider["credentials_schema"],
+        )
+        for provider in providers
+    ]
+
+
+def load_snapshot() -> Optional[list[SnapshotBuiltinToolProviderController]]:
+    """
+    :return: None if there is no snapshot or it does not match the sources
+    """
+    return load_source_snapshot(
+        SNAPSHOT_PATH,
+        get_fingerprint,
+        _parse_providers,
+        name="builtin tool provider",
+        command="build-builtin-tool-snapshot",
+    )
@@ -1,4 +1,5 @@
-import threading
+import logging
+from functools import partial
 from typing import Any
 
 from flask import Flask, current_app
@@ -10,11 +11,14 @@ from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.models.document import Document as RagDocument
 from core.rag.rerank.rerank_model import RerankModelRunner
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -45,23 +49,23 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
         )
 
     def _run(self, query: str) -> str:
-        threads = []
         all_documents: list[RagDocument] = []
-        for dataset_id in self.dataset_ids:
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "all_documents": all_documents,
-                    "hit_callbacks": self.hit_callbacks,
-                },
+        flask_app = current_app._get_current_object()  # type: ignore
+        tasks = [
+            partial(
+                self._retriever,
+                flask_app=flask_app,
+                dataset_id=dataset_id,
+                query=query,
+                all_documents=all_documents,
+                hit_callbacks=self.hit_callbacks,
             )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+            for dataset_id in self.dataset_ids
+        ]
+        for result in RetrievalExecutor.run(tasks, return_exceptions=True):
+            # a failing dataset does not fail the whole retrieval
+            if isinstance(result, Exception):
+                logger.error("Dataset retrieval failed", exc_info=result)
         # do rerank for searched documents
         model_manager = ModelManager()
         rerank_model_instance = model_manager.get_model_instance(
@@ -172,6 +176,7 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                     dataset_id=dataset.id,
                     query=query,
                     top_k=retrieval_model.get("top_k") or 2,
+                    app_id=self.app_id,
                 )
                 if documents:
                     all_documents.extend(documents)
@@ -191,6 +196,7 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                         else None,
                         reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                         weights=retrieval_model.get("weights", None),
+                        app_id=self.app_id,
                     )
 
                     all_documents.extend(documents)
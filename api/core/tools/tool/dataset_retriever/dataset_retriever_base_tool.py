@@ -18,6 +18,8 @@ class DatasetRetrieverBaseTool(BaseModel, ABC):
     hit_callbacks: list[DatasetIndexToolCallbackHandler] = []
     return_resource: bool
     retriever_from: str
+    # app the retrieval runs for, its results are cached unless the app opted out
+    app_id: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     @abstractmethod
@@ -27,6 +27,7 @@ class DatasetRetrieverTool(Tool):
         return_resource: bool,
         invoke_from: InvokeFrom,
         hit_callback: DatasetIndexToolCallbackHandler,
+        app_id: Optional[str] = None,
     ) -> list["DatasetRetrieverTool"]:
         """
         get dataset tool
@@ -50,6 +51,7 @@ class DatasetRetrieverTool(Tool):
             return_resource=return_resource,
             invoke_from=invoke_from,
             hit_callback=hit_callback,
+            app_id=app_id,
         )
         if retrieval_tools is None:
             return []
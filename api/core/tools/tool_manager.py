@@ -16,6 +16,7 @@ from core.tools.entities.api_entities import UserToolProvider, UserToolProviderT
 from core.tools.entities.common_entities import I18nObject
 from core.tools.entities.tool_entities import ApiProviderAuthType, ToolInvokeFrom, ToolParameter
 from core.tools.errors import ToolNotFoundError, ToolProviderNotFoundError
+from core.tools.provider import builtin_tool_snapshot
 from core.tools.provider.api_tool_provider import ApiToolProviderController
 from core.tools.provider.builtin._positions import BuiltinToolProviderSort
 from core.tools.provider.builtin_tool_provider import BuiltinToolProviderController
@@ -382,6 +383,23 @@ class ToolManager:
         """
         list all the builtin providers
         """
+        if dify_config.BUILTIN_TOOL_SNAPSHOT_ENABLED:
+            snapshot_providers = builtin_tool_snapshot.load_snapshot()
+            if snapshot_providers is not None:
+                for provider_controller in snapshot_providers:
+                    cls._add_builtin_provider(provider_controller)
+                    yield provider_controller
+                # set builtin providers loaded
+                cls._builtin_providers_loaded = True
+                return
+
+        yield from cls._scan_builtin_providers()
+
+    @classmethod
+    def _scan_builtin_providers(cls) -> Generator[BuiltinToolProviderController, None, None]:
+        """
+        import the modules of all the builtin providers and tools
+        """
         for provider in listdir(path.join(path.dirname(path.realpath(__file__)), "provider", "builtin")):
             if provider.startswith("__"):
                 continue
@@ -402,11 +420,7 @@ class ToolManager:
                     provider_controller: BuiltinToolProviderController = provider_class()
                     if provider_controller.identity is None:
                         continue
-                    cls._builtin_providers[provider_controller.identity.name] = provider_controller
-                    for tool in provider_controller.get_tools() or []:
-                        if tool.identity is None:
-                            continue
-                        cls._builtin_tools_labels[tool.identity.name] = tool.identity.label
+                    cls._add_builtin_provider(provider_controller)
                     yield provider_controller
 
                 except Exception as e:
@@ -415,6 +429,27 @@ class ToolManager:
         # set builtin providers loaded
         cls._builtin_providers_loaded = True
 
+    @classmethod
+    def _add_builtin_provider(cls, provider_controller: BuiltinToolProviderController) -> None:
+        if provider_controller.identity is None:
+            return
+        cls._builtin_providers[provider_controller.identity.name] = provider_controller
+        for tool in provider_controller.get_tools() or []:
+            if tool.identity is None:
+                continue
+            cls._builtin_tools_labels[tool.identity.name] = tool.identity.label
+
+    @classmethod
+    def write_builtin_providers_snapshot(cls) -> int:
+        """
+        write the snapshot of the builtin providers loaded by BUILTIN_TOOL_SNAPSHOT_ENABLED
+
+        :return: number of providers in the snapshot
+        """
+        providers = list(cls._scan_builtin_providers())
+        builtin_tool_snapshot.write_snapshot(providers)
+        return len(providers)
+
     @classmethod
     def load_builtin_providers_cache(cls):
         for _ in cls.list_builtin_providers():
@@ -1,9 +1,9 @@
 import re
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from typing import Any, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.file import File, FileAttribute, file_manager
 from core.variables import Segment, SegmentGroup, Variable
@@ -43,6 +43,14 @@ class VariablePool(BaseModel):
         description="Conversation variables.",
         default_factory=list,
     )
+    parent: Optional["VariablePool"] = Field(
+        description="Pool the variables not written to this pool are read from, set on child pools",
+        default=None,
+        exclude=True,
+    )
+    # variables removed from a child pool, hiding the ones of its parent
+    _removed_node_ids: set[str] = PrivateAttr(default_factory=set)
+    _removed_keys: set[tuple[str, int]] = PrivateAttr(default_factory=set)
 
     def __init__(
         self,
@@ -75,6 +83,22 @@ class VariablePool(BaseModel):
         for var in self.conversation_variables:
             self.add((CONVERSATION_VARIABLE_NODE_ID, var.name), var)
 
+    def create_child(self) -> "VariablePool":
+        """
+        Create a copy-on-write child pool, used by parallel iterations.
+
+        The child reads through to this pool and only stores its own writes and removals, so creating it costs
+        the same whatever the size of this pool. Segments are immutable and shared with this pool.
+        """
+        return VariablePool.model_construct(
+            variable_dictionary=defaultdict(dict),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+            parent=self,
+        )
+
     def add(self, selector: Sequence[str], value: Any, /) -> None:
         """
         Adds a variable to the variable pool.
@@ -123,7 +147,7 @@ class VariablePool(BaseModel):
             return None
 
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self._get_variable(selector[0], hash_key)
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
@@ -139,6 +163,17 @@ class VariablePool(BaseModel):
 
         return value
 
+    def _get_variable(self, node_id: str, hash_key: int) -> Segment | None:
+        pool: Optional[VariablePool] = self
+        while pool is not None:
+            node_variables = pool.variable_dictionary.get(node_id)
+            if node_variables and hash_key in node_variables:
+                return node_variables[hash_key]
+            if node_id in pool._removed_node_ids or (node_id, hash_key) in pool._removed_keys:
+                return None
+            pool = pool.parent
+        return None
+
     def remove(self, selector: Sequence[str], /):
         """
         Remove variables from the variable pool based on the given selector.
@@ -153,9 +188,13 @@ class VariablePool(BaseModel):
             return
         if len(selector) == 1:
             self.variable_dictionary[selector[0]] = {}
+            if self.parent is not None:
+                self._removed_node_ids.add(selector[0])
             return
         hash_key = hash(tuple(selector[1:]))
         self.variable_dictionary[selector[0]].pop(hash_key, None)
+        if self.parent is not None:
+            self._removed_keys.add((selector[0], hash_key))
 
     def convert_template(self, template: str, /):
         parts = VARIABLE_PATTERN.split(template)
@@ -103,6 +103,14 @@ class NodeRunRetryEvent(NodeRunStartedEvent):
     start_at: datetime = Field(..., description="retry start time")
 
 
+class NodeRunRetryBackoffEvent(GraphEngineEvent):
+    """
+    Asks the engine to resume the node after the backoff of a retry, it never leaves the engine
+    """
+
+    delay: float = Field(..., description="seconds to wait before the retry")
+
+
 ###########################################
 # Parallel Branch Events
 ###########################################
@@ -1,5 +1,8 @@
+import hashlib
+import json
+import threading
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from collections.abc import Mapping
 from typing import Any, Optional, cast
 
@@ -204,6 +207,23 @@ class Graph(BaseModel):
 
         return graph
 
+    @classmethod
+    def init_cached(
+        cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None, workflow_id: Optional[str] = None
+    ) -> "Graph":
+        """
+        Init graph, reusing the graph compiled for an earlier run of the same graph config.
+        The graph returned is shared by concurrent runs and must not be modified.
+
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :param workflow_id: workflow id
+        :return: graph
+        """
+        return CompiledGraphCache.get_or_init(
+            graph_config=graph_config, root_node_id=root_node_id, workflow_id=workflow_id
+        )
+
     def add_extra_edge(
         self, source_node_id: str, target_node_id: str, run_condition: Optional[RunCondition] = None
     ) -> None:
@@ -719,3 +739,40 @@ class Graph(BaseModel):
                 return True
 
         return False
+
+
+class CompiledGraphCache:
+    """
+    Process level LRU of compiled graphs, keyed by workflow id, graph config hash and root node id.
+
+    Compiling a graph parses the edges, discovers the parallels and validates them, the cost grows quickly with
+    the number of branches, while hashing the graph config is linear in its size. A graph config that changes,
+    such as a draft being edited, gets a new key. Graphs failing to compile are not cached.
+    """
+
+    _graphs: OrderedDict[tuple[Optional[str], str, Optional[str]], Graph] = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_or_init(
+        cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None, workflow_id: Optional[str] = None
+    ) -> Graph:
+        capacity = dify_config.WORKFLOW_GRAPH_CACHE_SIZE
+        if not capacity:
+            return Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+
+        graph_hash = hashlib.sha256(json.dumps(graph_config, default=str).encode("utf-8")).hexdigest()
+        key = (workflow_id, graph_hash, root_node_id)
+        with cls._lock:
+            graph = cls._graphs.get(key)
+            if graph is not None:
+                cls._graphs.move_to_end(key)
+                return graph
+
+        # compiled outside of the lock, concurrent first runs of a graph may both compile it
+        graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        with cls._lock:
+            cls._graphs[key] = graph
+            while len(cls._graphs) > capacity:
+                cls._graphs.popitem(last=False)
+        return graph
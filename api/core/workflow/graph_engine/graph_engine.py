@@ -4,7 +4,7 @@ import time
 import uuid
 from collections.abc import Generator, Mapping
 from concurrent.futures import ThreadPoolExecutor, wait
-from copy import copy, deepcopy
+from copy import copy
 from datetime import UTC, datetime
 from typing import Any, Optional, cast
 
@@ -26,6 +26,7 @@ from core.workflow.graph_engine.entities.event import (
     NodeRunExceptionEvent,
     NodeRunFailedEvent,
     NodeRunRetrieverResourceEvent,
+    NodeRunRetryBackoffEvent,
     NodeRunRetryEvent,
     NodeRunStartedEvent,
     NodeRunStreamChunkEvent,
@@ -38,6 +39,8 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.retry_scheduler import RetryScheduler
+from core.workflow.graph_engine.workflow_executor import WorkflowExecutor
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.answer.answer_stream_processor import AnswerStreamProcessor
 from core.workflow.nodes.answer.base_stream_processor import StreamProcessor
@@ -62,13 +65,24 @@ class GraphEngineThreadPool(ThreadPoolExecutor):
         initializer=None,
         initargs=(),
         max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        tenant_id: Optional[str] = None,
+        app_id: Optional[str] = None,
+        interactive: bool = True,
     ) -> None:
         super().__init__(max_workers, thread_name_prefix, initializer, initargs)
         self.max_submit_count = max_submit_count
         self.submit_count = 0
+        # scheduling keys of the WorkflowExecutor
+        self.tenant_id = tenant_id
+        self.app_id = app_id
+        self.interactive = interactive
 
     def submit(self, fn, /, *args, **kwargs):
         self.submit_count += 1
+        if dify_config.WORKFLOW_EXECUTOR_ENABLED:
+            # the tasks run in the process-wide executor, over its limits they wait instead of failing
+            return WorkflowExecutor.get_instance().submit(self, fn, *args, **kwargs)
+
         self.check_is_full()
 
         return super().submit(fn, *args, **kwargs)
@@ -100,6 +114,7 @@ class GraphEngine:
         max_execution_steps: int,
         max_execution_time: int,
         thread_pool_id: Optional[str] = None,
+        interactive: bool = True,
     ) -> None:
         thread_pool_max_submit_count = dify_config.MAX_SUBMIT_COUNT
         thread_pool_max_workers = 10
@@ -114,7 +129,11 @@ class GraphEngine:
             self.is_main_thread_pool = False
         else:
             self.thread_pool = GraphEngineThreadPool(
-                max_workers=thread_pool_max_workers, max_submit_count=thread_pool_max_submit_count
+                max_workers=thread_pool_max_workers,
+                max_submit_count=thread_pool_max_submit_count,
+                tenant_id=tenant_id,
+                app_id=app_id,
+                interactive=interactive,
             )
             self.thread_pool_id = str(uuid.uuid4())
             self.is_main_thread_pool = True
@@ -156,7 +175,9 @@ class GraphEngine:
 
             # run graph
             generator = stream_processor.process(
-                self._run(start_node_id=self.graph.root_node_id, handle_exceptions=handle_exceptions)
+                self._wait_retry_backoffs(
+                    self._run(start_node_id=self.graph.root_node_id, handle_exceptions=handle_exceptions)
+                )
             )
             for item in generator:
                 try:
@@ -212,6 +233,19 @@ class GraphEngine:
             self._release_thread()
             raise e
 
+    @staticmethod
+    def _wait_retry_backoffs(
+        generator: Generator[GraphEngineEvent, None, None],
+    ) -> Generator[GraphEngineEvent, None, None]:
+        """
+        Wait for the retry backoffs of the nodes run by the calling thread, which is not a worker of the pool
+        """
+        for item in generator:
+            if isinstance(item, NodeRunRetryBackoffEvent):
+                time.sleep(item.delay)
+                continue
+            yield item
+
     def _release_thread(self):
         if self.is_main_thread_pool and self.thread_pool_id in GraphEngine.workflow_thread_pool_mapping:
             del GraphEngine.workflow_thread_pool_mapping[self.thread_pool_id]
@@ -530,27 +564,64 @@ class GraphEngine:
         """
         Run parallel nodes
         """
-        with flask_app.app_context():
-            try:
-                q.put(
-                    ParallelBranchRunStartedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                    )
-                )
+        q.put(
+            ParallelBranchRunStartedEvent(
+                parallel_id=parallel_id,
+                parallel_start_node_id=parallel_start_node_id,
+                parent_parallel_id=parent_parallel_id,
+                parent_parallel_start_node_id=parent_parallel_start_node_id,
+            )
+        )
 
-                # run node
-                generator = self._run(
-                    start_node_id=parallel_start_node_id,
-                    in_parallel_id=parallel_id,
-                    parent_parallel_id=parent_parallel_id,
-                    parent_parallel_start_node_id=parent_parallel_start_node_id,
-                    handle_exceptions=handle_exceptions,
-                )
+        # run node
+        generator = self._run(
+            start_node_id=parallel_start_node_id,
+            in_parallel_id=parallel_id,
+            parent_parallel_id=parent_parallel_id,
+            parent_parallel_start_node_id=parent_parallel_start_node_id,
+            handle_exceptions=handle_exceptions,
+        )
+        self._resume_parallel_node(
+            flask_app=flask_app,
+            q=q,
+            generator=generator,
+            parallel_id=parallel_id,
+            parallel_start_node_id=parallel_start_node_id,
+            parent_parallel_id=parent_parallel_id,
+            parent_parallel_start_node_id=parent_parallel_start_node_id,
+        )
 
+    def _resume_parallel_node(
+        self,
+        flask_app: Flask,
+        q: queue.Queue,
+        generator: Generator[GraphEngineEvent, None, None],
+        parallel_id: str,
+        parallel_start_node_id: str,
+        parent_parallel_id: Optional[str] = None,
+        parent_parallel_start_node_id: Optional[str] = None,
+    ) -> None:
+        """
+        Run a parallel branch until it ends or waits for the backoff of a node retry.
+        During a backoff the worker is released, the branch is submitted to the thread pool again once it is over.
+        """
+        with flask_app.app_context():
+            try:
                 for item in generator:
+                    if isinstance(item, NodeRunRetryBackoffEvent):
+                        RetryScheduler.schedule(
+                            item.delay,
+                            self._submit_parallel_node,
+                            flask_app=flask_app,
+                            q=q,
+                            generator=generator,
+                            parallel_id=parallel_id,
+                            parallel_start_node_id=parallel_start_node_id,
+                            parent_parallel_id=parent_parallel_id,
+                            parent_parallel_start_node_id=parent_parallel_start_node_id,
+                        )
+                        return
+
                     q.put(item)
 
                 # trigger graph run success event
@@ -586,6 +657,22 @@ class GraphEngine:
             finally:
                 db.session.remove()
 
+    def _submit_parallel_node(self, q: queue.Queue, **kwargs) -> None:
+        try:
+            future = self.thread_pool.submit(self._resume_parallel_node, q=q, **kwargs)
+            future.add_done_callback(self.thread_pool.task_done_callback)
+        except Exception as e:
+            logger.exception("Failed to resume a parallel branch after a retry backoff")
+            q.put(
+                ParallelBranchRunFailedEvent(
+                    parallel_id=kwargs["parallel_id"],
+                    parallel_start_node_id=kwargs["parallel_start_node_id"],
+                    parent_parallel_id=kwargs["parent_parallel_id"],
+                    parent_parallel_start_node_id=kwargs["parent_parallel_start_node_id"],
+                    error=str(e),
+                )
+            )
+
     def _run_node(
         self,
         node_instance: BaseNode[BaseNodeData],
@@ -615,7 +702,6 @@ class GraphEngine:
 
         db.session.close()
         max_retries = node_instance.node_data.retry_config.max_retries
-        retry_interval = node_instance.node_data.retry_config.retry_interval_seconds
         retries = 0
         should_continue_retry = True
         while should_continue_retry and retries <= max_retries:
@@ -662,7 +748,10 @@ class GraphEngine:
                                         retry_index=retries,
                                         start_at=retry_start_at,
                                     )
-                                    time.sleep(retry_interval)
+                                    # a branch running in the thread pool gives its worker back during the backoff
+                                    yield NodeRunRetryBackoffEvent(
+                                        delay=node_instance.node_data.retry_config.get_retry_interval_seconds(retries)
+                                    )
                                     continue
                             route_node_state.set_finished(run_result=run_result)
 
@@ -848,11 +937,11 @@ class GraphEngine:
     def create_copy(self):
         """
         create a graph engine copy
-        :return: with a new variable pool instance of graph engine
+        :return: with a copy-on-write child of the variable pool of graph engine
         """
         new_instance = copy(self)
         new_instance.graph_runtime_state = copy(self.graph_runtime_state)
-        new_instance.graph_runtime_state.variable_pool = deepcopy(self.graph_runtime_state.variable_pool)
+        new_instance.graph_runtime_state.variable_pool = self.graph_runtime_state.variable_pool.create_child()
         return new_instance
 
     def _handle_continue_on_error(
@@ -0,0 +1,52 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RetryScheduler:
+    """
+    Process-wide delayed queue resuming the parallel branches of workflows after the backoff of a node retry.
+
+    A branch waiting to retry a node gives its worker back to the workflow thread pool, a single timer thread
+    calls the scheduled callback when the backoff is over, which submits the branch to the pool again.
+    """
+
+    # (due time, sequence, callback)
+    _queue: list[tuple[float, int, Callable[[], Any]]] = []
+    _sequence = itertools.count()
+    _condition = threading.Condition()
+    _timer: Optional[threading.Thread] = None
+
+    @classmethod
+    def schedule(cls, delay: float, callback: Callable[..., Any], *args, **kwargs) -> None:
+        """
+        Call `callback` from the timer thread after `delay` seconds, in the current context
+        """
+        context = contextvars.copy_context()
+        due_at = time.monotonic() + max(delay, 0)
+        with cls._condition:
+            heapq.heappush(cls._queue, (due_at, next(cls._sequence), lambda: context.run(callback, *args, **kwargs)))
+            if cls._timer is None:
+                cls._timer = threading.Thread(target=cls._run, name="workflow_retry_scheduler", daemon=True)
+                cls._timer.start()
+            cls._condition.notify()
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            with cls._condition:
+                while not cls._queue or cls._queue[0][0] > time.monotonic():
+                    cls._condition.wait(timeout=cls._queue[0][0] - time.monotonic() if cls._queue else None)
+                _, _, callback = heapq.heappop(cls._queue)
+
+            try:
+                callback()
+            except Exception:
+                logger.exception("Failed to resume a workflow branch after a retry backoff")
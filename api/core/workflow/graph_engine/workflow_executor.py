@@ -0,0 +1,268 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Optional
+
+from configs import dify_config
+from core.errors.error import AppInvokeQuotaExceededError
+
+if TYPE_CHECKING:
+    from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+
+logger = logging.getLogger(__name__)
+
+# set in the threads of the executor, and copied with the context by the retry scheduler
+_in_executor: contextvars.ContextVar[bool] = contextvars.ContextVar("workflow_executor_worker", default=False)
+
+
+class WorkflowExecutorQueueFullError(AppInvokeQuotaExceededError):
+    """Raised when a workflow run is not admitted because the queue of the workflow executor is full"""
+
+
+class _Task:
+    __slots__ = ("flow", "fn", "args", "kwargs", "future", "nested", "enqueued_at")
+
+    def __init__(self, flow: "_Flow", fn: Callable, args: tuple, kwargs: dict, nested: bool) -> None:
+        self.flow = flow
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.nested = nested
+        self.enqueued_at = time.monotonic()
+
+
+class _Flow:
+    """
+    Node of the scheduling tree. The children with queued tasks are served in proportion to their weight
+    (stride scheduling), a node with a limit runs at most `limit` tasks of its subtree at once.
+    """
+
+    def __init__(
+        self, parent: Optional["_Flow"], key: Hashable, weight: float = 1.0, limit: Optional[int] = None
+    ) -> None:
+        self.parent = parent
+        self.key = key
+        self.weight = weight
+        self.limit = limit
+        self.pass_value = 0.0
+        # pass value of the child served last, a new child starts from it instead of catching up
+        self.virtual_time = 0.0
+        self.children: dict[Hashable, _Flow] = {}
+        self.tasks: deque[_Task] = deque()
+        self.queued = 0
+        self.running = 0
+        # nested tasks of a run waiting for its capacity, they are not in `tasks`
+        self.nested_queued = 0
+
+    def child(self, key: Hashable, weight: float = 1.0, limit: Optional[int] = None) -> "_Flow":
+        child = self.children.get(key)
+        if child is None:
+            child = _Flow(self, key, weight, limit)
+            child.pass_value = self.virtual_time
+            self.children[key] = child
+        return child
+
+    def has_capacity(self) -> bool:
+        return self.limit is None or self.running < self.limit
+
+
+class WorkflowExecutor:
+    """
+    Process-wide bounded pool running the parallel branches and parallel iterations of all workflow runs.
+
+    Queued tasks are picked by weighted fair queuing over the tree: priority class -> tenant -> app -> run.
+    Interactive (streaming) runs are served WORKFLOW_EXECUTOR_INTERACTIVE_WEIGHT times as often as batch runs,
+    tenants, apps of a tenant and runs of an app get equal shares. Each tenant runs at most MAX_SUBMIT_COUNT tasks
+    at once and each run at most the max_workers of its pool, further tasks wait in the queue.
+
+    A task submitted from a task of the executor is run as soon as its run has capacity, on an extra thread if
+    all workers are busy: its parent is blocked waiting for it, queuing it behind the limits could deadlock.
+    """
+
+    _instance: Optional["WorkflowExecutor"] = None
+    _instance_lock = threading.Lock()
+
+    WAIT_TIME_SMOOTHING = 0.1
+
+    def __init__(self, max_workers: int, tenant_max_concurrency: int, interactive_weight: float) -> None:
+        self._max_workers = max_workers
+        self._tenant_max_concurrency = tenant_max_concurrency
+        self._interactive_weight = interactive_weight
+        self._root = _Flow(None, None, limit=max_workers)
+        self._nested: deque[_Task] = deque()
+        self._condition = threading.Condition()
+        self._workers = 0
+        self._idle_workers = 0
+        self._wait_time = 0.0
+
+    @classmethod
+    def get_instance(cls) -> "WorkflowExecutor":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_workers=dify_config.WORKFLOW_EXECUTOR_MAX_WORKERS,
+                        tenant_max_concurrency=dify_config.MAX_SUBMIT_COUNT,
+                        interactive_weight=dify_config.WORKFLOW_EXECUTOR_INTERACTIVE_WEIGHT,
+                    )
+                    if dify_config.WORKFLOW_EXECUTOR_STATS_LOG_INTERVAL:
+                        threading.Thread(
+                            target=cls._instance._log_stats,
+                            args=(dify_config.WORKFLOW_EXECUTOR_STATS_LOG_INTERVAL,),
+                            name="workflow_executor_stats",
+                            daemon=True,
+                        ).start()
+        return cls._instance
+
+    def submit(self, pool: "GraphEngineThreadPool", fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Queue a task of the run owning `pool`
+        """
+        with self._condition:
+            interactive = "interactive" if pool.interactive else "batch"
+            flow = (
+                self._root.child(interactive, weight=self._interactive_weight if pool.interactive else 1.0)
+                .child(pool.tenant_id, limit=self._tenant_max_concurrency)
+                .child(pool.app_id)
+                .child(pool, limit=pool._max_workers)
+            )
+            task = _Task(flow, fn, args, kwargs, nested=_in_executor.get())
+            if task.nested:
+                flow.nested_queued += 1
+                self._nested.append(task)
+            else:
+                flow.tasks.append(task)
+                node: Optional[_Flow] = flow
+                while node is not None:
+                    node.queued += 1
+                    node = node.parent
+
+            if self._idle_workers == 0 and (self._workers < self._max_workers or task.nested):
+                self._workers += 1
+                threading.Thread(target=self._work, name=f"workflow_executor_{self._workers}", daemon=True).start()
+            else:
+                self._condition.notify()
+        return task.future
+
+    def check_admission(self, max_queue_size: int) -> None:
+        """
+        :raises WorkflowExecutorQueueFullError: if `max_queue_size` tasks or more are waiting
+        """
+        if max_queue_size and self._root.queued >= max_queue_size:
+            raise WorkflowExecutorQueueFullError(
+                f"Workflow executor queue is full ({self._root.queued} tasks waiting for about"
+                f" {self._wait_time:.1f}s), please try again later."
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Queue depth per priority class, number of running tasks and smoothed queue wait time in seconds
+        """
+        with self._condition:
+            return {
+                "workers": self._workers,
+                "running": self._root.running,
+                "queued": self._root.queued,
+                "queued_interactive": self._root.children["interactive"].queued
+                if "interactive" in self._root.children
+                else 0,
+                "queued_batch": self._root.children["batch"].queued if "batch" in self._root.children else 0,
+                "wait_time": self._wait_time,
+            }
+
+    def _log_stats(self, interval: float) -> None:
+        """
+        Log the stats every `interval` seconds while the executor has running or queued tasks
+        """
+        while True:
+            time.sleep(interval)
+            stats = self.stats()
+            if stats["running"] or stats["queued"]:
+                logger.info(f"workflow executor stats: {stats}")
+
+    def _work(self) -> None:
+        _in_executor.set(True)
+        while True:
+            with self._condition:
+                self._idle_workers += 1
+                while (task := self._next_task()) is None:
+                    if self._workers > self._max_workers:
+                        # extra thread of a nested task
+                        self._idle_workers -= 1
+                        self._workers -= 1
+                        return
+                    self._condition.wait()
+                self._idle_workers -= 1
+
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn(*task.args, **task.kwargs))
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            finally:
+                self._release(task)
+
+    def _next_task(self) -> Optional[_Task]:
+        """
+        Pick the next task and count it as running, must be called with the condition held
+        """
+        for task in self._nested:
+            if task.flow.has_capacity():
+                self._nested.remove(task)
+                task.flow.nested_queued -= 1
+                break
+        else:
+            if not self._root.queued or not self._root.has_capacity():
+                return None
+            picked = self._pick(self._root)
+            if picked is None:
+                return None
+            task = picked
+            node: Optional[_Flow] = task.flow
+            while node is not None:
+                node.queued -= 1
+                node = node.parent
+
+        wait_time = time.monotonic() - task.enqueued_at
+        self._wait_time += (wait_time - self._wait_time) * self.WAIT_TIME_SMOOTHING
+        node = task.flow
+        while node is not None:
+            node.running += 1
+            node = node.parent
+        return task
+
+    def _pick(self, flow: _Flow) -> Optional[_Task]:
+        if flow.tasks:
+            return flow.tasks.popleft()
+        for child in sorted(flow.children.values(), key=lambda c: c.pass_value):
+            if not child.queued or not child.has_capacity():
+                continue
+            task = self._pick(child)
+            if task is not None:
+                flow.virtual_time = child.pass_value
+                child.pass_value += 1 / child.weight
+                return task
+        return None
+
+    def _release(self, task: _Task) -> None:
+        with self._condition:
+            node: Optional[_Flow] = task.flow
+            while node is not None:
+                node.running -= 1
+                parent = node.parent
+                if (
+                    parent is not None
+                    and not node.running
+                    and not node.queued
+                    and not node.nested_queued
+                    and not node.children
+                ):
+                    parent.children.pop(node.key, None)
+                node = parent
+            self._condition.notify()
@@ -1,4 +1,5 @@
 import json
+import random
 from abc import ABC
 from enum import StrEnum
 from typing import Any, Optional, Union
@@ -6,7 +7,7 @@ from typing import Any, Optional, Union
 from pydantic import BaseModel, model_validator
 
 from core.workflow.nodes.base.exc import DefaultValueTypeError
-from core.workflow.nodes.enums import ErrorStrategy
+from core.workflow.nodes.enums import ErrorStrategy, RetryBackoffStrategy
 
 
 class DefaultValueType(StrEnum):
@@ -113,11 +114,28 @@ class RetryConfig(BaseModel):
     max_retries: int = 0  # max retry times
     retry_interval: int = 0  # retry interval in milliseconds
     retry_enabled: bool = False  # whether retry is enabled
+    backoff_strategy: RetryBackoffStrategy = RetryBackoffStrategy.FIXED
+    max_retry_interval: int = 0  # upper bound of exponential retry intervals in milliseconds, 0 for none
+    jitter: bool = False  # wait a random interval between half and all of the computed one
 
     @property
     def retry_interval_seconds(self) -> float:
         return self.retry_interval / 1000
 
+    def get_retry_interval_seconds(self, retry_index: int) -> float:
+        """
+        Interval before a retry
+        :param retry_index: 1 for the first retry
+        """
+        interval = float(self.retry_interval)
+        if self.backoff_strategy == RetryBackoffStrategy.EXPONENTIAL:
+            interval *= 2 ** max(retry_index - 1, 0)
+            if self.max_retry_interval:
+                interval = min(interval, self.max_retry_interval)
+        if self.jitter:
+            interval = random.uniform(interval / 2, interval)
+        return interval / 1000
+
 
 class BaseNodeData(ABC, BaseModel):
     title: str
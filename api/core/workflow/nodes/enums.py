@@ -29,6 +29,11 @@ class ErrorStrategy(StrEnum):
     DEFAULT_VALUE = "default-value"
 
 
+class RetryBackoffStrategy(StrEnum):
+    FIXED = "fixed"
+    EXPONENTIAL = "exponential"
+
+
 class FailBranchSourceHandle(StrEnum):
     FAILED = "fail-branch"
     SUCCESS = "success-branch"
@@ -107,7 +107,9 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = Graph.init_cached(
+            graph_config=graph_config, root_node_id=root_node_id, workflow_id=self.workflow_id
+        )
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -167,7 +169,11 @@ class IterationNode(BaseNode[IterationNodeData]):
                 futures: list[Future] = []
                 q: Queue = Queue()
                 thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+                    max_workers=self.node_data.parallel_nums,
+                    max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+                    tenant_id=self.tenant_id,
+                    app_id=self.app_id,
+                    interactive=graph_engine.thread_pool.interactive,
                 )
                 for index, item in enumerate(iterator_list_value):
                     future: Future = thread_pool.submit(
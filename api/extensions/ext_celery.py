@@ -70,6 +70,7 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.update_tidb_serverless_status_task",
         "schedule.clean_messages",
         "schedule.mail_clean_document_notify_task",
+        "schedule.drop_expired_partitions_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -93,6 +94,10 @@ def init_app(app: DifyApp) -> Celery:
             "task": "schedule.clean_messages.clean_messages",
             "schedule": timedelta(days=day),
         },
+        "drop_expired_partitions_task": {
+            "task": "schedule.drop_expired_partitions_task.drop_expired_partitions_task",
+            "schedule": timedelta(days=day),
+        },
         # every Monday
         "mail_clean_document_notify_task": {
             "task": "schedule.mail_clean_document_notify_task.mail_clean_document_notify_task",
@@ -4,6 +4,8 @@ from dify_app import DifyApp
 def init_app(app: DifyApp):
     from commands import (
         add_qdrant_doc_id_index,
+        build_builtin_tool_snapshot,
+        build_model_provider_snapshot,
         convert_to_agent_apps,
         create_tenant,
         fix_app_site_missing,
@@ -24,6 +26,8 @@ def init_app(app: DifyApp):
         create_tenant,
         upgrade_db,
         fix_app_site_missing,
+        build_builtin_tool_snapshot,
+        build_model_provider_snapshot,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
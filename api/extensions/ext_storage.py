@@ -1,5 +1,5 @@
 import logging
-from collections.abc import Callable, Generator
+from collections.abc import Callable, Generator, Iterable
 from typing import Literal, Union, overload
 
 from flask import Flask
@@ -17,6 +17,15 @@ class Storage:
         storage_factory = self.get_storage_factory(dify_config.STORAGE_TYPE)
         with app.app_context():
             self.storage_runner = storage_factory()
+            if dify_config.STORAGE_LOCAL_CACHE_ENABLED:
+                from extensions.storage.cached_storage import CachedStorage
+
+                self.storage_runner = CachedStorage(
+                    self.storage_runner,
+                    cache_dir=dify_config.STORAGE_LOCAL_CACHE_PATH,
+                    max_size=dify_config.STORAGE_LOCAL_CACHE_MAX_SIZE,
+                    prefixes=dify_config.STORAGE_LOCAL_CACHE_PREFIXES.split(","),
+                )
 
     @staticmethod
     def get_storage_factory(storage_type: str) -> Callable[[], BaseStorage]:
@@ -79,6 +88,13 @@ class Storage:
             logger.exception(f"Failed to save file {filename}")
             raise e
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        try:
+            self.storage_runner.save_stream(filename, stream)
+        except Exception as e:
+            logger.exception(f"Failed to save_stream file {filename}")
+            raise e
+
     @overload
     def load(self, filename: str, /, *, stream: Literal[False] = False) -> bytes: ...
 
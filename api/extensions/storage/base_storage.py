@@ -1,7 +1,7 @@
 """Abstract interface for file storage implementations."""
 
 from abc import ABC, abstractmethod
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 
 class BaseStorage(ABC):
@@ -11,6 +11,13 @@ class BaseStorage(ABC):
     def save(self, filename, data):
         raise NotImplementedError
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        """
+        Save data fed chunk by chunk.
+        Storages without native streaming upload join the chunks and save them at once.
+        """
+        self.save(filename, b"".join(stream))
+
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
         raise NotImplementedError
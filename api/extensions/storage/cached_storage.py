@@ -0,0 +1,276 @@
+"""Read-through local disk cache for a remote storage."""
+
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Generator, Iterable
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from extensions.storage.base_storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK_SIZE = 64 * 1024
+_STALE_TMP_FILE_SECONDS = 3600
+_RESCAN_INTERVAL_SECONDS = 60
+
+
+class CachedStorage(BaseStorage):
+    """
+    Wrap a storage with a size-bounded local disk cache.
+
+    Objects whose key starts with one of `prefixes` are cached on read in `cache_dir`, named after the SHA-256
+    digest of their key, and evicted in least recently used order once `max_size` bytes are exceeded.
+    Files are written to a temporary file and renamed, so readers never see partial content. `save` writes the
+    new content through to the cache and `delete` drops it. The files are addressed by key, not by content, and
+    this invalidation only reaches the cache directory of this host: another host keeps serving its copy of an
+    object rewritten in place until it is evicted.
+
+    The cache directory may be shared by several processes. A file cached by another process is picked up on
+    lookup, a hit touches the file, and each process rescans the directory every _RESCAN_INTERVAL_SECONDS when it
+    adds files, so `max_size` bounds the files of all the processes, ordered by their modification time. The
+    directory may go over it by what the processes added since their last rescan. A file evicted by another
+    process is treated as a cache miss. The cache is best effort, a failure to write it never fails a read.
+    """
+
+    def __init__(self, storage: BaseStorage, *, cache_dir: str, max_size: int, prefixes: Iterable[str]):
+        super().__init__()
+        self.storage = storage
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.prefixes = tuple(prefix for prefix in prefixes if prefix)
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_entries()
+
+    def save(self, filename, data):
+        self._invalidate(filename)
+        self.storage.save(filename, data)
+        if not self._is_cacheable(filename):
+            return
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._put(filename, [data])
+
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        self._invalidate(filename)
+        self.storage.save_stream(filename, stream)
+
+    def load_once(self, filename: str) -> bytes:
+        cache_path = self._get(filename)
+        if cache_path:
+            try:
+                return Path(cache_path).read_bytes()
+            except FileNotFoundError:
+                self._forget(filename)
+
+        data = self.storage.load_once(filename)
+        if self._is_cacheable(filename):
+            self._put(filename, [data])
+        return data
+
+    def load_stream(self, filename: str) -> Generator:
+        cache_path = self._get(filename)
+        if cache_path:
+            try:
+                with open(cache_path, "rb") as f:
+                    while chunk := f.read(_READ_CHUNK_SIZE):
+                        yield chunk
+                return
+            except FileNotFoundError:
+                self._forget(filename)
+
+        if not self._is_cacheable(filename):
+            yield from self.storage.load_stream(filename)
+            return
+
+        # fill the cache while streaming, the partial file is dropped if the stream is not fully consumed, is too
+        # large or can not be written, the rest of the stream still comes from the storage
+        cache_file: Optional[BinaryIO] = None
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            cache_file = os.fdopen(fd, "wb")
+        except OSError:
+            logger.exception(f"Failed to cache file {filename}")
+
+        size = 0
+        try:
+            for chunk in self.storage.load_stream(filename):
+                size += len(chunk)
+                if cache_file is not None and size > self.max_size:
+                    with contextlib.suppress(OSError):
+                        cache_file.close()
+                    cache_file = None
+                if cache_file is not None:
+                    try:
+                        cache_file.write(chunk)
+                    except OSError:
+                        logger.exception(f"Failed to cache file {filename}")
+                        with contextlib.suppress(OSError):
+                            cache_file.close()
+                        cache_file = None
+                yield chunk
+
+            if cache_file is not None and tmp_path is not None:
+                try:
+                    cache_file.close()
+                    cache_file = None
+                    self._commit(filename, tmp_path, size)
+                except OSError:
+                    logger.exception(f"Failed to cache file {filename}")
+        finally:
+            if cache_file is not None:
+                with contextlib.suppress(OSError):
+                    cache_file.close()
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def download(self, filename, target_filepath):
+        cache_path = self._get(filename)
+        if cache_path:
+            try:
+                shutil.copyfile(cache_path, target_filepath)
+                return
+            except FileNotFoundError:
+                self._forget(filename)
+
+        self.storage.download(filename, target_filepath)
+        if self._is_cacheable(filename):
+            with open(target_filepath, "rb") as f:
+                self._put(filename, iter(lambda: f.read(_READ_CHUNK_SIZE), b""))
+
+    def exists(self, filename):
+        if self._get(filename):
+            return True
+        return self.storage.exists(filename)
+
+    def delete(self, filename):
+        self._invalidate(filename)
+        self.storage.delete(filename)
+
+    def _is_cacheable(self, filename: str) -> bool:
+        return filename.startswith(self.prefixes)
+
+    def _cache_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(filename.encode("utf-8")).hexdigest())
+
+    def _get(self, filename: str) -> Optional[str]:
+        if not self._is_cacheable(filename):
+            return None
+
+        cache_path = self._cache_path(filename)
+        with self._lock:
+            cached = cache_path in self._entries
+            if cached:
+                self._entries.move_to_end(cache_path)
+
+        if not cached:
+            # cached by another process since the last scan
+            try:
+                size = os.stat(cache_path).st_size
+            except OSError:
+                return None
+            with self._lock:
+                self._size += size - self._entries.pop(cache_path, 0)
+                self._entries[cache_path] = size
+                self._evict()
+                if cache_path not in self._entries:
+                    return None
+        else:
+            # the other processes order their eviction by the modification time
+            with contextlib.suppress(OSError):
+                os.utime(cache_path)
+        return cache_path
+
+    def _put(self, filename: str, chunks: Iterable[bytes]) -> None:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            size = 0
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in chunks:
+                        size += len(chunk)
+                        if size > self.max_size:
+                            return
+                        f.write(chunk)
+                self._commit(filename, tmp_path, size)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        except OSError:
+            # the cache is best effort, the object is still served from the storage
+            logger.exception(f"Failed to cache file {filename}")
+
+    def _commit(self, filename: str, tmp_path: str, size: int) -> None:
+        cache_path = self._cache_path(filename)
+        with self._lock:
+            os.replace(tmp_path, cache_path)
+            self._size += size - self._entries.pop(cache_path, 0)
+            self._entries[cache_path] = size
+            self._evict()
+
+        if time.monotonic() - self._scanned_at > _RESCAN_INTERVAL_SECONDS:
+            self._load_entries()
+
+    def _invalidate(self, filename: str) -> None:
+        if not self._is_cacheable(filename):
+            return
+
+        cache_path = self._forget(filename)
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+
+    def _forget(self, filename: str) -> str:
+        cache_path = self._cache_path(filename)
+        with self._lock:
+            self._size -= self._entries.pop(cache_path, 0)
+        return cache_path
+
+    def _evict(self) -> None:
+        while self._size > self.max_size and self._entries:
+            cache_path, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(cache_path)
+            except FileNotFoundError:
+                pass
+
+    def _load_entries(self) -> None:
+        """
+        Rebuild the index from the files of all the processes in the cache directory
+        """
+        self._scanned_at = time.monotonic()
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    # left over by an interrupted write, recent ones may still be written by another process
+                    if stat.st_mtime < time.time() - _STALE_TMP_FILE_SECONDS:
+                        os.remove(entry.path)
+                    continue
+            except FileNotFoundError:
+                # evicted by another process during the scan
+                continue
+            files.append((stat.st_mtime, entry.path, stat.st_size))
+
+        with self._lock:
+            self._entries = OrderedDict((cache_path, size) for _, cache_path, size in sorted(files))
+            self._size = sum(self._entries.values())
+            self._evict()
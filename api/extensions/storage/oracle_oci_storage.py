@@ -1,11 +1,19 @@
-from collections.abc import Generator
+import io
+import itertools
+from collections import deque
+from collections.abc import Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import boto3  # type: ignore
+from boto3.s3.transfer import TransferConfig  # type: ignore
+from botocore.client import Config  # type: ignore
 from botocore.exceptions import ClientError  # type: ignore
 
 from configs import dify_config
 from extensions.storage.base_storage import BaseStorage
 
+_NOT_FOUND_ERROR_CODES = ("NoSuchKey", "404", "NotFound")
+
 
 class OracleOCIStorage(BaseStorage):
     """Implementation for Oracle OCI storage."""
@@ -14,16 +22,83 @@ class OracleOCIStorage(BaseStorage):
         super().__init__()
 
         self.bucket_name = dify_config.OCI_BUCKET_NAME
+        self.multipart_threshold = dify_config.OCI_MULTIPART_THRESHOLD
+        self.multipart_chunksize = dify_config.OCI_MULTIPART_CHUNKSIZE
+        self.max_concurrency = dify_config.OCI_MAX_CONCURRENCY
         self.client = boto3.client(
             "s3",
             aws_secret_access_key=dify_config.OCI_SECRET_KEY,
             aws_access_key_id=dify_config.OCI_ACCESS_KEY,
             endpoint_url=dify_config.OCI_ENDPOINT,
             region_name=dify_config.OCI_REGION,
+            config=Config(max_pool_connections=dify_config.OCI_MAX_POOL_CONNECTIONS),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
         )
 
     def save(self, filename, data):
-        self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=data)
+        if len(data) <= self.multipart_threshold:
+            self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=data)
+            return
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.client.upload_fileobj(io.BytesIO(data), self.bucket_name, filename, Config=self.transfer_config)
+
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        """
+        Save data fed chunk by chunk.
+        Parts are uploaded in parallel as soon as they are filled, so at most `max_concurrency` parts are
+        kept in memory. The multipart upload is aborted if the stream or an upload fails.
+        """
+        chunks = iter(stream)
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) > self.multipart_threshold:
+                break
+        else:
+            self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=bytes(buffer))
+            return
+
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket_name, Key=filename)["UploadId"]
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures: list[Future] = []
+
+                def submit_part(data: bytes):
+                    # wait for the oldest in-flight part to bound memory usage
+                    in_flight = [future for future in futures if not future.done()]
+                    if len(in_flight) >= self.max_concurrency:
+                        in_flight[0].result()
+                    futures.append(executor.submit(self._upload_part, filename, upload_id, len(futures) + 1, data))
+
+                def submit_full_parts():
+                    while len(buffer) >= self.multipart_chunksize:
+                        submit_part(bytes(buffer[: self.multipart_chunksize]))
+                        del buffer[: self.multipart_chunksize]
+
+                submit_full_parts()
+                for chunk in chunks:
+                    buffer += chunk
+                    submit_full_parts()
+                if buffer:
+                    submit_part(bytes(buffer))
+
+                parts = [future.result() for future in futures]
+
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=filename,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=filename, UploadId=upload_id)
+            raise
 
     def load_once(self, filename: str) -> bytes:
         try:
@@ -36,24 +111,76 @@ class OracleOCIStorage(BaseStorage):
         return data
 
     def load_stream(self, filename: str) -> Generator:
+        """
+        Stream an object one chunk of `multipart_chunksize` bytes at a time.
+        The first chunk is read by the request telling the size of the object, the following ones with parallel
+        ranged requests yielded in order, so at most `max_concurrency` chunks are kept in memory.
+        """
         try:
-            response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
-            yield from response["Body"].iter_chunks()
+            try:
+                response = self.client.get_object(
+                    Bucket=self.bucket_name, Key=filename, Range=f"bytes=0-{self.multipart_chunksize - 1}"
+                )
+            except ClientError as ex:
+                if ex.response["Error"]["Code"] == "InvalidRange":
+                    # empty object
+                    return
+                raise
+
+            content_range = response.get("ContentRange")
+            size = int(content_range.rsplit("/", 1)[1]) if content_range else response["ContentLength"]
+            if not content_range or size <= self.multipart_chunksize:
+                yield from response["Body"].iter_chunks()
+                return
+
+            ranges = iter(
+                [
+                    (start, min(start + self.multipart_chunksize, size) - 1)
+                    for start in range(self.multipart_chunksize, size, self.multipart_chunksize)
+                ]
+            )
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                window: deque[Future[bytes]] = deque(
+                    executor.submit(self._get_range, filename, start, end)
+                    for start, end in itertools.islice(ranges, self.max_concurrency)
+                )
+                data: bytes = response["Body"].read()
+                while True:
+                    yield data
+                    if not window:
+                        break
+                    data = window.popleft().result()
+                    next_range = next(ranges, None)
+                    if next_range is not None:
+                        window.append(executor.submit(self._get_range, filename, *next_range))
         except ClientError as ex:
-            if ex.response["Error"]["Code"] == "NoSuchKey":
+            if ex.response["Error"]["Code"] in _NOT_FOUND_ERROR_CODES:
                 raise FileNotFoundError("File not found")
             else:
                 raise
 
     def download(self, filename, target_filepath):
-        self.client.download_file(self.bucket_name, filename, target_filepath)
+        self.client.download_file(self.bucket_name, filename, target_filepath, Config=self.transfer_config)
 
     def exists(self, filename):
         try:
             self.client.head_object(Bucket=self.bucket_name, Key=filename)
             return True
-        except:
-            return False
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in _NOT_FOUND_ERROR_CODES:
+                return False
+            raise
 
     def delete(self, filename):
         self.client.delete_object(Bucket=self.bucket_name, Key=filename)
+
+    def _upload_part(self, filename: str, upload_id: str, part_number: int, data: bytes) -> dict:
+        response = self.client.upload_part(
+            Bucket=self.bucket_name, Key=filename, UploadId=upload_id, PartNumber=part_number, Body=data
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _get_range(self, filename: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=f"bytes={start}-{end}")
+        data: bytes = response["Body"].read()
+        return data
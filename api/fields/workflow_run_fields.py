@@ -116,6 +116,16 @@ workflow_run_node_execution_fields = {
     "finished_at": TimestampField,
 }
 
+# the list returns previews of offloaded payloads instead of loading each of them from the storage, the columns in
+# `truncated_payloads` are truncated and loaded in full by the node execution detail
+workflow_run_node_execution_list_item_fields = {
+    **workflow_run_node_execution_fields,
+    "inputs": fields.Raw(attribute="inputs_preview_dict"),
+    "process_data": fields.Raw(attribute="process_data_preview_dict"),
+    "outputs": fields.Raw(attribute="outputs_preview_dict"),
+    "truncated_payloads": fields.List(fields.String),
+}
+
 workflow_run_node_execution_list_fields = {
-    "data": fields.List(fields.Nested(workflow_run_node_execution_fields)),
+    "data": fields.List(fields.Nested(workflow_run_node_execution_list_item_fields)),
 }
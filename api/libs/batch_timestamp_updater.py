@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Optional
+
+from flask import Flask, current_app
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import InstrumentedAttribute
+
+from extensions.ext_database import db
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTimestampUpdater:
+    """
+    Coalesces writes of a timestamp column, such as `last_used_at`, that every request would otherwise commit.
+
+    Requests record the rows they touched in process, a background thread writes the latest timestamp of each
+    row every `interval` seconds in one batched update. A row recorded again within `min_interval` seconds of
+    its last recording is skipped. Timestamps recorded since the last flush are lost if the process exits.
+    """
+
+    def __init__(self, column: InstrumentedAttribute, interval: float, min_interval: float = 0) -> None:
+        self._table = column.property.columns[0].table
+        self._column_name = column.property.columns[0].name
+        self._interval = interval
+        self._min_interval = min_interval
+        # row id -> time it was last recorded, not flushed yet
+        self._pending: dict[str, datetime] = {}
+        # row id -> monotonic time of its last recording, to apply min_interval
+        self._recorded_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def record(self, row_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            recorded_at = self._recorded_at.get(row_id)
+            if recorded_at is not None and now - recorded_at < self._min_interval:
+                return
+            self._recorded_at[row_id] = now
+            self._pending[row_id] = datetime.now(UTC).replace(tzinfo=None)
+        self._ensure_flushing()
+
+    def flush(self) -> int:
+        """
+        :return: number of rows updated
+        """
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._recorded_at = {
+                row_id: recorded_at
+                for row_id, recorded_at in self._recorded_at.items()
+                if now - recorded_at < self._min_interval
+            }
+        if not pending:
+            return 0
+
+        stmt = (
+            update(self._table)
+            .where(self._table.c.id == bindparam("b_row_id"))
+            .values({self._column_name: bindparam("b_timestamp")})
+        )
+        try:
+            db.session.execute(stmt, [{"b_row_id": row_id, "b_timestamp": at} for row_id, at in pending.items()])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception(f"Failed to update {self._table.name}.{self._column_name} of {len(pending)} rows")
+            return 0
+        return len(pending)
+
+    def _ensure_flushing(self) -> None:
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._flush_periodically,
+                        args=(current_app._get_current_object(),),  # type: ignore
+                        name=f"{self._table.name}_{self._column_name}_updater",
+                        daemon=True,
+                    )
+                    self._flusher.start()
+
+    def _flush_periodically(self, flask_app: Flask) -> None:
+        while True:
+            time.sleep(self._interval)
+            with flask_app.app_context():
+                self.flush()
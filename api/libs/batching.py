@@ -0,0 +1,12 @@
+from collections.abc import Iterator, Sequence
+from typing import TypeVar
+
+# Oracle rejects IN lists with more than 1000 expressions (ORA-01795)
+MAX_IN_LIST_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int = MAX_IN_LIST_SIZE) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
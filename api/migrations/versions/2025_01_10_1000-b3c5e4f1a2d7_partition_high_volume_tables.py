@@ -0,0 +1,67 @@
+"""partition high volume tables by month
+
+Revision ID: b3c5e4f1a2d7
+Revises: a91b476a53de
+Create Date: 2025-01-10 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3c5e4f1a2d7'
+down_revision = 'a91b476a53de'
+branch_labels = None
+depends_on = None
+
+# Oracle: interval (monthly) range partitioning on created_at, rows older than the transition point
+# stay in the initial partition. Indexes listed here become LOCAL so time range queries are pruned to the
+# matching partitions, all other indexes (primary keys, unique and message_id/workflow_run_id lookups)
+# stay global and are maintained by the partition retention task with UPDATE GLOBAL INDEXES.
+PARTITIONED_TABLES = {
+    'messages': ['message_app_id_idx', 'message_created_at_idx'],
+    'message_agent_thoughts': [],
+    'workflow_runs': [],
+    'workflow_node_executions': [],
+    'embeddings': ['created_at_idx'],
+}
+
+# local indexes for the hot pagination paths
+LOCAL_INDEXES = {
+    'message_conversation_created_at_idx': ('messages', ['conversation_id', 'created_at']),
+    'workflow_run_app_created_at_idx': ('workflow_runs', ['tenant_id', 'app_id', 'created_at']),
+}
+
+PARTITION_TRANSITION_POINT = "TIMESTAMP '2024-01-01 00:00:00'"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'oracle':
+        # other databases can not partition an existing table in place, keep them unpartitioned
+        for index_name, (table_name, columns) in LOCAL_INDEXES.items():
+            with op.batch_alter_table(table_name, schema=None) as batch_op:
+                batch_op.create_index(index_name, columns, unique=False)
+        return
+
+    for table_name, local_indexes in PARTITIONED_TABLES.items():
+        update_indexes = ''
+        if local_indexes:
+            update_indexes = ' UPDATE INDEXES ({})'.format(', '.join(f'{index} LOCAL' for index in local_indexes))
+        op.execute(
+            f"ALTER TABLE {table_name} MODIFY PARTITION BY RANGE (created_at)"
+            f" INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))"
+            f" (PARTITION {table_name}_p0 VALUES LESS THAN ({PARTITION_TRANSITION_POINT}))"
+            f" ONLINE{update_indexes}"
+        )
+
+    for index_name, (table_name, columns) in LOCAL_INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)}) LOCAL")
+
+
+def downgrade():
+    # Oracle can not turn a partitioned table back into a plain one without a redefinition,
+    # the partitioning is transparent to the application so only the added indexes are removed.
+    for index_name, (table_name, _) in LOCAL_INDEXES.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(index_name)
@@ -776,6 +776,7 @@ class Message(db.Model):  # type: ignore[name-defined]
         db.Index("message_account_idx", "app_id", "from_source", "from_account_id"),
         db.Index("message_workflow_run_id_idx", "conversation_id", "workflow_run_id"),
         db.Index("message_created_at_idx", "created_at"),
+        db.Index("message_conversation_created_at_idx", "conversation_id", "created_at"),
     )
 
     #id = db.Column(StringUUID, default=lambda: uuid.uuid4())
@@ -10,7 +10,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 
 import contexts
 from constants import HIDDEN_VALUE
-from core.helper import encrypter
+from core.helper import encrypter, workflow_payload
 from core.variables import SecretVariable, Variable
 from factories import variable_factory
 from libs import helper
@@ -18,7 +18,7 @@ from models.enums import CreatedByRole
 
 from .account import Account
 from .engine import db
-from .types import StringUUID,AdaptiveText
+from .types import AdaptiveText, StringUUID
 
 if TYPE_CHECKING:
     from models.model import AppMode, Message
@@ -98,8 +98,8 @@ class Workflow(db.Model):  # type: ignore[name-defined]
         db.Index("workflow_version_idx", "tenant_id", "app_id", "version"),
     )
 
-    #id: Mapped[str] = mapped_column(StringUUID, default=lambda: uuid.uuid4())
-    id: Mapped[str]  = db.Column(StringUUID, server_default=db.text("SYS_GUID()"))  ##Oracle:
+    # id: Mapped[str] = mapped_column(StringUUID, default=lambda: uuid.uuid4())
+    id: Mapped[str] = db.Column(StringUUID, server_default=db.text("SYS_GUID()"))  # Oracle:
     tenant_id: Mapped[str] = mapped_column(StringUUID, nullable=False)
     app_id: Mapped[str] = mapped_column(StringUUID, nullable=False)
     type: Mapped[str] = mapped_column(db.String(255), nullable=False)
@@ -348,7 +348,32 @@ class WorkflowRunStatus(StrEnum):
         raise ValueError(f"invalid workflow run status value {value}")
 
 
-class WorkflowRun(db.Model):  # type: ignore[name-defined]
+class OffloadablePayloadMixin:
+    """
+    Mixin for models with JSON payload columns that may be offloaded to the storage, see `core.helper.workflow_payload`.
+
+    Offloaded payloads are loaded lazily on first access and kept on the instance.
+    """
+
+    def dump_payload(self, payload: Any) -> str:
+        text = json.dumps(payload)
+        stored_text = workflow_payload.offload(text, tenant_id=self.tenant_id)  # type: ignore[attr-defined]
+        if stored_text != text:
+            # keep what was just written so the caller doesn't read it back from the storage
+            self.__dict__.setdefault("_loaded_payloads", {})[stored_text] = json.loads(text)
+        return stored_text
+
+    def load_payload(self, text: Optional[str]) -> Any:
+        if not workflow_payload.is_offloaded(text):
+            return json.loads(text) if text else None
+
+        loaded_payloads = self.__dict__.setdefault("_loaded_payloads", {})
+        if text not in loaded_payloads:
+            loaded_payloads[text] = workflow_payload.loads(text)
+        return loaded_payloads[text]
+
+
+class WorkflowRun(OffloadablePayloadMixin, db.Model):  # type: ignore[name-defined]
     """
     Workflow Run
 
@@ -391,6 +416,7 @@ class WorkflowRun(db.Model):  # type: ignore[name-defined]
         db.PrimaryKeyConstraint("id", name="workflow_run_pkey"),
         db.Index("workflow_run_triggerd_from_idx", "tenant_id", "app_id", "triggered_from"),
         db.Index("workflow_run_tenant_app_sequence_idx", "tenant_id", "app_id", "sequence_number"),
+        db.Index("workflow_run_app_created_at_idx", "tenant_id", "app_id", "created_at"),
     )
 
     id: Mapped[str] = mapped_column(StringUUID, server_default=db.text("SYS_GUID()"))
@@ -437,7 +463,11 @@ class WorkflowRun(db.Model):  # type: ignore[name-defined]
 
     @property
     def outputs_dict(self) -> Mapping[str, Any]:
-        return json.loads(self.outputs) if self.outputs else {}
+        return self.load_payload(self.outputs) or {}
+
+    @property
+    def outputs_text(self) -> Optional[str]:
+        return workflow_payload.resolve(self.outputs)
 
     @property
     def message(self) -> Optional["Message"]:
@@ -550,7 +580,7 @@ class WorkflowNodeExecutionStatus(Enum):
         raise ValueError(f"invalid workflow node execution status value {value}")
 
 
-class WorkflowNodeExecution(db.Model):  # type: ignore[name-defined]
+class WorkflowNodeExecution(OffloadablePayloadMixin, db.Model):  # type: ignore[name-defined]
     """
     Workflow Node Execution
 
@@ -660,15 +690,38 @@ class WorkflowNodeExecution(db.Model):  # type: ignore[name-defined]
 
     @property
     def inputs_dict(self):
-        return json.loads(self.inputs) if self.inputs else None
+        return self.load_payload(self.inputs)
 
     @property
     def outputs_dict(self):
-        return json.loads(self.outputs) if self.outputs else None
+        return self.load_payload(self.outputs)
 
     @property
     def process_data_dict(self):
-        return json.loads(self.process_data) if self.process_data else None
+        return self.load_payload(self.process_data)
+
+    @property
+    def inputs_preview_dict(self):
+        return workflow_payload.preview(self.inputs)
+
+    @property
+    def outputs_preview_dict(self):
+        return workflow_payload.preview(self.outputs)
+
+    @property
+    def process_data_preview_dict(self):
+        return workflow_payload.preview(self.process_data)
+
+    @property
+    def truncated_payloads(self) -> list[str]:
+        """
+        Payload columns whose preview dict is truncated
+        """
+        return [
+            name
+            for name, text in (("inputs", self.inputs), ("process_data", self.process_data), ("outputs", self.outputs))
+            if workflow_payload.is_offloaded(text)
+        ]
 
     @property
     def execution_metadata_dict(self):
@@ -1,14 +1,16 @@
 import datetime
 import time
+from typing import cast
 
 import click
-from sqlalchemy import text
-from werkzeug.exceptions import NotFound
+from sqlalchemy import CursorResult, and_, delete, or_, select
 
 import app
 from configs import dify_config
 from extensions.ext_database import db
+from libs.batching import chunked
 from models.dataset import Embedding
+from services.retention_service import BulkRetentionEngine, RetentionCursor
 
 
 @app.celery.task(queue="dataset")
@@ -17,26 +19,43 @@ def clean_embedding_cache_task():
     clean_days = int(dify_config.PLAN_SANDBOX_CLEAN_DAY_SETTING)
     start_at = time.perf_counter()
     thirty_days_ago = datetime.datetime.now() - datetime.timedelta(days=clean_days)
-    while True:
-        try:
-            embedding_ids = (
-                db.session.query(Embedding.id)
-                .filter(Embedding.created_at < thirty_days_ago)
-                .order_by(Embedding.created_at.desc())
-                .limit(100)
-                .all()
+    deleted_count = 0
+
+    def clean_batch(cursor: RetentionCursor) -> RetentionCursor:
+        nonlocal deleted_count
+        # walk expired rows from oldest to newest with a (created_at, id) keyset cursor
+        query = select(Embedding.id, Embedding.created_at).where(Embedding.created_at < thirty_days_ago)
+        if cursor:
+            cursor_created_at, cursor_id = cursor
+            query = query.where(
+                or_(
+                    Embedding.created_at > cursor_created_at,
+                    and_(Embedding.created_at == cursor_created_at, Embedding.id > cursor_id),
+                )
             )
-            embedding_ids = [embedding_id[0] for embedding_id in embedding_ids]
-        except NotFound:
-            break
-        if embedding_ids:
-            for embedding_id in embedding_ids:
+        embeddings = db.session.execute(
+            query.order_by(Embedding.created_at, Embedding.id).limit(dify_config.RETENTION_BATCH_SIZE)
+        ).all()
+        if not embeddings:
+            return None
+
+        for ids in chunked([embedding.id for embedding in embeddings]):
+            result = cast(
+                CursorResult,
                 db.session.execute(
-                    text("DELETE FROM embeddings WHERE id = :embedding_id"), {"embedding_id": embedding_id}
-                )
+                    delete(Embedding).where(Embedding.id.in_(ids)), execution_options={"synchronize_session": False}
+                ),
+            )
+            deleted_count += result.rowcount
+        db.session.commit()
+
+        return [embeddings[-1].created_at, embeddings[-1].id]
 
-            db.session.commit()
-        else:
-            break
+    BulkRetentionEngine("clean_embedding_cache").run(clean_batch)
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned embedding cache from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            "Cleaned {} embedding cache from db success latency: {}".format(deleted_count, end_at - start_at),
+            fg="green",
+        )
+    )
@@ -2,12 +2,12 @@ import datetime
 import time
 
 import click
-from werkzeug.exceptions import NotFound
+from sqlalchemy import and_, delete, or_
 
 import app
 from configs import dify_config
 from extensions.ext_database import db
-from extensions.ext_redis import redis_client
+from libs.batching import chunked
 from models.model import (
     App,
     Message,
@@ -18,7 +18,16 @@ from models.model import (
     MessageFile,
 )
 from models.web import SavedMessage
-from services.feature_service import FeatureService
+from services.retention_service import BulkRetentionEngine, RetentionCursor, TenantPlanResolver
+
+MESSAGE_RELATED_MODELS = (
+    MessageFeedback,
+    MessageAnnotation,
+    MessageChain,
+    MessageAgentThought,
+    MessageFile,
+    SavedMessage,
+)
 
 
 @app.celery.task(queue="dataset")
@@ -28,54 +37,51 @@ def clean_messages():
     plan_sandbox_clean_message_day = datetime.datetime.now() - datetime.timedelta(
         days=dify_config.PLAN_SANDBOX_CLEAN_MESSAGE_DAY_SETTING
     )
-    while True:
-        try:
-            # Main query with join and filter
-            # FIXME:for mypy no paginate method error
-            messages = (
-                db.session.query(Message)  # type: ignore
-                .filter(Message.created_at < plan_sandbox_clean_message_day)
-                .order_by(Message.created_at.desc())
-                .limit(100)
-                .all()
-            )
+    plan_resolver = TenantPlanResolver()
+    deleted_count = 0
 
-        except NotFound:
-            break
-        if not messages:
-            break
-        for message in messages:
-            plan_sandbox_clean_message_day = message.created_at
-            app = App.query.filter_by(id=message.app_id).first()
-            features_cache_key = f"features:{app.tenant_id}"
-            plan_cache = redis_client.get(features_cache_key)
-            if plan_cache is None:
-                features = FeatureService.get_features(app.tenant_id)
-                redis_client.setex(features_cache_key, 600, features.billing.subscription.plan)
-                plan = features.billing.subscription.plan
-            else:
-                plan = plan_cache.decode()
-            if plan == "sandbox":
-                # clean related message
-                db.session.query(MessageFeedback).filter(MessageFeedback.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == message.id).delete(
-                    synchronize_session=False
+    def clean_batch(cursor: RetentionCursor) -> RetentionCursor:
+        nonlocal deleted_count
+        # walk messages from newest to oldest with a (created_at, id) keyset cursor
+        query = (
+            db.session.query(Message.id, Message.created_at, App.tenant_id)
+            .join(App, App.id == Message.app_id)
+            .filter(Message.created_at < plan_sandbox_clean_message_day)
+        )
+        if cursor:
+            cursor_created_at, cursor_id = cursor
+            query = query.filter(
+                or_(
+                    Message.created_at < cursor_created_at,
+                    and_(Message.created_at == cursor_created_at, Message.id < cursor_id),
                 )
-                db.session.query(MessageChain).filter(MessageChain.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageAgentThought).filter(MessageAgentThought.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(MessageFile).filter(MessageFile.message_id == message.id).delete(
-                    synchronize_session=False
-                )
-                db.session.query(SavedMessage).filter(SavedMessage.message_id == message.id).delete(
-                    synchronize_session=False
+            )
+        messages = (
+            query.order_by(Message.created_at.desc(), Message.id.desc()).limit(dify_config.RETENTION_BATCH_SIZE).all()
+        )
+        if not messages:
+            return None
+
+        plans = plan_resolver.get_plans(message.tenant_id for message in messages)
+        message_ids = [message.id for message in messages if plans[message.tenant_id] == "sandbox"]
+        for ids in chunked(message_ids):
+            # clean related message
+            for model in MESSAGE_RELATED_MODELS:
+                db.session.execute(
+                    delete(model).where(model.message_id.in_(ids)), execution_options={"synchronize_session": False}
                 )
-                db.session.query(Message).filter(Message.id == message.id).delete()
-                db.session.commit()
+            db.session.execute(
+                delete(Message).where(Message.id.in_(ids)), execution_options={"synchronize_session": False}
+            )
+        db.session.commit()
+        deleted_count += len(message_ids)
+
+        return [messages[-1].created_at, messages[-1].id]
+
+    BulkRetentionEngine("clean_messages").run(clean_batch)
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned messages from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            "Cleaned {} messages from db success latency: {}".format(deleted_count, end_at - start_at), fg="green"
+        )
+    )
@@ -1,17 +1,20 @@
 import datetime
+import logging
 import time
+from typing import Optional, cast
 
 import click
-from sqlalchemy import func
-from werkzeug.exceptions import NotFound
+from sqlalchemy import and_, func, insert, or_, select, update
 
 import app
 from configs import dify_config
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
-from extensions.ext_redis import redis_client
 from models.dataset import Dataset, DatasetAutoDisableLog, DatasetQuery, Document
-from services.feature_service import FeatureService
+from services.retention_service import BulkRetentionEngine, RetentionCursor, TenantPlanResolver
+
+# every dataset needs a call to its vector store, so batches are smaller than for plain row deletes
+DATASET_BATCH_SIZE = 50
 
 
 @app.celery.task(queue="dataset")
@@ -22,167 +25,124 @@ def clean_unused_datasets_task():
     start_at = time.perf_counter()
     plan_sandbox_clean_day = datetime.datetime.now() - datetime.timedelta(days=plan_sandbox_clean_day_setting)
     plan_pro_clean_day = datetime.datetime.now() - datetime.timedelta(days=plan_pro_clean_day_setting)
-    while True:
-        try:
-            # Subquery for counting new documents
-            document_subquery_new = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at > plan_sandbox_clean_day,
-                )
-                .group_by(Document.dataset_id)
-                .subquery()
-            )
 
-            # Subquery for counting old documents
-            document_subquery_old = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at < plan_sandbox_clean_day,
-                )
-                .group_by(Document.dataset_id)
-                .subquery()
+    # datasets of every plan unused since the sandbox clean day, their documents are logged for notification
+    _clean_unused_datasets("clean_unused_datasets", plan_sandbox_clean_day, plan=None, add_auto_disable_log=True)
+    # datasets of sandbox tenants unused since the pro clean day
+    _clean_unused_datasets("clean_unused_sandbox_datasets", plan_pro_clean_day, plan="sandbox")
+
+    end_at = time.perf_counter()
+    click.echo(click.style("Cleaned unused dataset from db success latency: {}".format(end_at - start_at), fg="green"))
+
+
+def _clean_unused_datasets(
+    name: str, clean_day: datetime.datetime, plan: Optional[str], add_auto_disable_log: bool = False
+) -> None:
+    plan_resolver = TenantPlanResolver()
+
+    def clean_batch(cursor: RetentionCursor) -> RetentionCursor:
+        datasets = _get_unused_datasets(clean_day, cursor)
+        if not datasets:
+            return None
+
+        dataset_ids = [dataset.id for dataset in datasets]
+        queried_dataset_ids = set(
+            db.session.scalars(
+                select(DatasetQuery.dataset_id)
+                .where(DatasetQuery.created_at > clean_day, DatasetQuery.dataset_id.in_(dataset_ids))
+                .distinct()
             )
+        )
+        datasets_to_clean = [dataset for dataset in datasets if dataset.id not in queried_dataset_ids]
+        if plan:
+            plans = plan_resolver.get_plans(dataset.tenant_id for dataset in datasets_to_clean)
+            datasets_to_clean = [dataset for dataset in datasets_to_clean if plans[dataset.tenant_id] == plan]
 
-            # Main query with join and filter
-            datasets = (
-                Dataset.query.outerjoin(document_subquery_new, Dataset.id == document_subquery_new.c.dataset_id)
-                .outerjoin(document_subquery_old, Dataset.id == document_subquery_old.c.dataset_id)
-                .filter(
-                    Dataset.created_at < plan_sandbox_clean_day,
-                    func.coalesce(document_subquery_new.c.document_count, 0) == 0,
-                    func.coalesce(document_subquery_old.c.document_count, 0) > 0,
+        cleaned_dataset_ids = []
+        for dataset in datasets_to_clean:
+            try:
+                # remove index
+                index_processor = IndexProcessorFactory(dataset.doc_form).init_index_processor()
+                index_processor.clean(dataset, None)
+                cleaned_dataset_ids.append(dataset.id)
+            except Exception as e:
+                logging.exception(f"Failed to clean index of unused dataset {dataset.id}")
+                click.echo(
+                    click.style("clean dataset index error: {} {}".format(e.__class__.__name__, str(e)), fg="red")
                 )
-                .order_by(Dataset.created_at.desc())
-                .paginate(page=1, per_page=50)
-            )
 
-        except NotFound:
-            break
-        if datasets.items is None or len(datasets.items) == 0:
-            break
-        for dataset in datasets:
-            dataset_query = (
-                db.session.query(DatasetQuery)
-                .filter(DatasetQuery.created_at > plan_sandbox_clean_day, DatasetQuery.dataset_id == dataset.id)
-                .all()
-            )
-            if not dataset_query or len(dataset_query) == 0:
-                try:
-                    # add auto disable log
-                    documents = (
-                        db.session.query(Document)
-                        .filter(
-                            Document.dataset_id == dataset.id,
+        if cleaned_dataset_ids:
+            if add_auto_disable_log:
+                db.session.execute(
+                    insert(DatasetAutoDisableLog).from_select(
+                        ["tenant_id", "dataset_id", "document_id"],
+                        select(Document.tenant_id, Document.dataset_id, Document.id).where(
+                            Document.dataset_id.in_(cleaned_dataset_ids),
                             Document.enabled == True,
                             Document.archived == False,
-                        )
-                        .all()
-                    )
-                    for document in documents:
-                        dataset_auto_disable_log = DatasetAutoDisableLog(
-                            tenant_id=dataset.tenant_id,
-                            dataset_id=dataset.id,
-                            document_id=document.id,
-                        )
-                        db.session.add(dataset_auto_disable_log)
-                    # remove index
-                    index_processor = IndexProcessorFactory(dataset.doc_form).init_index_processor()
-                    index_processor.clean(dataset, None)
-
-                    # update document
-                    update_params = {Document.enabled: False}
-
-                    Document.query.filter_by(dataset_id=dataset.id).update(update_params)
-                    db.session.commit()
-                    click.echo(click.style("Cleaned unused dataset {} from db success!".format(dataset.id), fg="green"))
-                except Exception as e:
-                    click.echo(
-                        click.style("clean dataset index error: {} {}".format(e.__class__.__name__, str(e)), fg="red")
+                        ),
                     )
-    while True:
-        try:
-            # Subquery for counting new documents
-            document_subquery_new = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at > plan_pro_clean_day,
                 )
-                .group_by(Document.dataset_id)
-                .subquery()
+            # update document
+            db.session.execute(
+                update(Document).where(Document.dataset_id.in_(cleaned_dataset_ids)).values(enabled=False),
+                execution_options={"synchronize_session": False},
             )
+        db.session.commit()
+        click.echo(
+            click.style("Cleaned {} unused datasets from db success!".format(len(cleaned_dataset_ids)), fg="green")
+        )
 
-            # Subquery for counting old documents
-            document_subquery_old = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at < plan_pro_clean_day,
-                )
-                .group_by(Document.dataset_id)
-                .subquery()
-            )
+        return [datasets[-1].created_at, datasets[-1].id]
 
-            # Main query with join and filter
-            datasets = (
-                Dataset.query.outerjoin(document_subquery_new, Dataset.id == document_subquery_new.c.dataset_id)
-                .outerjoin(document_subquery_old, Dataset.id == document_subquery_old.c.dataset_id)
-                .filter(
-                    Dataset.created_at < plan_pro_clean_day,
-                    func.coalesce(document_subquery_new.c.document_count, 0) == 0,
-                    func.coalesce(document_subquery_old.c.document_count, 0) > 0,
-                )
-                .order_by(Dataset.created_at.desc())
-                .paginate(page=1, per_page=50)
-            )
+    BulkRetentionEngine(name).run(clean_batch)
 
-        except NotFound:
-            break
-        if datasets.items is None or len(datasets.items) == 0:
-            break
-        for dataset in datasets:
-            dataset_query = (
-                db.session.query(DatasetQuery)
-                .filter(DatasetQuery.created_at > plan_pro_clean_day, DatasetQuery.dataset_id == dataset.id)
-                .all()
+
+def _get_unused_datasets(clean_day: datetime.datetime, cursor: RetentionCursor) -> list[Dataset]:
+    # Subquery for counting new documents
+    document_subquery_new = (
+        db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
+        .filter(
+            Document.indexing_status == "completed",
+            Document.enabled == True,
+            Document.archived == False,
+            Document.updated_at > clean_day,
+        )
+        .group_by(Document.dataset_id)
+        .subquery()
+    )
+
+    # Subquery for counting old documents
+    document_subquery_old = (
+        db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
+        .filter(
+            Document.indexing_status == "completed",
+            Document.enabled == True,
+            Document.archived == False,
+            Document.updated_at < clean_day,
+        )
+        .group_by(Document.dataset_id)
+        .subquery()
+    )
+
+    # Main query with join and filter, walking datasets from newest to oldest with a (created_at, id) keyset cursor
+    query = (
+        Dataset.query.outerjoin(document_subquery_new, Dataset.id == document_subquery_new.c.dataset_id)
+        .outerjoin(document_subquery_old, Dataset.id == document_subquery_old.c.dataset_id)
+        .filter(
+            Dataset.created_at < clean_day,
+            func.coalesce(document_subquery_new.c.document_count, 0) == 0,
+            func.coalesce(document_subquery_old.c.document_count, 0) > 0,
+        )
+    )
+    if cursor:
+        cursor_created_at, cursor_id = cursor
+        query = query.filter(
+            or_(
+                Dataset.created_at < cursor_created_at,
+                and_(Dataset.created_at == cursor_created_at, Dataset.id < cursor_id),
             )
-            if not dataset_query or len(dataset_query) == 0:
-                try:
-                    features_cache_key = f"features:{dataset.tenant_id}"
-                    plan_cache = redis_client.get(features_cache_key)
-                    if plan_cache is None:
-                        features = FeatureService.get_features(dataset.tenant_id)
-                        redis_client.setex(features_cache_key, 600, features.billing.subscription.plan)
-                        plan = features.billing.subscription.plan
-                    else:
-                        plan = plan_cache.decode()
-                    if plan == "sandbox":
-                        # remove index
-                        index_processor = IndexProcessorFactory(dataset.doc_form).init_index_processor()
-                        index_processor.clean(dataset, None)
-
-                        # update document
-                        update_params = {Document.enabled: False}
-
-                        Document.query.filter_by(dataset_id=dataset.id).update(update_params)
-                        db.session.commit()
-                        click.echo(
-                            click.style("Cleaned unused dataset {} from db success!".format(dataset.id), fg="green")
-                        )
-                except Exception as e:
-                    click.echo(
-                        click.style("clean dataset index error: {} {}".format(e.__class__.__name__, str(e)), fg="red")
-                    )
-    end_at = time.perf_counter()
-    click.echo(click.style("Cleaned unused dataset from db success latency: {}".format(end_at - start_at), fg="green"))
+        )
+    return cast(
+        list[Dataset], query.order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(DATASET_BATCH_SIZE).all()
+    )
@@ -0,0 +1,113 @@
+import datetime
+import time
+from typing import cast
+
+import click
+from sqlalchemy import CursorResult, text
+
+import app
+from configs import dify_config
+from extensions.ext_database import db
+from models.dataset import Embedding
+from models.model import Message, MessageAgentThought
+from models.workflow import WorkflowNodeExecution, WorkflowRun
+from schedule.clean_messages import MESSAGE_RELATED_MODELS
+from services.retention_service import TablePartition, get_expired_partitions, parse_partition_high_value
+
+
+def get_table_partitions(table_name: str) -> list[TablePartition]:
+    rows = db.session.execute(
+        text(
+            "SELECT partition_name, high_value, interval FROM user_tab_partitions"
+            " WHERE table_name = :table_name ORDER BY partition_position"
+        ),
+        {"table_name": table_name.upper()},
+    ).all()
+    return [
+        TablePartition(
+            name=row.partition_name,
+            high_value=parse_partition_high_value(row.high_value),
+            interval=row.interval == "YES",
+        )
+        for row in rows
+    ]
+
+
+def delete_message_children(partition: TablePartition) -> int:
+    """
+    Rows referencing the messages of a partition live in other (possibly unpartitioned) tables,
+    delete them in batches before the partition itself is dropped.
+    """
+    deleted_count = 0
+    for model in MESSAGE_RELATED_MODELS:
+        while True:
+            result = cast(
+                CursorResult,
+                db.session.execute(
+                    text(
+                        f"DELETE FROM {model.__tablename__} WHERE message_id IN"
+                        f' (SELECT id FROM {Message.__tablename__} PARTITION ("{partition.name}"))'
+                        " AND ROWNUM <= :batch_size"
+                    ),
+                    {"batch_size": dify_config.RETENTION_BATCH_SIZE},
+                ),
+            )
+            db.session.commit()
+            if not result.rowcount:
+                break
+            deleted_count += result.rowcount
+    return deleted_count
+
+
+def drop_partition(table_name: str, partition: TablePartition) -> None:
+    # the transition partition of an interval partitioned table can not be dropped, empty it instead
+    operation = "DROP" if partition.interval else "TRUNCATE"
+    db.session.execute(text(f'ALTER TABLE {table_name} {operation} PARTITION "{partition.name}" UPDATE GLOBAL INDEXES'))
+
+
+def get_retention_days() -> dict[str, int]:
+    retention_days = {
+        # the embedding cache is cleaned for every plan
+        Embedding.__tablename__: dify_config.PLAN_SANDBOX_CLEAN_DAY_SETTING,
+    }
+    if not dify_config.BILLING_ENABLED:
+        # without billing every tenant is on the sandbox plan, so the message retention applies to all rows
+        retention_days[Message.__tablename__] = dify_config.PLAN_SANDBOX_CLEAN_MESSAGE_DAY_SETTING
+        retention_days[MessageAgentThought.__tablename__] = dify_config.PLAN_SANDBOX_CLEAN_MESSAGE_DAY_SETTING
+    if dify_config.WORKFLOW_RUN_RETENTION_DAYS:
+        retention_days[WorkflowRun.__tablename__] = dify_config.WORKFLOW_RUN_RETENTION_DAYS
+        retention_days[WorkflowNodeExecution.__tablename__] = dify_config.WORKFLOW_RUN_RETENTION_DAYS
+    return retention_days
+
+
+@app.celery.task(queue="dataset")
+def drop_expired_partitions_task():
+    if not dify_config.PARTITION_RETENTION_ENABLED:
+        return
+    if db.engine.dialect.name != "oracle":
+        click.echo(click.style("Partition retention is only supported on Oracle, skipped.", fg="yellow"))
+        return
+
+    click.echo(click.style("Start drop expired partitions.", fg="green"))
+    start_at = time.perf_counter()
+    dropped_count = 0
+    for table_name, days in get_retention_days().items():
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+        for partition in get_expired_partitions(get_table_partitions(table_name), cutoff):
+            try:
+                if table_name == Message.__tablename__:
+                    delete_message_children(partition)
+                drop_partition(table_name, partition)
+                dropped_count += 1
+            except Exception as e:
+                db.session.rollback()
+                click.echo(
+                    click.style(f"Failed to drop partition {partition.name} of {table_name}: {str(e)}", fg="red")
+                )
+
+    end_at = time.perf_counter()
+    click.echo(
+        click.style(
+            "Dropped {} expired partitions success latency: {}".format(dropped_count, end_at - start_at), fg="green"
+        )
+    )
@@ -10,6 +10,7 @@ from typing import Any, Optional, cast
 
 from pydantic import BaseModel
 from sqlalchemy import func
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.exceptions import Unauthorized
 
 from configs import dify_config
@@ -17,6 +18,7 @@ from constants.languages import language_timezone_mapping, languages
 from events.tenant_event import tenant_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
+from libs.batch_timestamp_updater import BatchTimestampUpdater
 from libs.helper import RateLimiter, TokenManager
 from libs.passport import PassportService
 from libs.password import compare_password, hash_password, valid_password
@@ -66,6 +68,7 @@ class TokenPair(BaseModel):
 REFRESH_TOKEN_PREFIX = "refresh_token:"
 ACCOUNT_REFRESH_TOKEN_PREFIX = "account_refresh_token:"
 REFRESH_TOKEN_EXPIRY = timedelta(days=dify_config.REFRESH_TOKEN_EXPIRE_DAYS)
+ACCOUNT_SESSION_PREFIX = "account_session:"
 
 
 class AccountService:
@@ -77,6 +80,10 @@ class AccountService:
         prefix="email_code_account_deletion_rate_limit", max_attempts=1, time_window=60 * 1
     )
     LOGIN_MAX_ERROR_LIMITS = 5
+    # last_active_at is written at most every 10 minutes per account, in batches
+    last_active_updater = BatchTimestampUpdater(
+        Account.last_active_at, interval=dify_config.ACCOUNT_LAST_ACTIVE_FLUSH_INTERVAL, min_interval=600
+    )
 
     @staticmethod
     def _get_refresh_token_key(refresh_token: str) -> str:
@@ -98,8 +105,17 @@ class AccountService:
         redis_client.delete(AccountService._get_refresh_token_key(refresh_token))
         redis_client.delete(AccountService._get_account_refresh_token_key(account_id))
 
+    @staticmethod
+    def _get_account_session_key(account_id: str) -> str:
+        return f"{ACCOUNT_SESSION_PREFIX}{account_id}"
+
     @staticmethod
     def load_user(user_id: str) -> None | Account:
+        if dify_config.CONSOLE_SESSION_CACHE_ENABLED:
+            cached_account = AccountService._load_user_from_session_cache(user_id)
+            if cached_account is not None:
+                return cached_account
+
         account = Account.query.filter_by(id=user_id).first()
         if not account:
             return None
@@ -121,12 +137,69 @@ class AccountService:
             available_ta.current = True
             db.session.commit()
 
-        if datetime.now(UTC).replace(tzinfo=None) - account.last_active_at > timedelta(minutes=10):
+        if dify_config.CONSOLE_SESSION_CACHE_ENABLED:
+            AccountService._cache_account_session(account)
+            AccountService.last_active_updater.record(account.id)
+        elif datetime.now(UTC).replace(tzinfo=None) - account.last_active_at > timedelta(minutes=10):
             account.last_active_at = datetime.now(UTC).replace(tzinfo=None)
             db.session.commit()
 
         return cast(Account, account)
 
+    @staticmethod
+    def _load_user_from_session_cache(account_id: str) -> Optional[Account]:
+        """
+        Account with its current tenant and role from the session cache, attached to the current session without
+        querying it. Columns not cached are loaded on first access.
+        """
+        try:
+            cached = redis_client.get(AccountService._get_account_session_key(account_id))
+        except Exception:
+            logging.exception(f"Failed to read the session of account {account_id}")
+            return None
+        if not cached:
+            return None
+
+        session = json.loads(cached)
+        account = Account(id=account_id, status=session["status"])
+        tenant = Tenant(id=session["tenant_id"])
+        make_transient_to_detached(account)
+        make_transient_to_detached(tenant)
+        account = db.session.merge(account, load=False)
+        tenant = db.session.merge(tenant, load=False)
+        tenant.current_role = session["role"]
+        account._current_tenant = tenant
+
+        AccountService.last_active_updater.record(account_id)
+        return account
+
+    @staticmethod
+    def _cache_account_session(account: Account) -> None:
+        tenant = account.current_tenant
+        if tenant is None:
+            return
+        session = {"status": account.status, "tenant_id": tenant.id, "role": tenant.current_role}
+        try:
+            redis_client.setex(
+                AccountService._get_account_session_key(account.id),
+                dify_config.CONSOLE_SESSION_CACHE_TTL,
+                json.dumps(session),
+            )
+        except Exception:
+            logging.exception(f"Failed to cache the session of account {account.id}")
+
+    @staticmethod
+    def invalidate_account_session(*account_ids: str) -> None:
+        """
+        Drop the cached sessions of accounts whose status, current tenant or role changed
+        """
+        if not dify_config.CONSOLE_SESSION_CACHE_ENABLED or not account_ids:
+            return
+        try:
+            redis_client.delete(*(AccountService._get_account_session_key(account_id) for account_id in account_ids))
+        except Exception:
+            logging.exception(f"Failed to invalidate the sessions of accounts {account_ids}")
+
     @staticmethod
     def get_account_jwt_token(account: Account) -> str:
         exp_dt = datetime.now(UTC) + timedelta(minutes=dify_config.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -291,6 +364,7 @@ class AccountService:
     def delete_account(account: Account) -> None:
         """Delete account. This method only adds a task to the queue for deletion."""
         delete_account_task.delay(account.id)
+        AccountService.invalidate_account_session(account.id)
 
     @staticmethod
     def link_account_integrate(provider: str, open_id: str, account: Account) -> None:
@@ -324,6 +398,7 @@ class AccountService:
         """Close account"""
         account.status = AccountStatus.CLOSED.value
         db.session.commit()
+        AccountService.invalidate_account_session(account.id)
 
     @staticmethod
     def update_account(account, **kwargs):
@@ -353,6 +428,7 @@ class AccountService:
         if account.status == AccountStatus.PENDING.value:
             account.status = AccountStatus.ACTIVE.value
             db.session.commit()
+            AccountService.invalidate_account_session(account.id)
 
         access_token = AccountService.get_account_jwt_token(account=account)
         refresh_token = _generate_refresh_token()
@@ -612,6 +688,7 @@ class TenantService:
             db.session.add(ta)
 
         db.session.commit()
+        AccountService.invalidate_account_session(account.id)
         return ta
 
     @staticmethod
@@ -667,6 +744,7 @@ class TenantService:
             # Set the current tenant for the account
             account.current_tenant_id = tenant_account_join.tenant_id
             db.session.commit()
+            AccountService.invalidate_account_session(account.id)
 
     @staticmethod
     def get_tenant_members(tenant: Tenant) -> list[Account]:
@@ -769,6 +847,7 @@ class TenantService:
 
         db.session.delete(ta)
         db.session.commit()
+        AccountService.invalidate_account_session(account.id)
 
     @staticmethod
     def update_member_role(tenant: Tenant, member: Account, new_role: str, operator: Account) -> None:
@@ -780,23 +859,31 @@ class TenantService:
         if target_member_join.role == new_role:
             raise RoleAlreadyAssignedError("The provided role is already assigned to the member.")
 
+        changed_account_ids = [member.id]
         if new_role == "owner":
             # Find the current owner and change their role to 'admin'
             current_owner_join = TenantAccountJoin.query.filter_by(tenant_id=tenant.id, role="owner").first()
             current_owner_join.role = "admin"
+            changed_account_ids.append(current_owner_join.account_id)
 
         # Update the role of the target member
         target_member_join.role = new_role
         db.session.commit()
+        AccountService.invalidate_account_session(*changed_account_ids)
 
     @staticmethod
     def dissolve_tenant(tenant: Tenant, operator: Account) -> None:
         """Dissolve tenant"""
         if not TenantService.check_member_permission(tenant, operator, operator, "remove"):
             raise NoPermissionError("No permission to dissolve tenant.")
+        member_ids = [
+            account_id
+            for (account_id,) in db.session.query(TenantAccountJoin.account_id).filter_by(tenant_id=tenant.id).all()
+        ]
         db.session.query(TenantAccountJoin).filter_by(tenant_id=tenant.id).delete()
         db.session.delete(tenant)
         db.session.commit()
+        AccountService.invalidate_account_session(*member_ids)
 
     @staticmethod
     def get_custom_config(tenant_id: str) -> dict:
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from libs.batch_timestamp_updater import BatchTimestampUpdater
+from models.account import Tenant
+from models.model import ApiToken, App, EndUser
+
+logger = logging.getLogger(__name__)
+
+
+class ApiTokenAuthContext(BaseModel):
+    token_id: str
+    type: str
+    app_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+
+    def to_api_token(self) -> ApiToken:
+        """
+        Transient ApiToken carrying the cached columns, never added to a session
+        """
+        return ApiToken(id=self.token_id, type=self.type, app_id=self.app_id, tenant_id=self.tenant_id)
+
+
+class ApiTokenService:
+    """
+    Authentication context of the service API, cached so that a request with a known token does not query the
+    database for the token, the tenant or the end user.
+
+    Entries live in Redis for SERVICE_API_AUTH_CACHE_TTL seconds, and in a per process LRU for
+    SERVICE_API_AUTH_LOCAL_CACHE_TTL seconds in front of it. A revoked token is deleted from Redis and from the
+    LRU of the revoking process, the other processes accept it until their local entry expires.
+    Tenants are archived outside of the API, so nothing clears their cached status: an archived tenant is still
+    accepted until both of its entries expire, for up to SERVICE_API_AUTH_CACHE_TTL + SERVICE_API_AUTH_LOCAL_CACHE_TTL
+    seconds.
+
+    `last_used_at` is not written by the requests: token usage is collected in process and written by a
+    background thread every API_TOKEN_LAST_USED_FLUSH_INTERVAL seconds, in one batched update.
+    """
+
+    CACHE_PREFIX = "service_api_auth"
+
+    _local_cache: Optional[LRUCache] = None
+    _local_cache_lock = threading.Lock()
+    usage_updater = BatchTimestampUpdater(
+        ApiToken.last_used_at, interval=dify_config.API_TOKEN_LAST_USED_FLUSH_INTERVAL
+    )
+
+    @classmethod
+    def get_auth_context(cls, token: str, scope: Optional[str]) -> Optional[ApiTokenAuthContext]:
+        """
+        :return: None if the token does not exist
+        """
+
+        def load() -> Optional[dict]:
+            api_token = db.session.scalar(select(ApiToken).where(ApiToken.token == token, ApiToken.type == scope))
+            if api_token is None:
+                return None
+            return ApiTokenAuthContext(
+                token_id=api_token.id, type=api_token.type, app_id=api_token.app_id, tenant_id=api_token.tenant_id
+            ).model_dump()
+
+        data = cls._get_or_load(cls._token_cache_key(token, scope), load)
+        return ApiTokenAuthContext(**data) if data is not None else None
+
+    @classmethod
+    def get_tenant_status(cls, tenant_id: str) -> Optional[str]:
+        """
+        :return: None if the tenant does not exist
+        """
+
+        def load() -> Optional[dict]:
+            status = db.session.scalar(select(Tenant.status).where(Tenant.id == tenant_id))
+            return {"status": status} if status is not None else None
+
+        data = cls._get_or_load(f"{cls.CACHE_PREFIX}:tenant:{tenant_id}", load)
+        return data["status"] if data is not None else None
+
+    @classmethod
+    def get_end_user(cls, app_model: App, session_id: str) -> Optional[EndUser]:
+        """
+        Service API end user of a session, attached to the current session without querying it
+        """
+
+        def load() -> Optional[dict]:
+            end_user = db.session.scalar(
+                select(EndUser).where(
+                    EndUser.tenant_id == app_model.tenant_id,
+                    EndUser.app_id == app_model.id,
+                    EndUser.session_id == session_id,
+                    EndUser.type == "service_api",
+                )
+            )
+            return cls._dump_end_user(end_user) if end_user is not None else None
+
+        data = cls._get_or_load(cls._end_user_cache_key(app_model.id, session_id), load)
+        if data is None:
+            return None
+
+        # the columns not cached are expired and loaded on first access
+        end_user = EndUser(**data)
+        make_transient_to_detached(end_user)
+        return db.session.merge(end_user, load=False)
+
+    @classmethod
+    def set_end_user(cls, end_user: EndUser) -> None:
+        cls._set(cls._end_user_cache_key(end_user.app_id, end_user.session_id), cls._dump_end_user(end_user))
+
+    @classmethod
+    def invalidate_token(cls, token: str, scope: Optional[str]) -> None:
+        cache_key = cls._token_cache_key(token, scope)
+        local_cache = cls._get_local_cache()
+        with cls._local_cache_lock:
+            local_cache.cache.pop(cache_key, None)
+        try:
+            redis_client.delete(cache_key)
+        except Exception:
+            logger.exception(f"Failed to invalidate the cached api token {cache_key}")
+
+    @classmethod
+    def record_usage(cls, token_id: str) -> None:
+        """
+        Remember that a token was used, `last_used_at` is written by the next flush
+        """
+        cls.usage_updater.record(token_id)
+
+    @classmethod
+    def _get_or_load(cls, cache_key: str, load: Callable[[], Optional[dict]]) -> Optional[dict]:
+        local_cache = cls._get_local_cache()
+        with cls._local_cache_lock:
+            entry: Optional[tuple[float, dict]] = local_cache.get(cache_key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        data: Optional[dict] = None
+        try:
+            cached = redis_client.get(cache_key)
+            if cached is not None:
+                data = json.loads(cached)
+        except Exception:
+            logger.exception(f"Failed to read the service api auth cache {cache_key}")
+
+        if data is None:
+            data = load()
+            if data is None:
+                return None
+            cls._set(cache_key, data)
+        else:
+            cls._set_local(cache_key, data)
+        return data
+
+    @classmethod
+    def _set(cls, cache_key: str, data: dict) -> None:
+        cls._set_local(cache_key, data)
+        try:
+            redis_client.setex(cache_key, dify_config.SERVICE_API_AUTH_CACHE_TTL, json.dumps(data))
+        except Exception:
+            logger.exception(f"Failed to write the service api auth cache {cache_key}")
+
+    @classmethod
+    def _set_local(cls, cache_key: str, data: dict) -> None:
+        local_cache = cls._get_local_cache()
+        expire_at = time.monotonic() + dify_config.SERVICE_API_AUTH_LOCAL_CACHE_TTL
+        with cls._local_cache_lock:
+            local_cache.put(cache_key, (expire_at, data))
+
+    @classmethod
+    def _get_local_cache(cls) -> LRUCache:
+        if cls._local_cache is None:
+            with cls._local_cache_lock:
+                if cls._local_cache is None:
+                    cls._local_cache = LRUCache(dify_config.SERVICE_API_AUTH_LOCAL_CACHE_SIZE)
+        return cls._local_cache
+
+    @classmethod
+    def _token_cache_key(cls, token: str, scope: Optional[str]) -> str:
+        return f"{cls.CACHE_PREFIX}:token:{scope}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    @classmethod
+    def _end_user_cache_key(cls, app_id: str, session_id: str) -> str:
+        return f"{cls.CACHE_PREFIX}:end_user:{app_id}:{hashlib.sha256(session_id.encode()).hexdigest()}"
+
+    @staticmethod
+    def _dump_end_user(end_user: EndUser) -> dict[str, Any]:
+        return {
+            "id": end_user.id,
+            "tenant_id": end_user.tenant_id,
+            "app_id": end_user.app_id,
+            "type": end_user.type,
+            "external_user_id": end_user.external_user_id,
+            "name": end_user.name,
+            "is_anonymous": end_user.is_anonymous,
+            "session_id": end_user.session_id,
+        }
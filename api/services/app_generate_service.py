@@ -11,6 +11,7 @@ from core.app.apps.completion.app_generator import CompletionAppGenerator
 from core.app.apps.workflow.app_generator import WorkflowAppGenerator
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.features.rate_limiting import RateLimit
+from core.workflow.graph_engine.workflow_executor import WorkflowExecutor
 from models.model import Account, App, AppMode, EndUser
 from models.workflow import Workflow
 from services.errors.llm import InvokeRateLimitError
@@ -77,6 +78,7 @@ class AppGenerateService:
                 )
             elif app_model.mode == AppMode.ADVANCED_CHAT.value:
                 workflow = cls._get_workflow(app_model, invoke_from)
+                cls._check_workflow_admission()
                 return rate_limit.generate(
                     generator=AdvancedChatAppGenerator().generate(
                         app_model=app_model,
@@ -90,6 +92,7 @@ class AppGenerateService:
                 )
             elif app_model.mode == AppMode.WORKFLOW.value:
                 workflow = cls._get_workflow(app_model, invoke_from)
+                cls._check_workflow_admission()
                 generator = WorkflowAppGenerator().generate(
                     app_model=app_model,
                     workflow=workflow,
@@ -115,6 +118,11 @@ class AppGenerateService:
             if not streaming:
                 rate_limit.exit(request_id)
 
+    @staticmethod
+    def _check_workflow_admission() -> None:
+        if dify_config.WORKFLOW_EXECUTOR_ENABLED:
+            WorkflowExecutor.get_instance().check_admission(dify_config.WORKFLOW_EXECUTOR_MAX_QUEUE_SIZE)
+
     @staticmethod
     def _get_max_active_requests(app_model: App) -> int:
         max_active_requests = app_model.max_active_requests
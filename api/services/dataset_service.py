@@ -16,6 +16,7 @@ from core.errors.error import LLMBadRequestError, ProviderTokenNotInitError
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.retrieval.retrieval_cache import RetrievalCache
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from events.dataset_event import dataset_was_deleted
 from events.document_event import document_was_deleted
@@ -638,6 +639,7 @@ class DocumentService:
 
         db.session.delete(document)
         db.session.commit()
+        RetrievalCache.bump_dataset_version(document.dataset_id)
 
     @staticmethod
     def delete_documents(dataset: Dataset, document_ids: list[str]):
@@ -652,6 +654,7 @@ class DocumentService:
         for document in documents:
             db.session.delete(document)
         db.session.commit()
+        RetrievalCache.bump_dataset_version(dataset.id)
 
     @staticmethod
     def rename_document(dataset_id: str, document_id: str, name: str) -> Document:
@@ -1607,6 +1610,7 @@ class SegmentService:
                     segment.disabled_by = current_user.id
                     db.session.add(segment)
                     db.session.commit()
+                    RetrievalCache.bump_dataset_version(dataset.id)
                     # Set cache to prevent indexing the same segment multiple times
                     redis_client.setex(indexing_cache_key, 600, 1)
                     disable_segment_from_index_task.delay(segment.id)
@@ -1782,6 +1786,7 @@ class SegmentService:
         document.word_count -= segment.word_count
         db.session.add(document)
         db.session.commit()
+        RetrievalCache.bump_dataset_version(dataset.id)
 
     @classmethod
     def delete_segments(cls, segment_ids: list, document: Document, dataset: Dataset):
@@ -1800,6 +1805,7 @@ class SegmentService:
         delete_segment_from_index_task.delay(index_node_ids, dataset.id, document.id)
         db.session.query(DocumentSegment).filter(DocumentSegment.id.in_(segment_ids)).delete()
         db.session.commit()
+        RetrievalCache.bump_dataset_version(dataset.id)
 
     @classmethod
     def update_segments_status(cls, segment_ids: list, action: str, dataset: Dataset, document: Document):
@@ -1828,6 +1834,7 @@ class SegmentService:
                 db.session.add(segment)
                 real_deal_segmment_ids.append(segment.id)
             db.session.commit()
+            RetrievalCache.bump_dataset_version(dataset.id)
 
             enable_segments_to_index_task.delay(real_deal_segmment_ids, dataset.id, document.id)
         elif action == "disable":
@@ -1855,6 +1862,7 @@ class SegmentService:
                 db.session.add(segment)
                 real_deal_segmment_ids.append(segment.id)
             db.session.commit()
+            RetrievalCache.bump_dataset_version(dataset.id)
 
             disable_segments_from_index_task.delay(real_deal_segmment_ids, dataset.id, document.id)
         else:
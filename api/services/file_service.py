@@ -1,7 +1,8 @@
 import datetime
 import hashlib
 import uuid
-from typing import Any, Literal, Union
+from collections.abc import Generator
+from typing import IO, Any, Literal, Union
 
 from flask_login import current_user  # type: ignore
 from werkzeug.exceptions import NotFound
@@ -24,6 +25,7 @@ from models.model import EndUser, UploadFile
 from .errors.file import FileTooLargeError, UnsupportedFileTypeError
 
 PREVIEW_WORDS_LIMIT = 3000
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 class FileService:
@@ -31,7 +33,7 @@ class FileService:
     def upload_file(
         *,
         filename: str,
-        content: bytes,
+        content: Union[bytes, IO[bytes]],
         mimetype: str,
         user: Union[Account, EndUser, Any],
         source: Literal["datasets"] | None = None,
@@ -45,12 +47,13 @@ class FileService:
         if source == "datasets" and extension not in DOCUMENT_EXTENSIONS:
             raise UnsupportedFileTypeError()
 
-        # get file size
-        file_size = len(content)
+        if isinstance(content, bytes):
+            # get file size
+            file_size = len(content)
 
-        # check if the file size is exceeded
-        if not FileService.is_file_size_within_limit(extension=extension, file_size=file_size):
-            raise FileTooLargeError
+            # check if the file size is exceeded
+            if not FileService.is_file_size_within_limit(extension=extension, file_size=file_size):
+                raise FileTooLargeError
 
         # generate file key
         file_uuid = str(uuid.uuid4())
@@ -64,7 +67,25 @@ class FileService:
         file_key = "upload_files/" + (current_tenant_id or "") + "/" + file_uuid + "." + extension
 
         # save file to storage
-        storage.save(file_key, content)
+        if isinstance(content, bytes):
+            storage.save(file_key, content)
+            file_hash = hashlib.sha3_256(content).hexdigest()
+        else:
+            # the size limit is checked while streaming, the upload is aborted once it is exceeded
+            file_hasher = hashlib.sha3_256()
+            file_size = 0
+
+            def read_chunks() -> Generator[bytes, None, None]:
+                nonlocal file_size
+                while chunk := content.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if not FileService.is_file_size_within_limit(extension=extension, file_size=file_size):
+                        raise FileTooLargeError
+                    file_hasher.update(chunk)
+                    yield chunk
+
+            storage.save_stream(file_key, read_chunks())
+            file_hash = file_hasher.hexdigest()
 
         # save file to db
         upload_file = UploadFile(
@@ -79,7 +100,7 @@ class FileService:
             created_by=user.id,
             created_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
             used=False,
-            hash=hashlib.sha3_256(content).hexdigest(),
+            hash=file_hash,
             source_url=source_url,
         )
 
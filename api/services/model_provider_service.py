@@ -5,12 +5,12 @@ from pathlib import Path
 from typing import Optional, cast
 
 import requests
-from flask import current_app
 
 from core.entities.model_entities import ModelStatus, ModelWithProviderEntity, ProviderModelWithStatusEntity
 from core.model_runtime.entities.model_entities import ModelType, ParameterRule
 from core.model_runtime.model_providers import model_provider_factory
 from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+from core.model_runtime.model_providers.model_provider_snapshot import MODEL_PROVIDERS_PATH
 from core.provider_manager import ProviderManager
 from models.provider import ProviderType
 from services.entities.model_provider_entities import (
@@ -412,8 +412,7 @@ class ModelProviderService:
         :param lang: language (zh_Hans or en_US)
         :return:
         """
-        provider_instance = model_provider_factory.get_provider_instance(provider)
-        provider_schema = provider_instance.get_provider_schema()
+        provider_schema = model_provider_factory.get_provider_schema(provider)
         file_name: str | None = None
 
         if icon_type.lower() == "icon_small":
@@ -435,12 +434,7 @@ class ModelProviderService:
         if not file_name:
             return None, None
 
-        root_path = current_app.root_path
-        provider_instance_path = os.path.dirname(
-            os.path.join(root_path, provider_instance.__class__.__module__.replace(".", "/"))
-        )
-        file_path = os.path.join(provider_instance_path, "_assets")
-        file_path = os.path.join(file_path, file_name)
+        file_path = os.path.join(MODEL_PROVIDERS_PATH, provider, "_assets", file_name)
 
         if not os.path.exists(file_path):
             return None, None
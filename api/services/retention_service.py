@@ -0,0 +1,140 @@
+import datetime
+import json
+import logging
+import re
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple, Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+from services.feature_service import FeatureService
+
+logger = logging.getLogger(__name__)
+
+RetentionCursor = Optional[list[Any]]
+
+# high_value of an Oracle range partition, e.g. "TIMESTAMP' 2024-02-01 00:00:00'"
+PARTITION_HIGH_VALUE_PATTERN = re.compile(r"TIMESTAMP\s*'\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+
+class TablePartition(NamedTuple):
+    name: str
+    high_value: Optional[datetime.datetime]
+    interval: bool
+
+
+def parse_partition_high_value(high_value: Optional[str]) -> Optional[datetime.datetime]:
+    if not high_value:
+        return None
+    match = PARTITION_HIGH_VALUE_PATTERN.search(high_value)
+    if not match:
+        # MAXVALUE or an expression we do not understand, never treated as expired
+        return None
+    return datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+
+
+def get_expired_partitions(partitions: list[TablePartition], cutoff: datetime.datetime) -> list[TablePartition]:
+    """
+    Partitions whose rows are all older than the cutoff, a partition only holds rows created before its high value.
+    """
+    return [
+        partition for partition in partitions if partition.high_value is not None and partition.high_value <= cutoff
+    ]
+
+
+class TenantPlanResolver:
+    """
+    Resolve the billing plan of many tenants at once.
+    Plans are cached in Redis under the same `features:{tenant_id}` keys as the other cleanup tasks,
+    so a batch costs one MGET plus one FeatureService call per tenant missing from the cache.
+    """
+
+    CACHE_TTL = 600
+
+    def get_plans(self, tenant_ids: Iterable[str]) -> dict[str, str]:
+        tenant_ids = list(dict.fromkeys(tenant_ids))
+        if not tenant_ids:
+            return {}
+
+        plans: dict[str, str] = {}
+        cached_plans = redis_client.mget([f"features:{tenant_id}" for tenant_id in tenant_ids])
+        for tenant_id, plan_cache in zip(tenant_ids, cached_plans):
+            if plan_cache is not None:
+                plans[tenant_id] = plan_cache.decode()
+                continue
+
+            plan = FeatureService.get_features(tenant_id).billing.subscription.plan
+            redis_client.setex(f"features:{tenant_id}", self.CACHE_TTL, plan)
+            plans[tenant_id] = plan
+
+        return plans
+
+
+class BulkRetentionEngine:
+    """
+    Run a retention job batch by batch.
+
+    `process_batch` receives the cursor of the previous batch (None for the first one), deletes or updates
+    one batch of rows with set-based statements, commits, and returns the cursor of the last row it visited,
+    or None once there is nothing left. The cursor must be JSON serializable, datetimes are supported.
+
+    After each batch the cursor is checkpointed in Redis, so a run stopped by RETENTION_MAX_DURATION or by a
+    worker restart resumes where it left off. RETENTION_BATCH_INTERVAL throttles the job between batches to
+    bound the load on the database.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_duration: Optional[float] = None,
+        batch_interval: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.max_duration = dify_config.RETENTION_MAX_DURATION if max_duration is None else max_duration
+        self.batch_interval = dify_config.RETENTION_BATCH_INTERVAL if batch_interval is None else batch_interval
+        self._checkpoint_key = f"retention_checkpoint:{name}"
+
+    def run(self, process_batch: Callable[[RetentionCursor], RetentionCursor]) -> int:
+        """
+        Process batches until the job is done or the time budget is spent
+        :return: number of batches processed
+        """
+        start_at = time.perf_counter()
+        cursor = self._load_checkpoint()
+        if cursor is not None:
+            logger.info(f"Resuming retention job {self.name} from {cursor}")
+
+        batches = 0
+        while True:
+            cursor = process_batch(cursor)
+            if cursor is None:
+                redis_client.delete(self._checkpoint_key)
+                break
+
+            batches += 1
+            self._save_checkpoint(cursor)
+
+            if self.max_duration and time.perf_counter() - start_at >= self.max_duration:
+                logger.info(f"Retention job {self.name} reached its time budget, will resume from {cursor}")
+                break
+            if self.batch_interval:
+                time.sleep(self.batch_interval)
+
+        return batches
+
+    def _load_checkpoint(self) -> RetentionCursor:
+        checkpoint = redis_client.get(self._checkpoint_key)
+        if checkpoint is None:
+            return None
+        return [
+            datetime.datetime.fromisoformat(value["datetime"]) if isinstance(value, dict) else value
+            for value in json.loads(checkpoint)
+        ]
+
+    def _save_checkpoint(self, cursor: list[Any]) -> None:
+        checkpoint = [
+            {"datetime": value.isoformat()} if isinstance(value, datetime.datetime) else value for value in cursor
+        ]
+        redis_client.set(self._checkpoint_key, json.dumps(checkpoint))
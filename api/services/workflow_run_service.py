@@ -136,3 +136,21 @@ class WorkflowRunService:
         )
 
         return node_executions
+
+    def get_workflow_run_node_execution(
+        self, app_model: App, run_id: str, node_execution_id: str
+    ) -> Optional[WorkflowNodeExecution]:
+        """
+        Get workflow run node execution detail, the node execution list only returns previews of offloaded payloads
+        """
+        return (
+            db.session.query(WorkflowNodeExecution)
+            .filter(
+                WorkflowNodeExecution.tenant_id == app_model.tenant_id,
+                WorkflowNodeExecution.app_id == app_model.id,
+                WorkflowNodeExecution.triggered_from == WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value,
+                WorkflowNodeExecution.workflow_run_id == run_id,
+                WorkflowNodeExecution.id == node_execution_id,
+            )
+            .first()
+        )
@@ -326,9 +326,9 @@ class WorkflowService:
             )
             outputs = WorkflowEntry.handle_special_values(node_run_result.outputs) if node_run_result.outputs else None
 
-            workflow_node_execution.inputs = json.dumps(inputs)
-            workflow_node_execution.process_data = json.dumps(process_data)
-            workflow_node_execution.outputs = json.dumps(outputs)
+            workflow_node_execution.inputs = workflow_node_execution.dump_payload(inputs)
+            workflow_node_execution.process_data = workflow_node_execution.dump_payload(process_data)
+            workflow_node_execution.outputs = workflow_node_execution.dump_payload(outputs)
             workflow_node_execution.execution_metadata = (
                 json.dumps(jsonable_encoder(node_run_result.metadata)) if node_run_result.metadata else None
             )
@@ -1,3 +1,4 @@
+import gzip
 import json
 import logging
 
@@ -13,6 +14,23 @@ from models.model import Message
 from models.workflow import WorkflowRun
 
 
+def _load_trace_info(file_data: dict):
+    trace_info = file_data["trace_info"]
+    trace_info_type = file_data.get("trace_info_type", "")
+
+    if trace_info.get("message_data"):
+        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
+    if trace_info.get("workflow_data"):
+        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
+    if trace_info.get("documents"):
+        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+
+    trace_type = trace_info_info_map.get(trace_info_type)
+    if trace_type:
+        trace_info = trace_type(**trace_info)
+    return trace_info
+
+
 @shared_task(queue="ops_trace")
 def process_trace_tasks(file_info):
     """
@@ -27,24 +45,12 @@ def process_trace_tasks(file_info):
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
     file_data = json.loads(storage.load(file_path))
-    trace_info = file_data.get("trace_info")
-    trace_info_type = file_data.get("trace_info_type")
     trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
-    if trace_info.get("message_data"):
-        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
-    if trace_info.get("workflow_data"):
-        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
-    if trace_info.get("documents"):
-        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
-
     try:
         if trace_instance:
             with current_app.app_context():
-                trace_type = trace_info_info_map.get(trace_info_type)
-                if trace_type:
-                    trace_info = trace_type(**trace_info)
-                trace_instance.trace(trace_info)
+                trace_instance.trace(_load_trace_info(file_data))
         logging.info(f"Processing trace tasks success, app_id: {app_id}")
     except Exception:
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
@@ -52,3 +58,44 @@ def process_trace_tasks(file_info):
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
     finally:
         storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_batch_tasks(file_info):
+    """
+    Async process a batch of trace tasks of one app
+    :param file_info: app_id and file_id of a gzip compressed NDJSON file, one task data per line
+
+    Usage: process_trace_batch_tasks.delay(file_info)
+    """
+    from core.ops.ops_trace_manager import OpsTraceManager
+
+    app_id = file_info.get("app_id")
+    file_id = file_info.get("file_id")
+    file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.ndjson.gz"
+    failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
+    lines: list[str] = []
+
+    try:
+        lines = [line for line in gzip.decompress(storage.load(file_path)).decode("utf-8").split("\n") if line]
+        trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+        failed_count = 0
+        if trace_instance:
+            with current_app.app_context():
+                trace_infos = []
+                for line in lines:
+                    # a trace that can not be loaded is counted as failed, the others are still sent
+                    try:
+                        trace_infos.append(_load_trace_info(json.loads(line)))
+                    except Exception:
+                        failed_count += 1
+                        logging.exception(f"Loading trace failed, app_id: {app_id}")
+                failed_count += trace_instance.batch_trace(trace_infos)
+        if failed_count:
+            redis_client.incrby(failed_key, failed_count)
+        logging.info(f"Processing trace batch success, app_id: {app_id}, traces: {len(lines)}, failed: {failed_count}")
+    except Exception:
+        redis_client.incrby(failed_key, len(lines) or 1)
+        logging.exception(f"Processing trace batch failed, app_id: {app_id}")
+    finally:
+        storage.delete(file_path)
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from core.model_runtime.model_providers import model_provider_factory, model_provider_snapshot
+
+API_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def _write_snapshot(snapshot_path: str) -> None:
+    with patch.object(model_provider_snapshot, "SNAPSHOT_PATH", snapshot_path):
+        model_provider_snapshot.write_snapshot(
+            {
+                name: model_provider_factory.get_provider_schema(name)
+                for name in model_provider_factory._get_model_provider_map()
+            }
+        )
+
+
+BOOT_SCRIPT = """
+import resource
+from core.model_runtime.model_providers import model_provider_factory
+print(len(model_provider_factory.get_providers()), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+@pytest.fixture
+def snapshot():
+    """
+    Write the snapshot where the worker loads it from, and put back the snapshot it replaced
+    """
+    snapshot_path = Path(model_provider_snapshot.SNAPSHOT_PATH)
+    previous = snapshot_path.read_bytes() if snapshot_path.exists() else None
+
+    _write_snapshot(model_provider_snapshot.SNAPSHOT_PATH)
+    yield
+    if previous is None:
+        snapshot_path.unlink()
+    else:
+        snapshot_path.write_bytes(previous)
+
+
+@pytest.mark.parametrize("mode", ["snapshot", "scan"])
+def test_benchmark_worker_boot(benchmark, snapshot, mode):
+    """
+    Start a process which loads the model providers, as a worker does before serving its first request.
+    The peak memory of the process is reported in the extra info of the benchmark.
+    """
+    env = {**os.environ, "PYTHONPATH": API_PATH, "MODEL_PROVIDER_SNAPSHOT_ENABLED": str(mode == "snapshot").lower()}
+
+    def boot() -> str:
+        return subprocess.run(
+            [sys.executable, "-c", BOOT_SCRIPT],
+            cwd=API_PATH,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    output = benchmark.pedantic(boot, rounds=1, iterations=1)
+
+    providers, max_rss = output.split()[-2:]
+    benchmark.extra_info["providers"] = int(providers)
+    benchmark.extra_info["max_rss_mb"] = int(max_rss) // 1024
+    assert int(providers) > 0
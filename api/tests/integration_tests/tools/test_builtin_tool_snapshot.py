@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from core.tools.provider import builtin_tool_snapshot
+
+API_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    snapshot_path = str(tmp_path / "_snapshot.json")
+    with patch.object(builtin_tool_snapshot, "SNAPSHOT_PATH", snapshot_path):
+        yield snapshot_path
+
+
+BOOT_SCRIPT = """
+import sys
+from core.tools.provider import builtin_tool_snapshot
+builtin_tool_snapshot.SNAPSHOT_PATH = sys.argv[1]
+from core.tools.tool_manager import ToolManager
+ToolManager.load_builtin_providers_cache()
+print(len(ToolManager._builtin_providers))
+"""
+
+APP_BOOT_SCRIPT = """
+import sys
+from core.tools.provider import builtin_tool_snapshot
+builtin_tool_snapshot.SNAPSHOT_PATH = sys.argv[1]
+from app_factory import create_app
+create_app()
+from core.tools.tool_manager import ToolManager
+ToolManager.load_builtin_providers_cache()
+print(len(ToolManager._builtin_providers))
+"""
+
+
+@pytest.mark.parametrize("script", [BOOT_SCRIPT, APP_BOOT_SCRIPT], ids=["tool_manager", "create_app"])
+@pytest.mark.parametrize("mode", ["snapshot", "scan"])
+def test_benchmark_worker_boot(benchmark, tmp_path, snapshot_path, mode, script):
+    """
+    Start a process which imports the tool manager, or creates the app, and waits for the builtin providers,
+    as a worker does before serving its first request.
+    """
+    from core.tools.tool_manager import ToolManager
+
+    if mode == "snapshot":
+        ToolManager.write_builtin_providers_snapshot()
+        ToolManager.clear_builtin_providers_cache()
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": API_PATH,
+        "BUILTIN_TOOL_SNAPSHOT_ENABLED": str(mode == "snapshot").lower(),
+        # create_app initializes the storage, a local one keeps the benchmark free of external services
+        "STORAGE_TYPE": "opendal",
+        "OPENDAL_SCHEME": "fs",
+        "OPENDAL_FS_ROOT": str(tmp_path / "storage"),
+    }
+
+    def boot() -> str:
+        return subprocess.run(
+            [sys.executable, "-c", script, snapshot_path],
+            cwd=API_PATH,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    output = benchmark.pedantic(boot, rounds=1, iterations=1)
+
+    benchmark.extra_info["providers"] = int(output.split()[-1])
+    assert int(output.split()[-1]) > 0
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps.advanced_chat.generate_response_converter import AdvancedChatAppGenerateResponseConverter
+from core.app.apps.base_app_queue_manager import PublishFrom
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.apps.workflow.generate_response_converter import WorkflowAppGenerateResponseConverter
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueuePingEvent, QueueTextChunkEvent
+from core.app.entities.task_entities import (
+    ChatbotAppStreamResponse,
+    MessageEndStreamResponse,
+    MessageStreamResponse,
+    PingStreamResponse,
+    TextChunkStreamResponse,
+    WorkflowAppStreamResponse,
+)
+
+
+def _chatbot_stream(tokens: list[str]):
+    def wrap(stream_response):
+        return ChatbotAppStreamResponse(
+            stream_response=stream_response, conversation_id="conversation_id", message_id="message_id", created_at=1
+        )
+
+    for i, token in enumerate(tokens):
+        yield wrap(MessageStreamResponse(task_id="task_id", id="message_id", answer=token))
+        if i == 3:
+            yield wrap(PingStreamResponse(task_id="task_id"))
+    yield wrap(MessageEndStreamResponse(task_id="task_id", id="message_id"))
+
+
+def _events(window_ms: int, tokens: list[str]) -> list[str]:
+    with (
+        patch("configs.dify_config.APP_STREAM_COALESCE_WINDOW_MS", window_ms),
+        patch("configs.dify_config.APP_STREAM_COALESCE_MAX_BYTES", 64),
+    ):
+        return list(
+            AdvancedChatAppGenerateResponseConverter.convert(
+                _chatbot_stream(tokens), invoke_from=InvokeFrom.SERVICE_API
+            )
+        )
+
+
+def test_coalesced_stream_keeps_the_answer():
+    tokens = [f"token {i} " for i in range(40)]
+    per_token = _events(0, tokens)
+    coalesced = _events(30_000, tokens)
+
+    def answer(events: list[str]) -> str:
+        chunks = [json.loads(event.removeprefix("data: ")) for event in events if event.startswith("data: ")]
+        return "".join(chunk["answer"] for chunk in chunks if chunk["event"] == "message")
+
+    assert len(per_token) == len(tokens) + 2
+    assert len(coalesced) < len(per_token) // 4
+    assert answer(coalesced) == answer(per_token) == "".join(tokens)
+    # the ping flushes the pending text and keeps its position, the message end comes last
+    assert json.loads(coalesced[0].removeprefix("data: "))["answer"] == "".join(tokens[:4])
+    assert coalesced[1] == "event: ping\n\n"
+    assert json.loads(coalesced[-1].removeprefix("data: "))["event"] == "message_end"
+
+
+def test_coalesced_stream_without_orjson():
+    tokens = [f"token {i} " for i in range(10)]
+
+    with patch("core.app.apps.base_app_generate_response_converter.orjson", None):
+        events = _events(30_000, tokens)
+
+    assert json.loads(events[0].removeprefix("data: "))["answer"] == "".join(tokens[:4])
+
+
+def test_pending_text_is_flushed_at_the_end_of_the_window():
+    with (
+        patch("core.app.apps.base_app_queue_manager.redis_client", MagicMock(get=MagicMock(return_value=None))),
+        patch("core.app.apps.base_app_queue_manager.dify_config.APP_TASK_STOP_WATCHER_ENABLED", False),
+        patch("configs.dify_config.APP_STREAM_COALESCE_WINDOW_MS", 50),
+    ):
+        queue_manager = WorkflowAppQueueManager(
+            task_id="task_id", user_id="user", invoke_from=InvokeFrom.SERVICE_API, app_mode="workflow"
+        )
+
+        def slow_model():
+            queue_manager.publish(QueueTextChunkEvent(text="a"), PublishFrom.APPLICATION_MANAGER)
+            time.sleep(0.5)
+            queue_manager.publish(QueueTextChunkEvent(text="b"), PublishFrom.APPLICATION_MANAGER)
+            queue_manager.stop_listen()
+
+        def pipeline():
+            for message in queue_manager.listen():
+                if isinstance(message.event, QueuePingEvent):
+                    stream_response = PingStreamResponse(task_id="task_id")
+                else:
+                    data = TextChunkStreamResponse.Data(text=message.event.text)
+                    stream_response = TextChunkStreamResponse(task_id="task_id", workflow_run_id="run_id", data=data)
+                yield WorkflowAppStreamResponse(workflow_run_id="run_id", stream_response=stream_response)
+
+        model_thread = threading.Thread(target=slow_model)
+        start_at = time.perf_counter()
+        model_thread.start()
+        events = []
+        for event in WorkflowAppGenerateResponseConverter.convert(pipeline(), invoke_from=InvokeFrom.SERVICE_API):
+            events.append((time.perf_counter() - start_at, event))
+        model_thread.join()
+
+    texts = [(at, json.loads(event.removeprefix("data: "))["data"]["text"]) for at, event in events]
+    # the first delta is sent at the end of its window instead of with the next delta, the ping of the window is
+    # not sent to the client
+    assert [text for _, text in texts] == ["a", "b"]
+    assert texts[0][0] < 0.3
+
+
+@pytest.mark.parametrize("mode", ["coalesced", "per_token"])
+def test_benchmark_streamed_answer_events(benchmark, mode):
+    """
+    Convert a 20k characters answer streamed in tokens of 4 characters to SSE events.
+    The events per second and the bytes on the wire are reported in the extra info of the benchmark.
+    """
+    tokens = [f"{i % 1000:>3} " for i in range(5_000)]
+
+    events = benchmark.pedantic(lambda: _events(30 if mode == "coalesced" else 0, tokens), rounds=3, iterations=1)
+
+    benchmark.extra_info["events"] = len(events)
+    benchmark.extra_info["bytes"] = sum(len(event.encode()) for event in events)
+    if benchmark.stats:
+        benchmark.extra_info["answer_chars_per_second"] = round(20_000 / benchmark.stats.stats.mean)
+    assert len(events) > 1
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError, PublishFrom
+from core.app.apps.task_stop_watcher import TaskStopWatcher
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueuePingEvent, QueueStopEvent
+
+
+@pytest.fixture
+def redis():
+    store: dict[str, bytes] = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.mget.side_effect = lambda keys: [store.get(key) for key in keys]
+    redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, str(value).encode())
+    with (
+        patch("core.app.apps.base_app_queue_manager.redis_client", redis),
+        patch("core.app.apps.task_stop_watcher.redis_client", redis),
+        patch("core.app.apps.base_app_queue_manager.dify_config.APP_TASK_STOP_WATCHER_ENABLED", True),
+        patch.object(TaskStopWatcher, "_watcher", MagicMock()),
+    ):
+        yield redis
+
+
+def test_stop_flags_are_checked_in_one_batch(redis):
+    queue_managers = [
+        WorkflowAppQueueManager(
+            task_id=f"task_{i}", user_id="user", invoke_from=InvokeFrom.WEB_APP, app_mode="workflow"
+        )
+        for i in range(3)
+    ]
+    for queue_manager in queue_managers:
+        queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    redis.get.assert_not_called()
+
+    WorkflowAppQueueManager.set_stop_flag("task_1", InvokeFrom.WEB_APP, "user")
+    assert TaskStopWatcher.check() == 1
+    assert redis.mget.call_count == 1
+
+    # the listener gets the stop event without polling, the runner fails on its next event
+    messages = list(queue_managers[1].listen())
+    assert isinstance(messages[-1].event, QueueStopEvent)
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_managers[1].publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    queue_managers[0].publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+
+    for queue_manager in queue_managers:
+        TaskStopWatcher.unwatch(queue_manager._task_id)
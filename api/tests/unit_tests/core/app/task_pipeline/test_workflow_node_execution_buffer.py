@@ -0,0 +1,109 @@
+import threading
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from core.app.task_pipeline.workflow_node_execution_buffer import WorkflowNodeExecutionBuffer
+from models.workflow import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+
+
+def _make_execution() -> WorkflowNodeExecution:
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.id = str(uuid4())
+    workflow_node_execution.tenant_id = str(uuid4())
+    workflow_node_execution.node_id = "llm"
+    workflow_node_execution.status = WorkflowNodeExecutionStatus.RUNNING.value
+    return workflow_node_execution
+
+
+@pytest.fixture
+def mock_session():
+    with patch("core.app.task_pipeline.workflow_node_execution_buffer.Session") as session_cls:
+        session = MagicMock()
+        session_cls.return_value.__enter__.return_value = session
+        yield session
+
+
+def _executed_rows(session: MagicMock) -> list[list[dict]]:
+    return [call.args[1] for call in session.execute.call_args_list]
+
+
+def test_write_through_by_default(mock_session):
+    buffer = WorkflowNodeExecutionBuffer(engine=MagicMock())
+    execution = _make_execution()
+
+    buffer.add(execution)
+    assert mock_session.commit.call_count == 1
+
+    execution.status = WorkflowNodeExecutionStatus.SUCCEEDED.value
+    buffer.update(execution)
+    assert mock_session.commit.call_count == 2
+
+    insert_rows, update_rows = _executed_rows(mock_session)
+    assert insert_rows[0]["status"] == WorkflowNodeExecutionStatus.RUNNING.value
+    # server defaults are left to the database on insert
+    assert "elapsed_time" not in insert_rows[0]
+    assert update_rows[0]["id"] == execution.id
+    assert update_rows[0]["status"] == WorkflowNodeExecutionStatus.SUCCEEDED.value
+
+
+def test_unflushed_insert_is_merged_with_update(mock_session):
+    buffer = WorkflowNodeExecutionBuffer(engine=MagicMock(), batch_size=10)
+    executions = [_make_execution() for _ in range(3)]
+
+    for execution in executions:
+        buffer.add(execution)
+    executions[0].status = WorkflowNodeExecutionStatus.SUCCEEDED.value
+    buffer.update(executions[0])
+    mock_session.commit.assert_not_called()
+
+    buffer.flush()
+
+    assert mock_session.commit.call_count == 1
+    (insert_rows,) = _executed_rows(mock_session)
+    assert len(insert_rows) == 3
+    assert insert_rows[0]["status"] == WorkflowNodeExecutionStatus.SUCCEEDED.value
+
+
+def test_failed_flush_keeps_rows(mock_session):
+    buffer = WorkflowNodeExecutionBuffer(engine=MagicMock(), batch_size=10)
+    execution = _make_execution()
+    buffer.add(execution)
+
+    mock_session.commit.side_effect = RuntimeError("database unavailable")
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+
+    mock_session.commit.side_effect = None
+    mock_session.execute.reset_mock()
+    buffer.flush()
+
+    (insert_rows,) = _executed_rows(mock_session)
+    assert insert_rows[0]["id"] == execution.id
+
+
+def test_background_flush_on_batch_size(mock_session):
+    flushed = threading.Event()
+    mock_session.commit.side_effect = lambda: flushed.set()
+    buffer = WorkflowNodeExecutionBuffer(engine=MagicMock(), batch_size=2, flush_interval=60)
+
+    buffer.add(_make_execution())
+    assert not flushed.wait(0.1)
+
+    buffer.add(_make_execution())
+    assert flushed.wait(5)
+
+    buffer.close()
+    (insert_rows,) = _executed_rows(mock_session)
+    assert len(insert_rows) == 2
+
+
+def test_close_flushes_pending_rows(mock_session):
+    buffer = WorkflowNodeExecutionBuffer(engine=MagicMock(), batch_size=100, flush_interval=60)
+    buffer.add(_make_execution())
+    mock_session.commit.assert_not_called()
+
+    buffer.close()
+
+    assert mock_session.commit.call_count == 1
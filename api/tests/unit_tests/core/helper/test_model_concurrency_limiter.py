@@ -0,0 +1,138 @@
+import itertools
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from core.entities.provider_entities import ModelLoadBalancingConfiguration
+from core.helper.model_concurrency_limiter import ModelConcurrencyLimiter, ModelLatencyTracker
+from core.model_manager import ModelInstance
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.errors.invoke import InvokeRateLimitError
+
+
+def test_limiter_adapts_to_latency_and_rate_limits():
+    limiter = ModelConcurrencyLimiter(initial_limit=4, max_limit=8)
+
+    assert all(limiter.acquire(timeout=0) for _ in range(4))
+    assert not limiter.acquire(timeout=0.01)
+
+    # fast calls raise the limit by about one per round of calls
+    for _ in range(4):
+        limiter.release(latency=0.1)
+    limiter.acquire()
+    limiter.release(latency=0.1)
+    assert limiter.limit == 5
+
+    limiter.acquire()
+    limiter.release(latency=1.0)
+    assert limiter.limit == 4
+
+    limiter.acquire()
+    limiter.release(rate_limited=True)
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
+
+
+def test_limiter_queues_calls_over_the_limit():
+    limiter = ModelConcurrencyLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def call():
+        limiter.acquire(timeout=5)
+        acquired.set()
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    limiter.release(latency=0.1)
+    thread.join()
+    assert acquired.is_set()
+
+
+def test_limiters_and_trackers_are_bounded():
+    with (
+        patch.object(ModelConcurrencyLimiter, "_limiters", {}),
+        patch.object(ModelConcurrencyLimiter, "MAX_TRACKED_KEYS", 2),
+        patch.object(ModelLatencyTracker, "_trackers", {}),
+        patch.object(ModelLatencyTracker, "MAX_TRACKED_KEYS", 2),
+    ):
+        busy = ModelConcurrencyLimiter.get("a")
+        busy.acquire()
+        for key in ("b", "c", "d"):
+            ModelConcurrencyLimiter.get(key)
+            ModelLatencyTracker.get(key)
+        # the limiter with a call in flight is kept
+        assert list(ModelConcurrencyLimiter._limiters) == ["a", "d"]
+        assert ModelConcurrencyLimiter.get("a") is busy
+        assert list(ModelLatencyTracker._trackers) == ["c", "d"]
+
+
+def test_streamed_call_holds_its_slot_until_consumed():
+    limiter = ModelConcurrencyLimiter(initial_limit=2, max_limit=2)
+    limiter.acquire()
+
+    stream = limiter.release_after(iter(["a", "b"]), latency=0.1)
+    assert limiter.in_flight == 1
+    assert list(stream) == ["a", "b"]
+    assert limiter.in_flight == 0
+
+
+def _model_instance(configs: list[ModelLoadBalancingConfiguration]) -> ModelInstance:
+    model_instance = ModelInstance.__new__(ModelInstance)
+    model_instance.provider_model_bundle = MagicMock()
+    model_instance.provider_model_bundle.configuration.tenant_id = "tenant_id"
+    model_instance.provider = "openai"
+    model_instance.model = "text-embedding-3-small"
+    model_instance.credentials = {}
+    model_instance.model_type_instance = MagicMock()
+    model_instance.model_type_instance.model_type = ModelType.TEXT_EMBEDDING
+    model_instance.load_balancing_manager = MagicMock()
+    model_instance.load_balancing_manager.configs = configs
+    model_instance.load_balancing_manager.fetch_next.side_effect = itertools.cycle(configs).__next__
+    return model_instance
+
+
+def test_slow_idempotent_call_is_hedged_to_another_credential():
+    configs = [
+        ModelLoadBalancingConfiguration(id="slow", name="slow", credentials={"key": "slow"}),
+        ModelLoadBalancingConfiguration(id="fast", name="fast", credentials={"key": "fast"}),
+    ]
+    model_instance = _model_instance(configs)
+    tracker = ModelLatencyTracker.get("tenant_id:openai:text-embedding:text-embedding-3-small")
+    for _ in range(ModelLatencyTracker.MIN_SAMPLES):
+        tracker.observe(0.02)
+
+    def embed(texts: list[str], credentials: dict) -> str:
+        if credentials["key"] == "slow":
+            time.sleep(1)
+        return credentials["key"]
+
+    with patch("core.model_manager.dify_config.MODEL_HEDGING_ENABLED", True):
+        start = time.perf_counter()
+        result = model_instance._round_robin_invoke(embed, texts=["hello"], credentials={}, hedged=True)
+
+    assert result == "fast"
+    assert time.perf_counter() - start < 0.5
+
+
+def test_rate_limited_call_cools_down_and_retries():
+    configs = [
+        ModelLoadBalancingConfiguration(id="limited", name="limited", credentials={"key": "limited"}),
+        ModelLoadBalancingConfiguration(id="ok", name="ok", credentials={"key": "ok"}),
+    ]
+    model_instance = _model_instance(configs)
+
+    def invoke(credentials: dict) -> str:
+        if credentials["key"] == "limited":
+            raise InvokeRateLimitError()
+        return credentials["key"]
+
+    with patch("core.model_manager.dify_config.MODEL_CONCURRENCY_LIMIT_ENABLED", True):
+        assert model_instance._round_robin_invoke(invoke, credentials={}) == "ok"
+
+    model_instance.load_balancing_manager.cooldown.assert_called_once_with(configs[0], expire=60)
+    limiter = ModelConcurrencyLimiter.get("tenant_id:openai:text-embedding:text-embedding-3-small:limited")
+    assert limiter.in_flight == 0
+    assert limiter.limit < 16
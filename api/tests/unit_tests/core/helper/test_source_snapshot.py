@@ -0,0 +1,36 @@
+import json
+
+from core.helper.source_snapshot import get_source_fingerprint, load_source_snapshot, write_source_snapshot
+
+
+def test_fingerprint_covers_the_sources_of_dunder_packages(tmp_path):
+    (tmp_path / "__base").mkdir()
+    (tmp_path / "__base" / "model.py").write_text("a = 1")
+    (tmp_path / "__pycache__").mkdir()
+    fingerprint = get_source_fingerprint(str(tmp_path))
+
+    (tmp_path / "__pycache__" / "model.cpython-311.pyc").write_bytes(b"compiled")
+    (tmp_path / "_snapshot.json").write_text("{}")
+    assert get_source_fingerprint(str(tmp_path)) == fingerprint
+
+    (tmp_path / "__base" / "model.py").write_text("a = 10")
+    assert get_source_fingerprint(str(tmp_path)) != fingerprint
+
+
+def test_load_snapshot(tmp_path):
+    snapshot_path = str(tmp_path / "_snapshot.json")
+
+    def load(fingerprint: str):
+        return load_source_snapshot(
+            snapshot_path, lambda: fingerprint, lambda providers: providers, name="provider", command="build"
+        )
+
+    assert load("current") is None
+
+    write_source_snapshot(snapshot_path, {"fingerprint": "current", "providers": [{"name": "a"}]})
+    assert load("current") == [{"name": "a"}]
+    assert load("changed") is None
+
+    # an invalid snapshot is ignored
+    (tmp_path / "_snapshot.json").write_text(json.dumps({"fingerprint": "current"}))
+    assert load("current") is None
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_restful import marshal
+
+from core.helper import workflow_payload
+from models.workflow import WorkflowNodeExecution
+
+
+@pytest.fixture
+def mock_storage():
+    objects: dict[str, bytes] = {}
+    storage = MagicMock()
+    storage.save.side_effect = lambda key, data: objects.__setitem__(key, data)
+    storage.load_once.side_effect = lambda key: objects[key]
+    with (
+        patch("core.helper.workflow_payload.storage", storage),
+        patch.object(workflow_payload.dify_config, "WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD", 100),
+        patch.object(workflow_payload.dify_config, "WORKFLOW_PAYLOAD_PREVIEW_LENGTH", 10),
+    ):
+        yield storage
+
+
+def test_small_payload_is_kept_inline(mock_storage):
+    text = json.dumps({"text": "hello"})
+
+    assert workflow_payload.offload(text, tenant_id="tenant") == text
+    mock_storage.save.assert_not_called()
+
+
+def test_large_payload_is_offloaded(mock_storage):
+    payload = {"text": "a" * 200, "count": 1}
+    text = json.dumps(payload)
+
+    stored = workflow_payload.offload(text, tenant_id="tenant")
+
+    assert workflow_payload.is_offloaded(stored)
+    assert len(stored) < len(text)
+    (storage_key, data), _ = mock_storage.save.call_args
+    assert storage_key.startswith("workflow_payloads/tenant/")
+    assert data == text.encode("utf-8")
+    assert workflow_payload.preview(stored) == {"text": "a" * 10 + "...", "count": 1}
+    assert workflow_payload.loads(stored) == payload
+    # offloading a reference again is a no-op
+    assert workflow_payload.offload(stored, tenant_id="tenant") == stored
+
+
+def test_resolve_does_not_return_the_preview(mock_storage):
+    stored = workflow_payload.offload(json.dumps({"text": "a" * 200}), tenant_id="tenant")
+    mock_storage.load_once.side_effect = FileNotFoundError
+
+    with pytest.raises(workflow_payload.OffloadedPayloadLoadError):
+        workflow_payload.resolve(stored)
+
+
+def test_node_execution_list_returns_marked_previews(mock_storage):
+    from fields.workflow_run_fields import workflow_run_node_execution_list_item_fields
+
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.tenant_id = "tenant"
+    workflow_node_execution.inputs = workflow_node_execution.dump_payload({"text": "hello"})
+    workflow_node_execution.outputs = workflow_node_execution.dump_payload({"text": "a" * 200})
+
+    payload_fields = ("inputs", "process_data", "outputs", "truncated_payloads")
+    item = marshal(
+        workflow_node_execution, {name: workflow_run_node_execution_list_item_fields[name] for name in payload_fields}
+    )
+
+    assert item["inputs"] == {"text": "hello"}
+    assert item["outputs"] == {"text": "a" * 10 + "..."}
+    assert item["truncated_payloads"] == ["outputs"]
+    mock_storage.load_once.assert_not_called()
+
+
+def test_model_payload_is_loaded_lazily(mock_storage):
+    payload = {"text": "a" * 200}
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.tenant_id = "tenant"
+
+    workflow_node_execution.outputs = workflow_node_execution.dump_payload(payload)
+    assert workflow_payload.is_offloaded(workflow_node_execution.outputs)
+    # the instance that wrote the payload does not read it back from the storage
+    assert workflow_node_execution.outputs_dict == payload
+    mock_storage.load_once.assert_not_called()
+
+    loaded = WorkflowNodeExecution()
+    loaded.outputs = workflow_node_execution.outputs
+    assert loaded.outputs_dict == payload
+    assert loaded.outputs_dict == payload
+    assert mock_storage.load_once.call_count == 1
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.model_providers import model_provider_factory, model_provider_snapshot
+from core.model_runtime.model_providers.model_provider_factory import ModelProviderFactory
+
+
+def _write_snapshot(snapshot_path: str) -> None:
+    with patch.object(model_provider_snapshot, "SNAPSHOT_PATH", snapshot_path):
+        model_provider_snapshot.write_snapshot(
+            {
+                name: model_provider_factory.get_provider_schema(name)
+                for name in model_provider_factory._get_model_provider_map()
+            }
+        )
+
+
+def test_providers_are_built_once():
+    providers = model_provider_factory.get_providers()
+
+    assert model_provider_factory.get_providers() is providers
+    # the predefined models are not added again to the schemas of the providers
+    assert sum(len(provider.models) for provider in model_provider_factory.get_providers()) == sum(
+        len(provider.models) for provider in providers
+    )
+    assert not model_provider_factory.get_provider_instance("openai").get_provider_schema().models
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshot_path = str(tmp_path / "_snapshot.json")
+    _write_snapshot(snapshot_path)
+
+    with (
+        patch.object(model_provider_snapshot, "SNAPSHOT_PATH", snapshot_path),
+        patch("configs.dify_config.MODEL_PROVIDER_SNAPSHOT_ENABLED", True),
+    ):
+        factory = ModelProviderFactory()
+
+    providers = factory.get_providers()
+    assert [provider.model_dump() for provider in providers] == [
+        provider.model_dump() for provider in model_provider_factory.get_providers()
+    ]
+    assert all(extension.provider_instance is None for extension in factory._get_model_provider_map().values())
+    assert factory.get_models(provider="openai", model_type=ModelType.LLM)[0].models
+
+    # the provider is imported when it is first used
+    assert type(factory.get_provider_instance("openai")).__name__ == "OpenAIProvider"
+
+
+def test_outdated_snapshot_is_ignored(tmp_path):
+    snapshot_path = str(tmp_path / "_snapshot.json")
+    _write_snapshot(snapshot_path)
+
+    with (
+        patch.object(model_provider_snapshot, "SNAPSHOT_PATH", snapshot_path),
+        patch.object(model_provider_snapshot, "get_fingerprint", return_value="changed"),
+    ):
+        assert model_provider_snapshot.load_snapshot() is None
@@ -0,0 +1,110 @@
+import random
+import string
+
+import pytest
+
+from core.moderation.base import ModerationAction
+from core.moderation.keywords.keywords import KeywordsModeration
+from core.moderation.keywords.matcher import KeywordsMatcher, get_keywords_matcher
+
+
+def _moderation(keywords: str) -> KeywordsModeration:
+    return KeywordsModeration(
+        app_id="app",
+        tenant_id="tenant",
+        config={
+            "keywords": keywords,
+            "inputs_config": {"enabled": True, "preset_response": "blocked input"},
+            "outputs_config": {"enabled": True, "preset_response": "blocked output"},
+        },
+    )
+
+
+def test_matcher_finds_keywords_case_insensitively():
+    matcher = KeywordsMatcher(["he", "she", "hers", "Secret", ""])
+
+    assert matcher.match("USHERS")
+    assert matcher.match("top sEcReT")
+    assert not matcher.match("hash")
+    assert not matcher.match("")
+
+
+def test_matcher_finds_keyword_in_failure_path():
+    # "bcd" is only reachable through the failure link of "abce"
+    matcher = KeywordsMatcher(["abce", "bcd"])
+
+    assert matcher.match("abcd")
+    assert not matcher.match("abcf")
+
+
+def test_scanner_matches_keywords_split_across_tokens():
+    scanner = get_keywords_matcher("forbidden\nsecret").scanner()
+
+    assert not scanner.feed("this is a sec")
+    assert scanner.feed("ret plan")
+    # stays flagged once matched
+    assert scanner.feed("nothing else")
+
+
+def test_keywords_moderation():
+    moderation = _moderation("forbidden\n\nsecret")
+
+    inputs_result = moderation.moderation_for_inputs({"name": "a Secret name"})
+    assert inputs_result.flagged
+    assert inputs_result.preset_response == "blocked input"
+    assert not moderation.moderation_for_inputs({"name": "harmless"}, query="hello").flagged
+
+    assert moderation.moderation_for_outputs("it is FORBIDDEN").flagged
+    assert not moderation.moderation_for_outputs("it is allowed").flagged
+
+
+def test_keywords_outputs_scanner():
+    scanner = _moderation("forbidden\nsecret").create_outputs_scanner()
+    assert scanner is not None
+
+    assert not scanner.feed("the forbi").flagged
+    result = scanner.feed("dden word")
+    assert result.flagged
+    assert result.action == ModerationAction.DIRECT_OUTPUT
+    assert result.preset_response == "blocked output"
+
+
+def _streamed_answer(length: int, token_size: int) -> list[str]:
+    rng = random.Random(0)
+    text = "".join(rng.choice(string.ascii_lowercase + " ") for _ in range(length))
+    return [text[start : start + token_size] for start in range(0, length, token_size)]
+
+
+def _keywords(count: int) -> list[str]:
+    rng = random.Random(1)
+    return ["".join(rng.choice(string.digits) for _ in range(8)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("scan", ["incremental", "rescan"])
+def test_benchmark_streamed_answer_moderation(benchmark, scan):
+    """
+    Moderate a 50k characters answer streamed in tokens of 4 characters against 100 keywords.
+    `rescan` reproduces the previous behavior, the whole buffer is lowercased and searched for every keyword
+    each time MODERATION_BUFFER_SIZE characters were appended.
+    """
+    tokens = _streamed_answer(50_000, 4)
+    keywords = _keywords(100)
+    buffer_size = 300
+
+    def incremental() -> bool:
+        scanner = KeywordsMatcher(keywords).scanner()
+        return any(scanner.feed(token) for token in tokens)
+
+    def rescan() -> bool:
+        buffer = ""
+        reviewed_length = 0
+        for token in tokens:
+            buffer += token
+            if len(buffer) - reviewed_length >= buffer_size:
+                reviewed_length = len(buffer)
+                if any(keyword.lower() in buffer.lower() for keyword in keywords):
+                    return True
+        return False
+
+    flagged = benchmark.pedantic(incremental if scan == "incremental" else rescan, rounds=3, iterations=1)
+    assert not flagged
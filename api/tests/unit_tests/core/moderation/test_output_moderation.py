@@ -0,0 +1,59 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.moderation.keywords.keywords import KeywordsModeration
+from core.moderation.output_moderation import ModerationRule, OutputModeration
+
+
+@pytest.fixture
+def output_moderation():
+    rule = ModerationRule(
+        type="keywords",
+        config={
+            "keywords": "forbidden",
+            "inputs_config": {"enabled": False},
+            "outputs_config": {"enabled": True, "preset_response": "blocked"},
+        },
+    )
+    queue_manager = MagicMock(spec=AppQueueManager)
+    reviewed = threading.Event()
+    queue_manager.publish.side_effect = lambda *args, **kwargs: reviewed.set()
+
+    def moderation_factory(name, app_id, tenant_id, config):
+        return KeywordsModeration(app_id=app_id, tenant_id=tenant_id, config=config)
+
+    with (
+        patch("core.moderation.output_moderation.ModerationFactory", side_effect=moderation_factory),
+        patch("core.moderation.output_moderation.dify_config.MODERATION_BUFFER_SIZE", 10),
+        Flask(__name__).app_context(),
+    ):
+        yield OutputModeration(tenant_id="tenant", app_id="app", rule=rule, queue_manager=queue_manager), reviewed
+
+
+def test_flagged_output_is_replaced(output_moderation):
+    moderation, reviewed = output_moderation
+
+    for token in ["this is ", "a forb", "idden ", "word"]:
+        moderation.append_new_token(token)
+
+    assert reviewed.wait(timeout=5)
+    assert moderation.should_direct_output()
+    assert moderation.get_final_output() == "blocked"
+    (event, _), _ = moderation.queue_manager.publish.call_args
+    assert event.text == "blocked"
+
+
+def test_review_waits_for_buffer_size(output_moderation):
+    moderation, reviewed = output_moderation
+
+    # below MODERATION_BUFFER_SIZE, nothing is reviewed until the completion
+    moderation.append_new_token("forbidden")
+
+    assert not reviewed.wait(timeout=0.5)
+    assert not moderation.should_direct_output()
+    moderation.stop()
+    assert moderation.moderation_completion("forbidden") == "blocked"
@@ -0,0 +1,100 @@
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.ops import ops_trace_manager
+from core.ops.base_trace_instance import BaseTraceInstance
+from core.ops.entities.config_entity import OPS_TRACE_FAILED_KEY
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks import ops_trace_task
+
+
+@pytest.fixture
+def trace_queue_manager():
+    manager = TraceQueueManager.__new__(TraceQueueManager)
+    manager.flask_app = MagicMock()
+    with (
+        patch.object(ops_trace_manager.dify_config, "OPS_TRACE_BATCH_SIZE", 2),
+        patch.object(ops_trace_manager.dify_config, "OPS_TRACE_BATCH_FLUSH_INTERVAL", 60),
+        patch.dict(ops_trace_manager.trace_manager_pending_batches, clear=True),
+    ):
+        yield manager
+
+
+def _task(app_id: str, index: int):
+    task = MagicMock()
+    task.app_id = app_id
+    task.execute.return_value = MagicMock(model_dump=MagicMock(return_value={"index": index}))
+    return task
+
+
+def test_traces_are_exported_in_batches_per_app(trace_queue_manager):
+    saved_files: dict[str, bytes] = {}
+    with (
+        patch.object(ops_trace_manager, "storage") as storage,
+        patch.object(ops_trace_manager, "process_trace_batch_tasks") as process_trace_batch_tasks,
+    ):
+        storage.save.side_effect = lambda path, data: saved_files.__setitem__(path, data)
+        trace_queue_manager.send_batches_to_celery([_task("app1", 0), _task("app2", 1), _task("app1", 2)])
+
+        # app1 filled a batch, app2 waits for more traces or the flush interval
+        assert process_trace_batch_tasks.delay.call_count == 1
+        (file_info,), _ = process_trace_batch_tasks.delay.call_args
+        assert file_info["app_id"] == "app1"
+        (file_path, data) = next(iter(saved_files.items()))
+        assert file_path == f"ops_trace/app1/{file_info['file_id']}.ndjson.gz"
+        lines = gzip.decompress(data).decode("utf-8").split("\n")
+        assert [json.loads(line)["trace_info"] for line in lines] == [{"index": 0}, {"index": 2}]
+        assert list(ops_trace_manager.trace_manager_pending_batches) == ["app2"]
+
+        with patch.object(ops_trace_manager.dify_config, "OPS_TRACE_BATCH_FLUSH_INTERVAL", 0):
+            trace_queue_manager.send_batches_to_celery([])
+
+        assert process_trace_batch_tasks.delay.call_count == 2
+        (file_info,), _ = process_trace_batch_tasks.delay.call_args
+        assert file_info["app_id"] == "app2"
+        assert not ops_trace_manager.trace_manager_pending_batches
+
+
+class FakeTraceInstance(BaseTraceInstance):
+    def __init__(self):
+        self.traced: list = []
+        self.flushed = 0
+
+    def trace(self, trace_info):
+        if trace_info == "bad":
+            raise ValueError("bad trace")
+        self.traced.append(trace_info)
+
+    def flush(self):
+        self.flushed += 1
+
+
+def test_batch_trace_counts_failures_and_flushes_once():
+    trace_instance = FakeTraceInstance()
+
+    assert trace_instance.batch_trace(["a", "bad", "b"]) == 1
+    assert trace_instance.traced == ["a", "b"]
+    assert trace_instance.flushed == 1
+
+
+def test_corrupt_trace_does_not_drop_the_batch():
+    trace_instance = FakeTraceInstance()
+    lines = [json.dumps({"trace_info": {"index": 0}}), "{corrupt", json.dumps({"trace_info_type": "missing"})]
+    lines.append(json.dumps({"trace_info": {"index": 1}}))
+
+    redis_client = MagicMock()
+    with (
+        patch.object(ops_trace_task, "storage") as storage,
+        patch.object(ops_trace_task, "redis_client", redis_client),
+        patch.object(ops_trace_task, "current_app", MagicMock()),
+        patch.object(ops_trace_manager.OpsTraceManager, "get_ops_trace_instance", return_value=trace_instance),
+    ):
+        storage.load.return_value = gzip.compress("\n".join(lines).encode("utf-8"))
+        ops_trace_task.process_trace_batch_tasks({"app_id": "app", "file_id": "file"})
+
+    assert trace_instance.traced == [{"index": 0}, {"index": 1}]
+    redis_client.incrby.assert_called_once_with(f"{OPS_TRACE_FAILED_KEY}_app", 2)
+    storage.delete.assert_called_once()
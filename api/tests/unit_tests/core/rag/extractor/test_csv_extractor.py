@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from core.rag.extractor import csv_extractor
+from core.rag.extractor.csv_extractor import CSVExtractor
+from core.rag.extractor.entity.extract_setting import ExtractSetting
+from core.rag.extractor.extract_processor import ExtractProcessor
+
+
+def test_extract_iter_reads_in_chunks(tmp_path):
+    file_path = tmp_path / "data.csv"
+    file_path.write_text("name,age\n" + "".join(f"user{i},{i}\n" for i in range(25)))
+
+    with patch.object(csv_extractor, "CSV_READ_CHUNK_SIZE", 10):
+        docs = CSVExtractor(str(file_path)).extract_iter()
+        first = next(docs)
+        rest = list(docs)
+
+    assert first.page_content == "name: user0;age: 0"
+    assert [doc.metadata["row"] for doc in [first, *rest]] == list(range(25))
+    assert CSVExtractor(str(file_path)).extract() == [first, *rest]
+
+
+def test_extract_iter_retries_with_detected_encoding(tmp_path):
+    file_path = tmp_path / "data.csv"
+    rows = ["name,city\n"] + [f"user{i},Paris\n" for i in range(15)] + ["user15,Zürich\n"]
+    file_path.write_bytes("".join(rows).encode("latin-1"))
+
+    with patch.object(csv_extractor, "CSV_READ_CHUNK_SIZE", 10):
+        docs = list(CSVExtractor(str(file_path), encoding="utf-8", autodetect_encoding=True).extract_iter())
+
+    # rows yielded before the decoding error are not repeated
+    assert len(docs) == 16
+    assert docs[-1].page_content == "name: user15;city: Zürich"
+
+
+def test_extract_processor_streams_documents(tmp_path):
+    file_path = tmp_path / "data.csv"
+    file_path.write_text("name\nuser0\nuser1\n")
+    extract_setting = ExtractSetting(datasource_type="upload_file", document_model="text_model")
+
+    docs = ExtractProcessor.extract_iter(extract_setting, file_path=str(file_path))
+
+    assert next(docs).page_content == "name: user0"
+    assert [doc.page_content for doc in docs] == ["name: user1"]
@@ -0,0 +1,53 @@
+import zipfile
+
+from openpyxl import Workbook
+
+from core.rag.extractor.excel_extractor import ExcelExtractor
+
+
+def test_xlsx_rows_and_hyperlinks(tmp_path):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["name", "url", "count"])
+    sheet.append(["a", "link", 1])
+    sheet["B2"].hyperlink = "https://example.com/a"
+    sheet.append([None, None, None])
+    sheet.append(["b", None, 2])
+    other_sheet = wb.create_sheet("other")
+    other_sheet.append(["title"])
+    other_sheet.append(["c"])
+    other_sheet["A2"].hyperlink = "https://example.com/c"
+    wb.create_sheet("empty")
+    file_path = str(tmp_path / "test.xlsx")
+    wb.save(file_path)
+
+    documents = ExcelExtractor(file_path).extract_iter()
+
+    assert [document.page_content for document in documents] == [
+        '"name":"a";"url":"[link](https://example.com/a)";"count":"1"',
+        '"name":"b";"count":"2"',
+        '"title":"[c](https://example.com/c)"',
+    ]
+
+
+def test_xlsx_hyperlinks_of_relative_sheet_paths(tmp_path):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["url"])
+    sheet.append(["link"])
+    sheet["A2"].hyperlink = "https://example.com"
+    saved_path = tmp_path / "saved.xlsx"
+    wb.save(saved_path)
+
+    # openpyxl references the worksheets from the root of the package, Excel from the workbook
+    file_path = str(tmp_path / "test.xlsx")
+    with zipfile.ZipFile(saved_path) as src, zipfile.ZipFile(file_path, "w") as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == "xl/_rels/workbook.xml.rels":
+                data = data.replace(b'Target="/xl/worksheets/', b'Target="worksheets/')
+            dst.writestr(name, data)
+
+    documents = ExcelExtractor(file_path).extract_iter()
+
+    assert [document.page_content for document in documents] == ['"url":"[link](https://example.com)"']
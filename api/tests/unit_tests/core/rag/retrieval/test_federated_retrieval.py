@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.models.document import Document
+from core.rag.retrieval.federated_retrieval import merge_top_k, select_rerank_candidates, share_query_embedding
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
+
+
+def _documents(*scores: float, dataset: str = "dataset") -> list[Document]:
+    return [
+        Document(page_content=f"{dataset}-{score}", metadata={"doc_id": f"{dataset}-{score}", "score": score})
+        for score in scores
+    ]
+
+
+def _contents(documents: list[Document]) -> list[str]:
+    return [document.page_content for document in documents]
+
+
+def test_merge_top_k():
+    dataset_documents = [
+        _documents(0.9, 0.5, 0.2, dataset="a"),
+        _documents(0.3, 0.8, dataset="b"),
+        _documents(0.4, 0.1, dataset="c"),
+        [],
+    ]
+
+    assert _contents(merge_top_k(dataset_documents, top_k=3)) == ["a-0.9", "b-0.8", "a-0.5"]
+    assert _contents(merge_top_k(dataset_documents, top_k=10, score_threshold=0.45)) == ["a-0.9", "b-0.8", "a-0.5"]
+    assert merge_top_k([_documents(0.2), _documents(0.1)], top_k=2, score_threshold=0.5) == []
+    assert len(merge_top_k(dataset_documents, top_k=0)) == 7
+
+
+def test_select_rerank_candidates_normalizes_scores_per_dataset():
+    # keyword scores of dataset b are on another scale, its best document still competes with a's best
+    dataset_documents = [_documents(0.9, 0.45, dataset="a"), _documents(12.0, 3.0, dataset="b")]
+
+    assert _contents(select_rerank_candidates(dataset_documents, limit=3)) == ["a-0.9", "b-12.0", "a-0.45"]
+
+
+def _high_quality_dataset(model: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        provider="vendor",
+        indexing_technique="high_quality",
+        tenant_id="tenant",
+        embedding_model_provider="openai",
+        embedding_model=model,
+    )
+
+
+def test_query_is_embedded_once_per_shared_embedding_model():
+    model_instance = MagicMock(provider="openai", model="text-embedding-3-small")
+    model_instance.invoke_text_embedding.return_value = MagicMock(embeddings=[[3.0, 4.0]])
+    datasets = [_high_quality_dataset("text-embedding-3-small") for _ in range(3)]
+
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+
+    with (
+        patch("core.rag.retrieval.federated_retrieval.ModelManager") as model_manager,
+        patch("core.rag.embedding.cached_embedding.redis_client", redis_client),
+    ):
+        model_manager.return_value.get_model_instance.return_value = model_instance
+
+        with share_query_embedding(datasets, "query"):
+            vectors = RetrievalExecutor.run(
+                [lambda: CacheEmbedding(model_instance).embed_query("query") for _ in datasets]
+            )
+
+    assert vectors == [[0.6, 0.8]] * 3
+    assert model_instance.invoke_text_embedding.call_count == 1
+    assert redis_client.get.call_count == 1
@@ -0,0 +1,111 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.models.document import ChildDocument, Document
+from core.rag.retrieval.retrieval_cache import RetrievalCache
+
+CONFIG = {"retrieval_method": "semantic_search", "top_k": 4, "score_threshold": 0.0}
+
+
+@pytest.fixture
+def redis():
+    store: dict[str, bytes] = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value.encode())
+    redis.incr.side_effect = lambda key: store.__setitem__(key, str(int(store.get(key, 0)) + 1).encode())
+    with patch("core.rag.retrieval.retrieval_cache.redis_client", redis):
+        yield redis
+
+
+def test_key_shared_by_normalized_queries_and_changed_by_version(redis):
+    key = RetrievalCache.get_key("dataset", "What is  Dify?", CONFIG)
+
+    assert RetrievalCache.get_key("dataset", " what is dify? ", CONFIG) == key
+    assert RetrievalCache.get_key("dataset", "What is Dify?", {**CONFIG, "top_k": 5}) != key
+    assert RetrievalCache.get_key("other", "What is Dify?", CONFIG) != key
+
+    RetrievalCache.bump_dataset_version("dataset")
+
+    assert RetrievalCache.get_key("dataset", "What is Dify?", CONFIG) != key
+
+
+def test_get_and_set(redis):
+    documents = [
+        Document(
+            page_content="answer",
+            vector=[0.1, 0.2],
+            metadata={"doc_id": "1", "score": 0.9},
+            children=[ChildDocument(page_content="child", vector=[0.3], metadata={"doc_id": "2"})],
+        )
+    ]
+    key = RetrievalCache.get_key("dataset", "question", CONFIG)
+    metrics = RetrievalCache.metrics()
+
+    assert RetrievalCache.get(key) is None
+    RetrievalCache.set(key, documents)
+    cached = RetrievalCache.get(key)
+
+    assert cached is not None
+    assert cached[0].page_content == "answer"
+    assert cached[0].metadata == {"doc_id": "1", "score": 0.9}
+    assert cached[0].vector is None
+    assert cached[0].children is not None
+    assert cached[0].children[0].vector is None
+    assert redis.setex.call_args[0][1] == 600
+
+    after = RetrievalCache.metrics()
+    assert (after.hits - metrics.hits, after.misses - metrics.misses, after.stores - metrics.stores) == (1, 1, 1)
+
+
+def test_oversized_results_are_not_cached(redis):
+    key = RetrievalCache.get_key("dataset", "question", CONFIG)
+    oversized = RetrievalCache.metrics().oversized
+
+    with patch("core.rag.retrieval.retrieval_cache.dify_config.RETRIEVAL_CACHE_MAX_ENTRY_SIZE", 10):
+        RetrievalCache.set(key, [Document(page_content="a long answer")])
+
+    redis.setex.assert_not_called()
+    assert RetrievalCache.metrics().oversized == oversized + 1
+
+
+def test_redis_errors_count_as_miss(redis):
+    redis.get.side_effect = ConnectionError()
+
+    assert RetrievalCache.get_key("dataset", "question", CONFIG) is None
+    assert RetrievalCache.get("retrieval_cache:dataset:0:config:query") is None
+
+
+def test_is_enabled():
+    with (
+        patch("core.rag.retrieval.retrieval_cache.dify_config.RETRIEVAL_CACHE_ENABLED", True),
+        patch("core.rag.retrieval.retrieval_cache.dify_config.RETRIEVAL_CACHE_DISABLED_APP_IDS", "opted-out, other"),
+    ):
+        assert RetrievalCache.is_enabled("app")
+        assert not RetrievalCache.is_enabled("opted-out")
+        assert not RetrievalCache.is_enabled(None)
+
+    with patch("core.rag.retrieval.retrieval_cache.dify_config.RETRIEVAL_CACHE_ENABLED", False):
+        assert not RetrievalCache.is_enabled("app")
+
+
+def test_metrics_are_logged(redis, caplog):
+    with caplog.at_level("INFO", logger="core.rag.retrieval.retrieval_cache"):
+        threading.Thread(target=RetrievalCache._log_metrics, args=(0.01,), daemon=True).start()
+        time.sleep(0.05)
+        key = RetrievalCache.get_key("dataset", "query", CONFIG)
+        RetrievalCache.get(key)
+        RetrievalCache.set(key, [Document(page_content="answer", metadata={"doc_id": "1"})])
+        RetrievalCache.get(key)
+        for _ in range(100):
+            if caplog.records:
+                break
+            time.sleep(0.01)
+
+    message = caplog.records[0].getMessage()
+    assert "'hits':" in message
+    assert "'misses':" in message
+    assert "hit ratio" in message
@@ -0,0 +1,157 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor, RetrievalTimeoutError
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+
+
+@pytest.fixture(autouse=True)
+def executor_config():
+    with (
+        patch.object(RetrievalExecutor, "_executor", None),
+        patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_EXECUTOR_MAX_WORKERS", 2),
+        patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_MAX_CONCURRENCY_PER_REQUEST", 3),
+        patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_TIMEOUT", 0),
+    ):
+        yield
+
+
+def test_results_keep_task_order_and_context():
+    request_id.set("request-1")
+
+    def task(index: int):
+        time.sleep(0.01 * (5 - index))
+        return index, request_id.get()
+
+    results = RetrievalExecutor.run([lambda index=index: task(index) for index in range(5)])
+
+    assert results == [(index, "request-1") for index in range(5)]
+
+
+def test_concurrency_is_limited_per_fan_out():
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    RetrievalExecutor.run([task] * 8)
+
+    assert max_running <= 3
+
+
+def test_exceptions():
+    def fail():
+        raise ValueError("search failed")
+
+    with pytest.raises(ValueError, match="search failed"):
+        RetrievalExecutor.run([lambda: 1, fail])
+
+    results = RetrievalExecutor.run([lambda: 1, fail], return_exceptions=True)
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+
+
+def test_nested_fan_outs_do_not_deadlock_a_saturated_pool():
+    def dataset_retrieval(index: int):
+        return sum(RetrievalExecutor.run([lambda: index, lambda: index, lambda: index]))
+
+    results = RetrievalExecutor.run([lambda index=index: dataset_retrieval(index) for index in range(6)], timeout=10)
+
+    assert results == [index * 3 for index in range(6)]
+    assert RetrievalExecutor.metrics().queue_depth == 0
+
+
+def test_nested_fan_outs_with_a_deadline_run_inline_on_the_workers():
+    inline_searches = []
+
+    def search(index: int, dataset_thread: threading.Thread):
+        inline_searches.append(threading.current_thread() is dataset_thread)
+        time.sleep(0.01)
+        return index
+
+    def dataset_retrieval(index: int):
+        dataset_thread = threading.current_thread()
+        return sum(RetrievalExecutor.run([lambda: search(index, dataset_thread)] * 3))
+
+    def request():
+        return RetrievalExecutor.run([lambda index=index: dataset_retrieval(index) for index in range(4)])
+
+    # concurrent multi dataset retrievals fill the 2 workers with dataset retrievals waiting for their searches
+    with patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_TIMEOUT", 5):
+        start_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=3) as requests:
+            results = [future.result() for future in [requests.submit(request) for _ in range(3)]]
+        elapsed = time.perf_counter() - start_at
+
+    assert results == [[index * 3 for index in range(4)]] * 3
+    assert elapsed < 2
+    assert all(inline_searches)
+    assert RetrievalExecutor.metrics().queue_depth == 0
+
+
+def test_nested_fan_outs_share_the_deadline():
+    searches = []
+
+    def search():
+        searches.append(1)
+        time.sleep(0.1)
+
+    def dataset_retrieval():
+        return RetrievalExecutor.run([search] * 5)
+
+    with patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_TIMEOUT", 10):
+        with pytest.raises(RetrievalTimeoutError):
+            RetrievalExecutor.run([dataset_retrieval], timeout=0.25)
+        time.sleep(0.5)
+
+    # the searches stop at the deadline of the outer fan-out instead of running for a fresh RETRIEVAL_TIMEOUT
+    assert len(searches) == 3
+
+
+def test_timeout():
+    release = threading.Event()
+
+    with pytest.raises(RetrievalTimeoutError):
+        RetrievalExecutor.run([lambda: release.wait(5), lambda: release.wait(5)], timeout=0.1)
+
+    release.set()
+
+
+@pytest.mark.parametrize("timeout", [0, 10])
+def test_finished_slots_are_refilled(timeout):
+    threads = []
+
+    def task():
+        threads.append(threading.current_thread())
+        time.sleep(0.1)
+
+    with (
+        patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_EXECUTOR_MAX_WORKERS", 4),
+        patch("core.rag.retrieval.retrieval_executor.dify_config.RETRIEVAL_MAX_CONCURRENCY_PER_REQUEST", 4),
+    ):
+        start_at = time.perf_counter()
+        RetrievalExecutor.run([task] * 10, timeout=timeout)
+        elapsed = time.perf_counter() - start_at
+
+    # 3 waves of 4 tasks, running the tasks left after the first wave one by one would take 0.8s
+    assert elapsed < 0.6
+    inline = threads.count(threading.current_thread())
+    if timeout:
+        # with a deadline the request thread only waits
+        assert inline == 0
+    else:
+        assert inline <= 3
@@ -1,11 +1,15 @@
+import json
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 import redis
 
 from core.entities.provider_entities import ModelLoadBalancingConfiguration
-from core.model_manager import LBModelManager
+from core.helper.model_lb_scheduler import ModelLBScheduler
+from core.model_manager import LBModelManager, ModelInstance
 from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.errors.invoke import InvokeRateLimitError
 from extensions.ext_redis import redis_client
 
 
@@ -70,3 +74,161 @@ def test_lb_model_manager_fetch_next(mocker, lb_model_manager):
 
         config = lb_model_manager.fetch_next()
         assert config == config3
+
+
+@pytest.fixture
+def listening_scheduler():
+    """Local cooldown state as if the cooldown channel was subscribed, with a Redis mock counting calls."""
+    redis = MagicMock()
+    redis.pipeline.return_value.execute.return_value = [-2, 30, -2]
+    with (
+        patch("core.helper.model_lb_scheduler.redis_client", redis),
+        patch.object(ModelLBScheduler, "_listener", MagicMock()),
+        patch.object(ModelLBScheduler, "_listening", True),
+        patch.object(ModelLBScheduler, "_cooldowns", {}),
+        patch.object(ModelLBScheduler, "_latencies", {}),
+        patch.object(ModelLBScheduler, "_synced_models", {}),
+    ):
+        yield redis
+
+
+def _manager(model: str) -> LBModelManager:
+    return LBModelManager(
+        tenant_id="tenant_id",
+        provider="openai",
+        model_type=ModelType.LLM,
+        model=model,
+        load_balancing_configs=[
+            ModelLoadBalancingConfiguration(id=f"id{i}", name=f"config{i}", credentials={}) for i in range(3)
+        ],
+    )
+
+
+def test_lb_cooldowns_are_synced_once_and_kept_in_process(listening_scheduler):
+    manager = _manager("gpt-4-cooldown")
+
+    # id1 is in cooldown in Redis, set by another process before this one subscribed
+    picked = [manager.fetch_next() for _ in range(4)]
+    assert [config.id for config in picked if config] == ["id0", "id2", "id0", "id2"]
+    assert listening_scheduler.pipeline.call_count == 1
+    listening_scheduler.exists.assert_not_called()
+
+    manager.cooldown(picked[0], expire=60)
+    assert [manager.fetch_next().id for _ in range(2)] == ["id2", "id2"]
+    listening_scheduler.publish.assert_called_once()
+
+    # a cooldown announced by another process
+    ModelLBScheduler._on_message(
+        {"data": json.dumps({"key": manager._get_cooldown_cache_key(picked[1]), "expire": 10})}
+    )
+    assert manager.fetch_next() is None
+
+
+def test_lb_least_latency(listening_scheduler):
+    manager = _manager("gpt-4-latency")
+    configs = manager._load_balancing_configs
+
+    with patch("core.model_manager.dify_config.MODEL_LB_STRATEGY", "least_latency"):
+        # configs without observed latency are tried first, id1 is in cooldown
+        assert manager.fetch_next() == configs[0]
+        manager.observe_latency(configs[0], 2.0)
+        assert manager.fetch_next() == configs[2]
+        manager.observe_latency(configs[2], 0.5)
+        assert manager.fetch_next() == configs[2]
+
+        for _ in range(10):
+            manager.observe_latency(configs[2], 5.0)
+        assert manager.fetch_next() == configs[0]
+
+
+def test_lb_state_is_bounded(listening_scheduler):
+    with (
+        patch.object(ModelLBScheduler, "_counters", {}),
+        patch.object(ModelLBScheduler, "MAX_TRACKED_KEYS", 2),
+        patch.object(ModelLBScheduler, "_cooldowns_pruned_at", 0.0),
+    ):
+        for key in ("a", "b", "c"):
+            ModelLBScheduler.next_index(key)
+            ModelLBScheduler.observe_latency(key, 1.0)
+            ModelLBScheduler.sync_cooldowns(key, [f"cooldown_{key}"])
+        assert list(ModelLBScheduler._counters) == ["b", "c"]
+        assert list(ModelLBScheduler._latencies) == ["b", "c"]
+        assert list(ModelLBScheduler._synced_models) == ["b", "c"]
+
+        ModelLBScheduler._cooldowns["expired"] = time.time() - 1
+        ModelLBScheduler.cooldown("active", expire=60)
+        assert list(ModelLBScheduler._cooldowns) == ["active"]
+
+
+@pytest.mark.parametrize("subscribed", [True, False], ids=["subscribed", "unsubscribed"])
+def test_benchmark_lb_fetch_next(benchmark, subscribed):
+    """
+    Pick the config of 500 load balanced calls with a Redis round trip of 0.2 ms.
+    Without the cooldown subscription, e.g. while it reconnects, the cooldown of the picked config is checked
+    with an EXISTS on every call, as all calls did before the cooldowns were kept in process.
+    """
+    round_trips = 0
+
+    def round_trip(*args, **kwargs):
+        nonlocal round_trips
+        round_trips += 1
+        time.sleep(0.0002)
+        return 0
+
+    redis = MagicMock()
+    redis.exists.side_effect = round_trip
+    redis.pipeline.return_value.execute.side_effect = lambda: round_trip() or [-2, -2, -2]
+    manager = _manager(f"gpt-4-benchmark-{subscribed}")
+    round_trips_per_round = []
+
+    def fetch_next():
+        round_trips_before = round_trips
+        for _ in range(500):
+            manager.fetch_next()
+        round_trips_per_round.append(round_trips - round_trips_before)
+
+    with (
+        patch("core.helper.model_lb_scheduler.redis_client", redis),
+        patch.object(ModelLBScheduler, "_listener", MagicMock()),
+        patch.object(ModelLBScheduler, "_listening", subscribed),
+        patch.object(ModelLBScheduler, "_synced_models", {}),
+    ):
+        benchmark.pedantic(fetch_next, rounds=3, iterations=1)
+
+    if subscribed:
+        # the cooldowns of the model are read once
+        assert round_trips_per_round[0] == 1
+        assert not any(round_trips_per_round[1:])
+    else:
+        assert all(count == 500 for count in round_trips_per_round)
+
+
+@pytest.mark.parametrize(
+    "error", [InvokeRateLimitError("rate limited"), KeyboardInterrupt()], ids=["error", "interrupt"]
+)
+def test_hedged_invoke_only_cools_down_credentials_on_errors(error):
+    configs = [
+        ModelLoadBalancingConfiguration(id="id1", name="first", credentials={}),
+        ModelLoadBalancingConfiguration(id="id2", name="second", credentials={}),
+    ]
+    instance = ModelInstance.__new__(ModelInstance)
+    instance.provider = "openai"
+    instance.model = "gpt-4"
+    instance.credentials = {}
+    instance.provider_model_bundle = MagicMock()
+    instance.model_type_instance = MagicMock(model_type=ModelType.LLM)
+    instance.load_balancing_manager = MagicMock()
+    instance.load_balancing_manager.fetch_next.side_effect = configs
+    instance._invoke_with_credential = MagicMock(side_effect=error)
+    instance._round_robin_invoke = MagicMock(return_value="retried")
+    instance._cooldown = MagicMock()
+
+    with patch("core.model_manager.ModelLatencyTracker.get") as get_tracker:
+        get_tracker.return_value.p95.return_value = 1.0
+        if isinstance(error, Exception):
+            assert instance._hedged_invoke(MagicMock()) == "retried"
+            instance._cooldown.assert_called_once_with(configs[0], error)
+        else:
+            with pytest.raises(KeyboardInterrupt):
+                instance._hedged_invoke(MagicMock())
+            instance._cooldown.assert_not_called()
@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.tools.provider import builtin_tool_snapshot
+from core.tools.provider.builtin_tool_snapshot import SnapshotBuiltinTool, SnapshotBuiltinToolProviderController
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    snapshot_path = str(tmp_path / "_snapshot.json")
+    with patch.object(builtin_tool_snapshot, "SNAPSHOT_PATH", snapshot_path):
+        yield snapshot_path
+
+
+def test_snapshot_round_trip(snapshot_path):
+    providers = [builtin_tool_snapshot._load_provider_class(provider)() for provider in ["time", "json_process"]]
+    builtin_tool_snapshot.write_snapshot(providers)
+
+    snapshot_providers = builtin_tool_snapshot.load_snapshot()
+    assert snapshot_providers is not None
+    for provider, snapshot_provider in zip(providers, snapshot_providers):
+        assert isinstance(snapshot_provider, SnapshotBuiltinToolProviderController)
+        assert snapshot_provider.identity == provider.identity
+        assert snapshot_provider.credentials_schema == provider.credentials_schema
+
+        tools = provider.get_tools() or []
+        snapshot_tools = snapshot_provider.get_tools() or []
+        assert all(isinstance(tool, SnapshotBuiltinTool) for tool in snapshot_tools)
+        assert [tool.model_dump(include={"identity", "parameters", "description"}) for tool in snapshot_tools] == [
+            tool.model_dump(include={"identity", "parameters", "description"}) for tool in tools
+        ]
+
+    # the tool class is imported when the tool is fetched to run
+    tool = snapshot_providers[0].get_tool("current_time")
+    assert type(tool).__name__ == "CurrentTimeTool"
+
+
+def test_outdated_snapshot_is_ignored(snapshot_path):
+    builtin_tool_snapshot.write_snapshot([builtin_tool_snapshot._load_provider_class("time")()])
+
+    with patch.object(builtin_tool_snapshot, "get_fingerprint", return_value="changed"):
+        assert builtin_tool_snapshot.load_snapshot() is None
@@ -1,3 +1,5 @@
+import pytest
+
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.run_condition import RunCondition
 from core.workflow.utils.condition.entities import Condition
@@ -789,3 +791,65 @@ def test_parallels_graph6():
 
     for node_id in ["code1", "code2"]:
         assert graph.node_parallel_mapping[node_id] == child_parallel.id
+
+
+def _large_graph_config(branches: int = 6, sub_branches: int = 3, chain: int = 5) -> dict:
+    """
+    start fans out to `branches` parallel branches, each fanning out again to `sub_branches` chains of `chain`
+    nodes joined before the end node
+    """
+    nodes = [
+        {"id": "start", "data": {"type": "start"}},
+        {"id": "end", "data": {"type": "end", "title": "end", "outputs": []}},
+    ]
+    edges = []
+
+    def add_edge(source: str, target: str) -> None:
+        edges.append({"id": f"{source}-{target}", "source": source, "target": target})
+
+    for branch in range(branches):
+        head, join = f"b{branch}", f"b{branch}-join"
+        nodes += [{"id": head, "data": {"type": "code"}}, {"id": join, "data": {"type": "code"}}]
+        add_edge("start", head)
+        for sub_branch in range(sub_branches):
+            previous = head
+            for position in range(chain):
+                node_id = f"b{branch}-s{sub_branch}-c{position}"
+                nodes.append({"id": node_id, "data": {"type": "code"}})
+                add_edge(previous, node_id)
+                previous = node_id
+            add_edge(previous, join)
+        add_edge(join, "end")
+    return {"nodes": nodes, "edges": edges}
+
+
+def test_init_cached():
+    graph_config = _large_graph_config(branches=2, sub_branches=2, chain=2)
+
+    graph = Graph.init_cached(graph_config=graph_config, workflow_id="workflow")
+    assert Graph.init_cached(graph_config=graph_config, workflow_id="workflow") is graph
+    assert Graph.init_cached(graph_config=graph_config, workflow_id="other") is not graph
+
+    graph_config["nodes"].append({"id": "b0-extra", "data": {"type": "code"}})
+    graph_config["edges"].append({"id": "b0-b0-extra", "source": "b0", "target": "b0-extra"})
+    changed_graph = Graph.init_cached(graph_config=graph_config, workflow_id="workflow")
+    assert changed_graph is not graph
+    assert "b0-extra" in changed_graph.node_ids
+
+
+@pytest.mark.parametrize("compile", ["cached", "init"])
+def test_benchmark_init_large_graph(benchmark, compile):
+    """
+    Init a graph of 104 nodes with 7 parallels nested on two levels 20 times, as 20 runs of a published workflow.
+    `init` reproduces the previous behavior, every run compiled the graph again.
+    """
+    graph_config = _large_graph_config()
+
+    def init_graphs() -> list[Graph]:
+        if compile == "cached":
+            return [Graph.init_cached(graph_config=graph_config, workflow_id="workflow") for _ in range(20)]
+        return [Graph.init(graph_config=graph_config) for _ in range(20)]
+
+    graphs = benchmark.pedantic(init_graphs, rounds=3, iterations=1)
+    assert len(graphs[-1].node_ids) == 104
+    assert len(graphs[-1].parallel_mapping) == 7
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+from core.workflow.graph_engine.workflow_executor import WorkflowExecutor, WorkflowExecutorQueueFullError
+
+
+def _run_blocked(executor: WorkflowExecutor, submit_tasks) -> list[str]:
+    """
+    Occupy the only worker while `submit_tasks` queues tasks, then return the order they ran in
+    """
+    order: list[str] = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    blocker = GraphEngineThreadPool(max_workers=1, tenant_id="blocker", app_id="blocker")
+    executor.submit(blocker, block)
+    started.wait(timeout=5)
+    futures = submit_tasks(order.append)
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_tenants_get_equal_shares():
+    executor = WorkflowExecutor(max_workers=1, tenant_max_concurrency=10, interactive_weight=4)
+    busy = GraphEngineThreadPool(max_workers=10, tenant_id="busy", app_id="app")
+    quiet = GraphEngineThreadPool(max_workers=10, tenant_id="quiet", app_id="app")
+
+    def submit_tasks(run):
+        futures = [executor.submit(busy, run, "busy") for _ in range(4)]
+        futures.append(executor.submit(quiet, run, "quiet"))
+        return futures
+
+    order = _run_blocked(executor, submit_tasks)
+    # the task of the quiet tenant does not wait for the 4 tasks queued before it
+    assert order.index("quiet") <= 1
+
+
+def test_interactive_runs_are_picked_first():
+    executor = WorkflowExecutor(max_workers=1, tenant_max_concurrency=10, interactive_weight=4)
+    interactive = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app")
+    batch = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app", interactive=False)
+
+    def submit_tasks(run):
+        futures = [executor.submit(batch, run, "batch") for _ in range(5)]
+        futures += [executor.submit(interactive, run, "interactive") for _ in range(5)]
+        return futures
+
+    order = _run_blocked(executor, submit_tasks)
+    assert order[:5].count("interactive") >= 4
+    assert order.count("batch") == 5
+
+
+def test_tenant_budget_queues_instead_of_failing():
+    executor = WorkflowExecutor(max_workers=10, tenant_max_concurrency=2, interactive_weight=4)
+    pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app")
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        release.wait()
+        with lock:
+            running -= 1
+
+    futures = [executor.submit(pool, task) for _ in range(6)]
+    assert executor.stats()["queued"] >= 4
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert max_running == 2
+
+
+def test_nested_tasks_do_not_deadlock():
+    executor = WorkflowExecutor(max_workers=1, tenant_max_concurrency=1, interactive_weight=4)
+    pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app")
+
+    def parent():
+        # a parallel branch waiting for its own nested branch, while it holds the only worker
+        return executor.submit(pool, lambda: "nested").result(timeout=5)
+
+    assert executor.submit(pool, parent).result(timeout=5) == "nested"
+
+
+def test_admission_control():
+    executor = WorkflowExecutor(max_workers=1, tenant_max_concurrency=1, interactive_weight=4)
+    pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app")
+    release = threading.Event()
+    futures = [executor.submit(pool, release.wait) for _ in range(3)]
+
+    executor.check_admission(0)
+    with pytest.raises(WorkflowExecutorQueueFullError):
+        executor.check_admission(2)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    executor.check_admission(2)
+
+
+def test_stats_are_logged(caplog):
+    executor = WorkflowExecutor(max_workers=1, tenant_max_concurrency=1, interactive_weight=4)
+    pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", app_id="app")
+    release = threading.Event()
+    futures = [executor.submit(pool, release.wait) for _ in range(3)]
+
+    with caplog.at_level("INFO", logger="core.workflow.graph_engine.workflow_executor"):
+        threading.Thread(target=executor._log_stats, args=(0.01,), daemon=True).start()
+        for _ in range(100):
+            if caplog.records:
+                break
+            time.sleep(0.01)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert "'queued': 2" in caplog.records[0].getMessage()
+    assert "'wait_time'" in caplog.records[0].getMessage()
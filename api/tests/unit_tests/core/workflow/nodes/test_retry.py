@@ -1,8 +1,22 @@
+import threading
+import time
+from unittest.mock import patch
+
+from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.graph_engine.entities.event import (
     GraphRunFailedEvent,
     GraphRunPartialSucceededEvent,
+    GraphRunSucceededEvent,
+    NodeRunRetryBackoffEvent,
     NodeRunRetryEvent,
+    NodeRunSucceededEvent,
+    ParallelBranchRunSucceededEvent,
 )
+from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+from core.workflow.graph_engine.retry_scheduler import RetryScheduler
+from core.workflow.nodes.base.entities import RetryConfig
+from core.workflow.nodes.code.code_node import CodeNode
+from models.workflow import WorkflowNodeExecutionStatus
 from tests.unit_tests.core.workflow.nodes.test_continue_on_error import ContinueOnErrorTestHelper
 
 DEFAULT_VALUE_EDGE = [
@@ -70,3 +84,103 @@ def test_retry_failed():
     assert sum(1 for e in events if isinstance(e, NodeRunRetryEvent)) == 2
     assert any(isinstance(e, GraphRunFailedEvent) for e in events)
     assert len(events) == 8
+
+
+def test_exponential_retry_interval():
+    retry_config = RetryConfig(
+        max_retries=5, retry_interval=1000, retry_enabled=True, backoff_strategy="exponential", max_retry_interval=5000
+    )
+    assert [retry_config.get_retry_interval_seconds(i) for i in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    retry_config.jitter = True
+    for i, interval in enumerate([1, 2, 4, 5, 5], start=1):
+        assert interval / 2 <= retry_config.get_retry_interval_seconds(i) <= interval
+
+    # the interval of the existing configs does not change
+    assert RetryConfig(max_retries=3, retry_interval=1000, retry_enabled=True).get_retry_interval_seconds(3) == 1
+
+
+def test_retry_scheduler_resumes_in_due_order():
+    resumed: list[str] = []
+    done = threading.Event()
+
+    def resume(name: str):
+        resumed.append(name)
+        if len(resumed) == 3:
+            done.set()
+
+    start = time.monotonic()
+    RetryScheduler.schedule(0.2, resume, "late")
+    RetryScheduler.schedule(0.05, resume, "early")
+    RetryScheduler.schedule(0.1, resume, name="middle")
+
+    assert done.wait(timeout=5)
+    assert resumed == ["early", "middle", "late"]
+    assert time.monotonic() - start >= 0.2
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_parallel_branch_runs_during_retry_backoff(mock_close, mock_remove):
+    """a branch waiting to retry a node gives its worker back, the other branch runs meanwhile"""
+    retry_node = ContinueOnErrorTestHelper.get_code_node(
+        "",
+        error_strategy=None,
+        retry_config={"retry_config": {"max_retries": 1, "retry_interval": 500, "retry_enabled": True}},
+    )
+    retry_node["id"] = "retry"
+    quick_node = ContinueOnErrorTestHelper.get_code_node("", error_strategy=None)
+    quick_node["id"] = "quick"
+    graph_config = {
+        "edges": [
+            {"id": "start-retry", "source": "start", "target": "retry", "sourceHandle": "source"},
+            {"id": "start-quick", "source": "start", "target": "quick", "sourceHandle": "source"},
+        ],
+        "nodes": [
+            {"data": {"title": "start", "type": "start", "variables": []}, "id": "start"},
+            retry_node,
+            quick_node,
+        ],
+    }
+    # (node id, time, calls of db.session.remove) of each run of a code node
+    attempts: list[tuple[str, float, int]] = []
+
+    def run_code(self) -> NodeRunResult:
+        attempts.append((self.node_id, time.monotonic(), mock_remove.call_count))
+        if self.node_id == "quick":
+            time.sleep(0.1)
+        if self.node_id == "retry" and len([a for a in attempts if a[0] == "retry"]) == 1:
+            return NodeRunResult(status=WorkflowNodeExecutionStatus.FAILED, inputs={}, error="first attempt failed")
+        return NodeRunResult(status=WorkflowNodeExecutionStatus.SUCCEEDED, inputs={}, outputs={"result": 1})
+
+    graph_engine = ContinueOnErrorTestHelper.create_test_graph_engine(graph_config)
+    # a single worker, the quick branch can only run while the other one does not hold it
+    graph_engine.thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100)
+    # (event, time received)
+    events = []
+    with patch.object(CodeNode, "_run", new=run_code):
+        for event in graph_engine.run():
+            events.append((event, time.monotonic()))
+
+    assert not any(isinstance(e, NodeRunRetryBackoffEvent) for e, _ in events)
+    assert isinstance(events[-1][0], GraphRunSucceededEvent)
+    assert sum(1 for e, _ in events if isinstance(e, NodeRunRetryEvent)) == 1
+
+    succeeded_at = {
+        e.route_node_state.node_id: received_at for e, received_at in events if isinstance(e, NodeRunSucceededEvent)
+    }
+    retry_attempts = [a for a in attempts if a[0] == "retry"]
+    assert len(retry_attempts) == 2
+    first_attempt_at, retried_at = retry_attempts[0][1], retry_attempts[1][1]
+    assert retried_at - first_attempt_at >= 0.5
+    # the other branch finished during the backoff
+    assert first_attempt_at < succeeded_at["quick"] < retried_at
+    assert succeeded_at["retry"] >= retried_at
+
+    # each branch succeeded, the retried one after being resumed by the scheduler
+    branch_start_node_ids = {
+        e.parallel_start_node_id for e, _ in events if isinstance(e, ParallelBranchRunSucceededEvent)
+    }
+    assert branch_start_node_ids == {"retry", "quick"}
+    # the session of the worker was released before the branch was resumed
+    assert retry_attempts[1][2] > retry_attempts[0][2]
@@ -44,3 +44,26 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_child_pool_reads_through_and_keeps_its_writes(pool):
+    pool.add(("upstream", "documents"), ["document"] * 1000)
+    pool.add(("iteration", "item"), "first")
+    pool.add(("llm", "text"), "parent output")
+
+    child = pool.create_child()
+    child.add(("iteration", "item"), "second")
+    child.remove(("llm",))
+
+    assert child.get(("upstream", "documents")) is pool.get(("upstream", "documents"))
+    assert child.get(("iteration", "item")).value == "second"
+    assert child.get(("llm", "text")) is None
+    assert pool.get(("iteration", "item")).value == "first"
+    assert pool.get(("llm", "text")).value == "parent output"
+
+    child.add(("llm", "text"), "child output")
+    child.remove(("upstream", "documents"))
+    assert child.get(("llm", "text")).value == "child output"
+    assert child.get(("upstream", "documents")) is None
+    assert pool.get(("upstream", "documents")) is not None
+    assert child.variable_dictionary.keys() == {"iteration", "llm", "upstream"}
@@ -0,0 +1,6 @@
+from libs.batching import chunked
+
+
+def test_chunked():
+    assert [list(chunk) for chunk in chunked(list(range(5)), 2)] == [[0, 1], [2, 3], [4]]
+    assert len(list(chunked(list(range(2500))))) == 3
@@ -0,0 +1,139 @@
+import errno
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from extensions.storage.cached_storage import CachedStorage
+from extensions.storage.opendal_storage import OpenDALStorage
+
+
+@pytest.fixture
+def remote_storage(tmp_path):
+    storage = OpenDALStorage(scheme="fs", root=str(tmp_path / "remote"))
+    return MagicMock(wraps=storage)
+
+
+def _make_storage(remote_storage, tmp_path, max_size: int = 1024) -> CachedStorage:
+    return CachedStorage(
+        remote_storage, cache_dir=str(tmp_path / "cache"), max_size=max_size, prefixes=["privkeys/", "upload_files/"]
+    )
+
+
+def test_read_through(remote_storage, tmp_path):
+    remote_storage.save("upload_files/a.txt", b"hello")
+    storage = _make_storage(remote_storage, tmp_path)
+
+    assert storage.load_once("upload_files/a.txt") == b"hello"
+    assert storage.load_once("upload_files/a.txt") == b"hello"
+    assert b"".join(storage.load_stream("upload_files/a.txt")) == b"hello"
+    assert storage.exists("upload_files/a.txt")
+    remote_storage.load_once.assert_called_once()
+    remote_storage.load_stream.assert_not_called()
+    remote_storage.exists.assert_not_called()
+
+    target_filepath = tmp_path / "download"
+    storage.download("upload_files/a.txt", str(target_filepath))
+    assert target_filepath.read_bytes() == b"hello"
+    remote_storage.download.assert_not_called()
+
+
+def test_stream_fills_cache(remote_storage, tmp_path):
+    remote_storage.save("upload_files/a.txt", b"hello")
+    storage = _make_storage(remote_storage, tmp_path)
+
+    assert b"".join(storage.load_stream("upload_files/a.txt")) == b"hello"
+    assert storage.load_once("upload_files/a.txt") == b"hello"
+    remote_storage.load_once.assert_not_called()
+
+
+def test_uncached_prefix(remote_storage, tmp_path):
+    remote_storage.save("tools/a.txt", b"hello")
+    storage = _make_storage(remote_storage, tmp_path)
+
+    storage.load_once("tools/a.txt")
+    storage.load_once("tools/a.txt")
+    assert remote_storage.load_once.call_count == 2
+
+
+def test_save_and_delete_invalidate(remote_storage, tmp_path):
+    storage = _make_storage(remote_storage, tmp_path)
+
+    storage.save("privkeys/tenant/private.pem", b"old")
+    storage.save("privkeys/tenant/private.pem", b"new")
+    assert storage.load_once("privkeys/tenant/private.pem") == b"new"
+    remote_storage.load_once.assert_not_called()
+
+    storage.delete("privkeys/tenant/private.pem")
+    with pytest.raises(FileNotFoundError):
+        storage.load_once("privkeys/tenant/private.pem")
+
+
+def test_overwrite_with_uncacheable_data(remote_storage, tmp_path):
+    storage = _make_storage(remote_storage, tmp_path, max_size=10)
+
+    storage.save("upload_files/a.txt", b"old")
+    storage.save("upload_files/a.txt", b"x" * 11)
+    assert storage.load_once("upload_files/a.txt") == b"x" * 11
+    assert b"".join(storage.load_stream("upload_files/a.txt")) == b"x" * 11
+
+    storage.save("upload_files/b.txt", b"old")
+    with patch("extensions.storage.cached_storage.tempfile.mkstemp", side_effect=OSError(errno.ENOSPC, "full")):
+        storage.save("upload_files/b.txt", b"new")
+    assert storage.load_once("upload_files/b.txt") == b"new"
+
+
+def test_lru_eviction(remote_storage, tmp_path):
+    storage = _make_storage(remote_storage, tmp_path, max_size=10)
+    for name in ("a", "b", "c"):
+        storage.save(f"upload_files/{name}", b"12345")
+    storage.save("upload_files/large", b"x" * 11)
+
+    # "a" was evicted when "c" was added and "large" never fits
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+    storage.load_once("upload_files/b")
+    storage.load_once("upload_files/c")
+    remote_storage.load_once.assert_not_called()
+    storage.load_once("upload_files/a")
+    storage.load_once("upload_files/large")
+    assert remote_storage.load_once.call_count == 2
+
+
+def test_index_is_rebuilt_from_disk(remote_storage, tmp_path):
+    _make_storage(remote_storage, tmp_path).save("upload_files/a.txt", b"hello")
+
+    storage = _make_storage(remote_storage, tmp_path)
+    assert storage.load_once("upload_files/a.txt") == b"hello"
+    remote_storage.load_once.assert_not_called()
+
+
+def test_cache_write_failure_does_not_fail_the_read(remote_storage, tmp_path):
+    remote_storage.save("upload_files/a.txt", b"hello")
+    storage = _make_storage(remote_storage, tmp_path)
+
+    with patch("tempfile.mkstemp", side_effect=OSError(errno.ENOSPC, "No space left on device")):
+        assert b"".join(storage.load_stream("upload_files/a.txt")) == b"hello"
+        assert storage.load_once("upload_files/a.txt") == b"hello"
+
+    failing_file = MagicMock()
+    failing_file.write.side_effect = OSError(errno.ENOSPC, "No space left on device")
+    with patch("os.fdopen", return_value=failing_file):
+        assert b"".join(storage.load_stream("upload_files/a.txt")) == b"hello"
+
+    assert not list((tmp_path / "cache").iterdir())
+    assert remote_storage.load_stream.call_count == 2
+
+
+def test_cache_is_shared_by_processes(remote_storage, tmp_path):
+    storage = _make_storage(remote_storage, tmp_path, max_size=10)
+    other_storage = _make_storage(remote_storage, tmp_path, max_size=10)
+
+    # a file cached by the other process is a hit
+    other_storage.save("upload_files/a", b"12345")
+    assert storage.load_once("upload_files/a") == b"12345"
+    remote_storage.load_once.assert_not_called()
+
+    # the size of the files of both processes is bounded by max_size once they rescan
+    with patch("extensions.storage.cached_storage._RESCAN_INTERVAL_SECONDS", 0):
+        other_storage.save("upload_files/b", b"12345")
+        storage.save("upload_files/c", b"12345")
+    assert len(list((tmp_path / "cache").iterdir())) == 2
@@ -0,0 +1,114 @@
+import os
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+from moto import mock_aws
+
+from extensions.storage.oracle_oci_storage import OracleOCIStorage
+from tests.unit_tests.oss.__mock.base import (
+    BaseStorageTest,
+    get_example_bucket,
+    get_example_data,
+    get_example_filename,
+)
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def oci_config(monkeypatch: pytest.MonkeyPatch):
+    from configs import dify_config
+
+    for key, value in {
+        "OCI_BUCKET_NAME": get_example_bucket(),
+        "OCI_REGION": "us-east-1",
+        "OCI_ENDPOINT": None,
+        "OCI_ACCESS_KEY": "testing",
+        "OCI_SECRET_KEY": "testing",
+        "OCI_MULTIPART_THRESHOLD": PART_SIZE,
+        "OCI_MULTIPART_CHUNKSIZE": PART_SIZE,
+        "OCI_MAX_CONCURRENCY": 3,
+    }.items():
+        monkeypatch.setattr(dify_config, key, value)
+
+
+class TestOracleOCI(BaseStorageTest):
+    @pytest.fixture(autouse=True)
+    def setup_method(self, oci_config):
+        """Executed before each test method."""
+        with mock_aws():
+            self.storage = OracleOCIStorage()
+            self.storage.client.create_bucket(Bucket=get_example_bucket())
+            self.storage.save(get_example_filename(), get_example_data())
+            yield
+
+    def test_download(self, tmp_path):
+        target_filepath = tmp_path / "download"
+        self.storage.download(get_example_filename(), str(target_filepath))
+        assert target_filepath.read_bytes() == get_example_data()
+
+    def test_exists(self):
+        assert self.storage.exists(get_example_filename())
+        assert not self.storage.exists("missing.txt")
+
+    def test_load_missing_file(self):
+        with pytest.raises(FileNotFoundError):
+            self.storage.load_once("missing.txt")
+        with pytest.raises(FileNotFoundError):
+            list(self.storage.load_stream("missing.txt"))
+
+    def test_multipart_save_and_ranged_load(self):
+        data = os.urandom(PART_SIZE * 2 + 1024)
+        self.storage.save("large.bin", data)
+
+        parts = self.storage.client.head_object(Bucket=get_example_bucket(), Key="large.bin", PartNumber=1)
+        assert parts["PartsCount"] == 3
+        assert self.storage.load_once("large.bin") == data
+
+        stream = self.storage.load_stream("large.bin")
+        assert isinstance(stream, Generator)
+        chunks = list(stream)
+        assert [len(chunk) for chunk in chunks] == [PART_SIZE, PART_SIZE, 1024]
+        assert b"".join(chunks) == data
+
+    def test_ranged_load_keeps_only_the_window(self):
+        data = os.urandom(PART_SIZE * 5 + 1024)
+        self.storage.save("large.bin", data)
+
+        with (
+            patch.object(self.storage.client, "head_object", side_effect=AssertionError("size is in the response")),
+            patch.object(self.storage, "_get_range", wraps=self.storage._get_range) as get_range,
+        ):
+            stream = self.storage.load_stream("large.bin")
+            chunks = [next(stream)]
+            assert get_range.call_count == 3
+            chunks.extend(stream)
+
+        assert get_range.call_count == 5
+        assert b"".join(chunks) == data
+
+    def test_load_empty_object(self):
+        self.storage.save("empty.bin", b"")
+        assert list(self.storage.load_stream("empty.bin")) == []
+
+    def test_save_stream(self):
+        data = os.urandom(PART_SIZE * 2 + 1024)
+        chunk_size = 1024 * 1024
+        self.storage.save_stream("large.bin", (data[i : i + chunk_size] for i in range(0, len(data), chunk_size)))
+        assert self.storage.load_once("large.bin") == data
+
+        self.storage.save_stream("small.bin", iter([b"te", b"st"]))
+        assert self.storage.load_once("small.bin") == b"test"
+
+    def test_save_stream_aborts_on_error(self):
+        def failing_stream():
+            yield os.urandom(PART_SIZE * 2)
+            raise ValueError("stream broken")
+
+        with pytest.raises(ValueError):
+            self.storage.save_stream("broken.bin", failing_stream())
+
+        uploads = self.storage.client.list_multipart_uploads(Bucket=get_example_bucket())
+        assert not uploads.get("Uploads")
+        assert not self.storage.exists("broken.bin")
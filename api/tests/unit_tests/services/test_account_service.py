@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.account import Account, Tenant
+from services.account_service import AccountService
+
+
+@pytest.fixture
+def redis():
+    store: dict[str, bytes] = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value.encode())
+    redis.delete.side_effect = lambda *keys: [store.pop(key, None) for key in keys]
+    with (
+        patch("services.account_service.redis_client", redis),
+        patch("services.account_service.dify_config.CONSOLE_SESSION_CACHE_ENABLED", True),
+    ):
+        yield redis
+
+
+def test_load_user_from_session_cache(redis):
+    tenant = Tenant(id="tenant_id")
+    tenant.current_role = "editor"
+    account = Account(id="account_id", status="active")
+    account._current_tenant = tenant
+    AccountService._cache_account_session(account)
+
+    with (
+        patch("services.account_service.db") as db,
+        patch.object(AccountService.last_active_updater, "record") as record,
+        patch.object(Account, "query") as query,
+    ):
+        db.session.merge.side_effect = lambda instance, load: instance
+        loaded = AccountService.load_user("account_id")
+
+    assert loaded is not None
+    assert loaded.current_tenant_id == "tenant_id"
+    assert loaded.current_role == "editor"
+    assert loaded.is_editor
+    record.assert_called_once_with("account_id")
+    query.filter_by.assert_not_called()
+
+
+def test_switching_workspace_invalidates_the_session(redis):
+    tenant = Tenant(id="tenant_id")
+    tenant.current_role = "owner"
+    account = Account(id="account_id", status="active")
+    account._current_tenant = tenant
+    AccountService._cache_account_session(account)
+    assert redis.get("account_session:account_id") is not None
+
+    AccountService.invalidate_account_session("account_id")
+
+    assert redis.get("account_session:account_id") is None
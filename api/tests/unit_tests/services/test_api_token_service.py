@@ -0,0 +1,65 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from libs.batch_timestamp_updater import BatchTimestampUpdater
+from models.model import ApiToken
+from services.api_token_service import ApiTokenService
+
+
+@pytest.fixture
+def redis():
+    store: dict[str, bytes] = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value.encode())
+    redis.delete.side_effect = lambda key: store.pop(key, None)
+    with patch("services.api_token_service.redis_client", redis):
+        yield redis
+
+
+@pytest.fixture
+def db():
+    ApiTokenService._local_cache = None
+    with patch("services.api_token_service.db") as db:
+        yield db
+
+
+def test_auth_context_is_cached_until_the_token_is_revoked(redis, db):
+    db.session.scalar.return_value = ApiToken(id="token_id", type="app", app_id="app_id", tenant_id="tenant_id")
+
+    context = ApiTokenService.get_auth_context("app-secret", "app")
+    assert context is not None
+    assert context.app_id == "app_id"
+    assert ApiTokenService.get_auth_context("app-secret", "app") == context
+    assert db.session.scalar.call_count == 1
+    assert redis.get.call_count == 1
+
+    # another process finds the entry in Redis
+    ApiTokenService._local_cache = None
+    assert ApiTokenService.get_auth_context("app-secret", "app") == context
+    assert db.session.scalar.call_count == 1
+
+    ApiTokenService.invalidate_token("app-secret", "app")
+    db.session.scalar.return_value = None
+    assert ApiTokenService.get_auth_context("app-secret", "app") is None
+    assert db.session.scalar.call_count == 2
+
+
+def test_token_usage_is_flushed_in_one_batch(redis):
+    updater = BatchTimestampUpdater(ApiToken.last_used_at, interval=60)
+    with (
+        patch.object(ApiTokenService, "usage_updater", updater),
+        patch.object(updater, "_ensure_flushing"),
+        patch("libs.batch_timestamp_updater.db") as db,
+    ):
+        for token_id in ["a", "b", "a"]:
+            ApiTokenService.record_usage(token_id)
+
+        assert updater.flush() == 2
+        db.session.execute.assert_called_once()
+        params = db.session.execute.call_args.args[1]
+        assert sorted(param["b_row_id"] for param in params) == ["a", "b"]
+        db.session.commit.assert_called_once()
+
+        assert updater.flush() == 0
@@ -0,0 +1,23 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from core.model_runtime.model_providers.model_provider_snapshot import MODEL_PROVIDERS_PATH
+from services.model_provider_service import ModelProviderService
+
+
+def test_get_model_provider_icon_reads_the_provider_assets():
+    with patch("services.model_provider_service.ProviderManager"):
+        service = ModelProviderService()
+
+    byte_data, mimetype = service.get_model_provider_icon("openai", "icon_small", "en_US")
+
+    assert byte_data == Path(MODEL_PROVIDERS_PATH, "openai", "_assets", "icon_s_en.svg").read_bytes()
+    assert mimetype == "image/svg+xml"
+
+
+def test_get_model_provider_icon_of_a_missing_file():
+    with patch("services.model_provider_service.ProviderManager"):
+        service = ModelProviderService()
+
+    with patch("services.model_provider_service.os.path.exists", return_value=False):
+        assert service.get_model_provider_icon("openai", "icon_large", "en_US") == (None, None)
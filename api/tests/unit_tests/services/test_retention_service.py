@@ -0,0 +1,87 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.retention_service import (
+    BulkRetentionEngine,
+    TablePartition,
+    TenantPlanResolver,
+    get_expired_partitions,
+    parse_partition_high_value,
+)
+
+
+@pytest.fixture
+def mock_redis():
+    store: dict[str, bytes] = {}
+    redis = MagicMock()
+    redis.get.side_effect = store.get
+    redis.set.side_effect = lambda key, value: store.__setitem__(key, value.encode())
+    redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value.encode())
+    redis.mget.side_effect = lambda keys: [store.get(key) for key in keys]
+    redis.delete.side_effect = lambda key: store.pop(key, None)
+    with patch("services.retention_service.redis_client", redis):
+        yield store
+
+
+def test_plans_are_resolved_once_per_tenant(mock_redis):
+    mock_redis["features:cached"] = b"team"
+    features = MagicMock()
+    features.billing.subscription.plan = "sandbox"
+
+    with patch("services.retention_service.FeatureService.get_features", return_value=features) as get_features:
+        plans = TenantPlanResolver().get_plans(["cached", "a", "a", "b"])
+
+    assert plans == {"cached": "team", "a": "sandbox", "b": "sandbox"}
+    assert get_features.call_count == 2
+    assert mock_redis["features:a"] == b"sandbox"
+
+
+def test_engine_runs_until_done(mock_redis):
+    visited = []
+
+    def process_batch(cursor):
+        visited.append(cursor)
+        position = cursor[0] if cursor else 0
+        return [position + 1] if position < 3 else None
+
+    assert BulkRetentionEngine("test", max_duration=0, batch_interval=0).run(process_batch) == 3
+    assert visited == [None, [1], [2], [3]]
+    assert "retention_checkpoint:test" not in mock_redis
+
+
+def test_engine_resumes_from_checkpoint(mock_redis):
+    created_at = datetime.datetime(2024, 1, 1, 12, 0)
+    engine = BulkRetentionEngine("test", max_duration=1e-9, batch_interval=0)
+
+    # the time budget is spent after the first batch
+    assert engine.run(lambda cursor: [created_at, "message-id"]) == 1
+    assert "retention_checkpoint:test" in mock_redis
+
+    visited = []
+
+    engine.run(lambda cursor: visited.append(cursor))
+    assert visited == [[created_at, "message-id"]]
+    assert "retention_checkpoint:test" not in mock_redis
+
+
+def test_parse_partition_high_value():
+    assert parse_partition_high_value("TIMESTAMP' 2024-02-01 00:00:00'") == datetime.datetime(2024, 2, 1)
+    assert parse_partition_high_value("TIMESTAMP '2024-01-01 00:00:00'") == datetime.datetime(2024, 1, 1)
+    assert parse_partition_high_value("MAXVALUE") is None
+    assert parse_partition_high_value(None) is None
+
+
+def test_get_expired_partitions():
+    partitions = [
+        TablePartition(name="MESSAGES_P0", high_value=datetime.datetime(2024, 1, 1), interval=False),
+        TablePartition(name="SYS_P101", high_value=datetime.datetime(2024, 2, 1), interval=True),
+        TablePartition(name="SYS_P102", high_value=datetime.datetime(2024, 3, 1), interval=True),
+        TablePartition(name="SYS_P103", high_value=None, interval=True),
+    ]
+
+    expired = get_expired_partitions(partitions, datetime.datetime(2024, 2, 15))
+
+    # SYS_P102 still holds rows created after the cutoff
+    assert [partition.name for partition in expired] == ["MESSAGES_P0", "SYS_P101"]